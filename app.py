@@ -1,43 +1,119 @@
 import os
 import sys
+import logging
+import random
+import threading
+import time
+import json
+import base64
+import binascii
+import uuid
+import hashlib
+import gzip
+import tempfile
+import csv
+from collections import OrderedDict, Counter
+from itertools import islice
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import importlib.metadata
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file
+import importlib.util
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g, send_from_directory, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String
+from sqlalchemy import String, event, inspect as sa_inspect
+from sqlalchemy.orm import Session
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.routing import BuildError
 from datetime import datetime, timezone, timedelta, date
-from functools import cmp_to_key
+import numpy as np
 import pandas as pd
-from io import BytesIO
+import openpyxl
+import xlsxwriter
+from io import BytesIO, StringIO
+from markupsafe import Markup
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Loggers por subsistema. Níveis e amostragem são configurados por variáveis de
+# ambiente, por exemplo:
+#   LOG_LEVEL=INFO            nível padrão de todos os subsistemas
+#   LOG_LEVEL_PHASE=DEBUG     nível específico do subsistema 'phase'
+#   LOG_SAMPLE_PHASE=0.01     registra apenas ~1% das mensagens de depuração de 'phase'
+LOG_SUBSISTEMAS = ('phase', 'report', 'upload')
+_taxas_amostragem = {}
+
+def configurar_logging():
+    logger_base = logging.getLogger('sistema')
+    if not logger_base.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+        logger_base.addHandler(handler)
+    logger_base.setLevel(os.getenv('LOG_LEVEL', 'WARNING').upper())
+    for nome in LOG_SUBSISTEMAS:
+        logger = logging.getLogger(f'sistema.{nome}')
+        nivel = os.getenv(f'LOG_LEVEL_{nome.upper()}')
+        logger.setLevel(nivel.upper() if nivel else logging.NOTSET)
+        try:
+            _taxas_amostragem[logger.name] = float(os.getenv(f'LOG_SAMPLE_{nome.upper()}', '1'))
+        except ValueError:
+            _taxas_amostragem[logger.name] = 1.0
+
+def debug_ativo(logger):
+    """
+    Indica se uma mensagem de depuração deve ser montada e registrada.
+
+    Verifique antes de formatar mensagens caras: com o nível desativado o custo
+    é apenas uma checagem de nível. Aplica a amostragem configurada para o logger.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    taxa = _taxas_amostragem.get(logger.name, 1.0)
+    return taxa >= 1 or random.random() < taxa
+
+configurar_logging()
+phase_logger = logging.getLogger('sistema.phase')
+report_logger = logging.getLogger('sistema.report')
+upload_logger = logging.getLogger('sistema.upload')
+
 def get_brasil_time():
     # Retorna a data/hora atual no fuso horário de Brasília (UTC-3)
     return datetime.now(timezone.utc) - timedelta(hours=3)
 
-def log_change(registration, field_changed, old_value, new_value, change_source='system'):
+# Ordem dos valores nas tuplas de auditoria (ver registro_auditoria)
+AUDIT_COLUNAS = ('registration', 'field_changed', 'old_value', 'new_value', 'changed_by', 'change_source', 'brand',
+                 'changed_at')
+
+def valor_comparavel_auditoria(value):
     """
-    Registra uma alteração no log de auditoria
-    
+    Forma de um valor usada para decidir se houve mudança auditável: datas em ISO,
+    vazio para None/NaN (NULL e '' são o mesmo valor) e o resto como string
+    """
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return str(value)
+
+def registro_auditoria(registration, field_changed, old_value, new_value, change_source='system', changed_by=None,
+                       brand=None):
+    """
+    Monta um registro de auditoria (sem gravar) como tupla na ordem de AUDIT_COLUNAS,
+    ou None se não houve mudança
+
     Args:
         registration: Matrícula do funcionário
         field_changed: Nome do campo que foi alterado
         old_value: Valor anterior
         new_value: Novo valor
         change_source: Fonte da alteração ('system' ou 'upload')
+        changed_by: Usuário responsável (padrão: usuário autenticado ou 'system')
+        brand: Marca do funcionário
     """
-    # Converte valores para string para comparação
-    def convert_for_comparison(value):
-        if isinstance(value, (datetime, date)):
-            return value.strftime('%Y-%m-%d')
-        return str(value) if value is not None else ''
-    
     # Compara os valores convertidos
-    if convert_for_comparison(old_value) == convert_for_comparison(new_value):
-        return  # Não registra se não houve mudança
+    if valor_comparavel_auditoria(old_value) == valor_comparavel_auditoria(new_value):
+        return None  # Não registra se não houve mudança
         
     # Converte valores para exibição
     if isinstance(old_value, (datetime, date)):
@@ -49,17 +125,66 @@ def log_change(registration, field_changed, old_value, new_value, change_source=
         new_value = new_value.strftime('%d/%m/%Y')
     elif new_value is None:
         new_value = ''
+
+    if changed_by is None:
+        changed_by = current_user.username if current_user.is_authenticated else 'system'
         
-    # Cria o registro de auditoria
-    audit_log = AuditLog(
-        registration=registration,
-        field_changed=field_changed,
-        old_value=str(old_value) if old_value is not None else '',
-        new_value=str(new_value) if new_value is not None else '',
-        changed_by=current_user.username if current_user.is_authenticated else 'system',
-        change_source=change_source
+    return (
+        registration,
+        field_changed,
+        str(old_value) if old_value is not None else '',
+        str(new_value) if new_value is not None else '',
+        changed_by,
+        change_source,
+        brand,
+        datetime.utcnow()
     )
-    db.session.add(audit_log)
+
+def buffer_auditoria(session=None):
+    """
+    Lista de registros de auditoria pendentes da sessão (tuplas de registro_auditoria).
+    É gravada em um único INSERT em lote no commit (ver _gravar_auditoria_pendente)
+    e descartada se a transação for desfeita.
+    """
+    session = session if session is not None else db.session()
+    # O buffer pertence à transação: sem uma em andamento, um rollback não teria o
+    # que encerrar e os registros iriam para o commit seguinte
+    if not session.in_transaction():
+        session.begin()
+    return session.info.setdefault('audit_buffer', [])
+
+def log_change(registration, field_changed, old_value, new_value, change_source='system', brand=None):
+    """
+    Registra uma alteração no log de auditoria
+    
+    Args:
+        registration: Matrícula do funcionário
+        field_changed: Nome do campo que foi alterado
+        old_value: Valor anterior
+        new_value: Novo valor
+        change_source: Fonte da alteração ('system' ou 'upload')
+        brand: Marca do funcionário
+    """
+    valores = registro_auditoria(registration, field_changed, old_value, new_value, change_source, brand=brand)
+    if valores is not None:
+        buffer_auditoria().append(valores)
+
+@event.listens_for(Session, 'before_commit')
+def _gravar_auditoria_pendente(session):
+    """Grava os registros de auditoria acumulados na transação com um único executemany"""
+    pendentes = session.info.get('audit_buffer')
+    if not pendentes:
+        return
+    session.info['audit_buffer'] = []
+    tabela = AuditLog.__table__
+    for inicio in range(0, len(pendentes), 500):
+        session.execute(tabela.insert(), [dict(zip(AUDIT_COLUNAS, valores)) for valores in pendentes[inicio:inicio + 500]])
+
+@event.listens_for(Session, 'after_transaction_end')
+def _descartar_auditoria_pendente(session, transaction):
+    """Descarta registros não gravados quando a transação principal termina sem commit"""
+    if transaction.parent is None and session.info.get('audit_buffer'):
+        session.info['audit_buffer'] = []
 
 # Correção para Python 3.14
 if sys.version_info >= (3, 14):
@@ -69,6 +194,89 @@ if sys.version_info >= (3, 14):
             return importlib.util.find_spec(package_name).loader
         pkgutil.get_loader = get_loader
 
+# Tradução dos valores de status do inglês (ou variações) para o português, por campo
+_TRADUCOES_STATUS = {
+    'status': {
+        'active': 'Ativo',
+        'inactive': 'Inativo',
+        'on_leave': 'Afastado',
+        'fired': 'Demitido',
+        'demitido': 'Demitido',  # Mantém se já estiver em português
+        'desligado': 'Demitido',
+        'desligada': 'Demitido',
+        'afastado': 'Afastado',
+        'afastada': 'Afastado',
+        'ativo': 'Ativo',
+        'ativa': 'Ativo',
+        'inativo': 'Inativo',
+        'inativa': 'Inativo'
+    },
+    'course_status': {
+        'not_started': 'Não Iniciado',
+        'notstarted': 'Não Iniciado',
+        'in_progress': 'Em Andamento',
+        'inprogress': 'Em Andamento',
+        'andamento': 'Em Andamento',
+        'completed': 'Concluído',
+        'concluido': 'Concluído',
+        'concluída': 'Concluído',
+        'delayed': 'Atrasado',
+        'atrasado': 'Atrasado',
+        'cancelled': 'Cancelado',
+        'cancelado': 'Cancelado',
+        'cancelada': 'Cancelado'
+    },
+    'operation_ready': {
+        'yes': 'Sim',
+        'y': 'Sim',
+        's': 'Sim',
+        'sim': 'Sim',
+        'no': 'Não',
+        'n': 'Não',
+        'não': 'Não',
+        'nao': 'Não'
+    },
+    'employee_type': {
+        'trainee': 'Estagiário',
+        'estagiario': 'Estagiário',
+        'estagiária': 'Estagiário',
+        'temporary': 'Temporário',
+        'temporario': 'Temporário',
+        'temporária': 'Temporário',
+        'intern': 'Estagiário',
+        'clt': 'CLT',
+        'pj': 'PJ',
+        'freelancer': 'Freelancer'
+    }
+}
+
+# Tabelas planas montadas uma vez: (campo, valor em minúsculas) -> tradução, e os
+# valores já em português (em minúsculas) de cada campo
+TRADUCOES_STATUS = {
+    (campo, chave): traducao for campo, tabela in _TRADUCOES_STATUS.items() for chave, traducao in tabela.items()
+}
+_VALORES_PT_STATUS = frozenset(
+    (campo, traducao.lower()) for campo, tabela in _TRADUCOES_STATUS.items() for traducao in tabela.values()
+)
+
+@lru_cache(maxsize=4096)
+def _traduzir_status_parcial(field, value_str):
+    """Caminho lento de translate_status (sem correspondência exata), memorizado por (campo, valor)"""
+    value_lower = value_str.lower()
+
+    # Verifica se o valor (em maiúsculas) já está em português
+    if (field, value_lower) in _VALORES_PT_STATUS:
+        # Retorna com a primeira letra maiúscula para padronizar
+        return value_str[0].upper() + value_str[1:].lower()
+
+    # Verifica correspondência parcial
+    for eng, pt in _TRADUCOES_STATUS[field].items():
+        if eng.lower() in value_lower or pt.lower() in value_lower:
+            return pt
+
+    # Se não encontrou tradução, retorna o valor original
+    return value_str
+
 def translate_status(value, field):
     """
     Traduz valores de status do inglês para português
@@ -82,103 +290,73 @@ def translate_status(value, field):
     """
     if not value:
         return value
-        
-    # Dicionário de tradução para os status
-    translations = {
-        'status': {
-            'active': 'Ativo',
-            'inactive': 'Inativo',
-            'on_leave': 'Afastado',
-            'fired': 'Demitido',
-            'demitido': 'Demitido',  # Mantém se já estiver em português
-            'desligado': 'Demitido',
-            'desligada': 'Demitido',
-            'afastado': 'Afastado',
-            'afastada': 'Afastado',
-            'ativo': 'Ativo',
-            'ativa': 'Ativo',
-            'inativo': 'Inativo',
-            'inativa': 'Inativo'
-        },
-        'course_status': {
-            'not_started': 'Não Iniciado',
-            'notstarted': 'Não Iniciado',
-            'in_progress': 'Em Andamento',
-            'inprogress': 'Em Andamento',
-            'andamento': 'Em Andamento',
-            'completed': 'Concluído',
-            'concluido': 'Concluído',
-            'concluída': 'Concluído',
-            'delayed': 'Atrasado',
-            'atrasado': 'Atrasado',
-            'cancelled': 'Cancelado',
-            'cancelado': 'Cancelado',
-            'cancelada': 'Cancelado'
-        },
-        'operation_ready': {
-            'yes': 'Sim',
-            'y': 'Sim',
-            's': 'Sim',
-            'sim': 'Sim',
-            'no': 'Não',
-            'n': 'Não',
-            'não': 'Não',
-            'nao': 'Não'
-        },
-        'employee_type': {
-            'trainee': 'Estagiário',
-            'estagiario': 'Estagiário',
-            'estagiária': 'Estagiário',
-            'temporary': 'Temporário',
-            'temporario': 'Temporário',
-            'temporária': 'Temporário',
-            'intern': 'Estagiário',
-            'clt': 'CLT',
-            'pj': 'PJ',
-            'freelancer': 'Freelancer'
-        }
-    }
-    
+
     # Converte para string e remove espaços extras
     value_str = str(value).strip()
-    value_lower = value_str.lower()
-    
-    # Verifica se o campo tem tradução definida
-    if field in translations:
-        # Verifica se o valor exato está no dicionário
-        if value_lower in translations[field]:
-            return translations[field][value_lower]
-            
-        # Verifica se o valor (em maiúsculas) já está em português
-        pt_values = [v.lower() for v in translations[field].values()]
-        if value_lower in pt_values:
-            # Retorna com a primeira letra maiúscula para padronizar
-            return value_str[0].upper() + value_str[1:].lower()
-            
-        # Verifica correspondência parcial
-        for eng, pt in translations[field].items():
-            if eng.lower() in value_lower or pt.lower() in value_lower:
-                return pt
-    
-    # Se não encontrou tradução, retorna o valor original
-    return value_str
+    traducao = TRADUCOES_STATUS.get((field, value_str.lower()))
+    if traducao is not None:
+        return traducao
+    if field not in _TRADUCOES_STATUS:
+        return value_str
+    return _traduzir_status_parcial(field, value_str)
+
+def traduzir_coluna(valores, field):
+    """
+    translate_status para uma coluna inteira (lista, tupla ou Series): cada valor
+    distinto é traduzido uma única vez. Retorna uma lista na mesma ordem.
+    """
+    traduzidos = {}
+    resultado = []
+    for valor in valores:
+        try:
+            resultado.append(traduzidos[valor])
+        except KeyError:
+            traduzidos[valor] = translate_status(valor, field)
+            resultado.append(traduzidos[valor])
+    return resultado
 
 app = Flask(__name__)
 app.jinja_env.filters['translate'] = translate_status
 
 # Função helper para gerar URLs dinamicamente com base na marca
-def url_for_brand(endpoint, brand=None, **values):
+# (endpoint, sufixo da marca ou None) -> endpoint registrado; montado uma vez a partir
+# de app.url_map na primeira chamada de url_for_brand (ver _mapa_endpoints_marca)
+_endpoints_marca = None
+_endpoints_marca_lock = threading.Lock()
+# Endpoints pedidos a url_for_brand sem nenhuma variante registrada
+url_for_brand_nao_resolvidos = Counter()
+
+def _mapa_endpoints_marca():
     """
-    Gera uma URL dinamicamente, adicionando o prefixo de marca (_vivo ou _claro) 
-    ao endpoint se a marca for fornecida.
+    Resolve, para cada endpoint base, qual endpoint registrado url_for_brand deve
+    usar com cada marca: '<endpoint>_vivo'/'<endpoint>_claro' quando existe, senão o
+    genérico; sem marca, a primeira variante existente entre _vivo, _claro e o genérico.
     """
-    from flask import url_for as flask_url_for, request
-    
-    # Se brand foi passado explicitamente, usa e remove de values
-    brand = values.pop('brand', brand)
+    global _endpoints_marca
+    if _endpoints_marca is None:
+        with _endpoints_marca_lock:
+            if _endpoints_marca is None:
+                registrados = {regra.endpoint for regra in app.url_map.iter_rules()}
+                bases = set(registrados)
+                for endpoint in registrados:
+                    for sufixo in ('_vivo', '_claro'):
+                        if endpoint.endswith(sufixo):
+                            bases.add(endpoint[:-len(sufixo)])
+                mapa = {}
+                for base in bases:
+                    generico = base if base in registrados else None
+                    for sufixo in ('_vivo', '_claro'):
+                        mapa[(base, sufixo)] = base + sufixo if base + sufixo in registrados else generico
+                    mapa[(base, None)] = next(
+                        (e for e in (base + '_vivo', base + '_claro', base) if e in registrados), None
+                    )
+                _endpoints_marca = mapa
+    return _endpoints_marca
 
-    # Se brand não foi fornecido, tenta extrair do contexto (request.path)
-    if not brand:
+def _marca_da_requisicao():
+    """Marca inferida da rota atual (ou do usuário autenticado), calculada uma vez por requisição"""
+    if '_url_for_brand_marca' not in g:
+        brand = None
         if request.path.startswith('/vivo/'):
             brand = 'Vivo'
         elif request.path.startswith('/claro/'):
@@ -192,30 +370,36 @@ def url_for_brand(endpoint, brand=None, **values):
                     brand = getattr(current_user, 'brand', None)
             except Exception:
                 brand = None
+        g._url_for_brand_marca = brand
+    return g._url_for_brand_marca
 
-    # Se temos uma marca, tenta construir o endpoint correspondente primeiro
-    if brand:
-        brand_suffix = '_vivo' if brand.lower() == 'vivo' else '_claro'
-        endpoint_with_brand = endpoint + brand_suffix
-        try:
-            return flask_url_for(endpoint_with_brand, **values)
-        except Exception:
-            # se falhar, tenta o endpoint genérico como fallback
-            try:
-                return flask_url_for(endpoint, **values)
-            except Exception:
-                raise
-
-    # Se não houve marca no contexto, tentar automaticamente endpoints com sufixos
-    # Isto evita BuildError quando templates genéricos são renderizados sem brand
-    for suffix in ('_vivo', '_claro'):
-        try:
-            return flask_url_for(endpoint + suffix, **values)
-        except Exception:
-            continue
+def url_for_brand(endpoint, brand=None, **values):
+    """
+    Gera uma URL dinamicamente, adicionando o prefixo de marca (_vivo ou _claro) 
+    ao endpoint se a marca for fornecida.
 
-    # Por fim, tenta o endpoint genérico
-    return flask_url_for(endpoint, **values)
+    A marca vem do argumento ou, se ausente, da rota atual/usuário autenticado. Sem
+    marca, usa a primeira variante registrada entre _vivo, _claro e o genérico. Se a
+    variante escolhida não aceitar os parâmetros, usa o endpoint genérico.
+    """
+    # Se brand foi passado explicitamente, usa e remove de values
+    brand = values.pop('brand', brand) or _marca_da_requisicao()
+    sufixo = ('_vivo' if brand.lower() == 'vivo' else '_claro') if brand else None
+
+    resolvido = _mapa_endpoints_marca().get((endpoint, sufixo))
+    if resolvido is None:
+        # Nenhuma variante registrada: conta e deixa o url_for levantar o BuildError
+        url_for_brand_nao_resolvidos[endpoint] += 1
+        return url_for(endpoint, **values)
+    try:
+        return url_for(resolvido, **values)
+    except BuildError:
+        # A variante da marca existe mas não aceita esses parâmetros: tenta uma vez o
+        # endpoint genérico e conta o caso
+        if resolvido == endpoint or endpoint not in app.view_functions:
+            raise
+        url_for_brand_nao_resolvidos[endpoint] += 1
+        return url_for(endpoint, **values)
 
 app.jinja_env.globals['url_for_brand'] = url_for_brand
 
@@ -300,16 +484,24 @@ login_manager.login_view = 'login'
 class AuditLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     registration = db.Column(db.String(50), nullable=False, index=True)
-    field_changed = db.Column(db.String(50), nullable=False)
+    field_changed = db.Column(db.String(50), nullable=False, index=True)
     old_value = db.Column(db.String(500))
     new_value = db.Column(db.String(500))
-    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     changed_by = db.Column(db.String(80), nullable=False)
     change_source = db.Column(db.String(20), nullable=False)  # 'system' or 'upload'
+    # Marca do funcionário, gravada junto com o registro (matrículas podem se repetir entre marcas)
+    brand = db.Column(db.String(20))
+    __table_args__ = (
+        db.Index('ix_audit_log_brand_changed_at', 'brand', 'changed_at'),
+        db.Index('ix_audit_log_brand_registration_changed_at', 'brand', 'registration', 'changed_at'),
+        db.Index('ix_audit_log_brand_field_changed', 'brand', 'field_changed'),
+    )
 
     def to_dict(self):
         return {
             'id': self.id,
+            'brand': self.brand,
             'registration': self.registration,
             'field_changed': self.field_changed,
             'old_value': self.old_value,
@@ -346,6 +538,8 @@ class Employee(db.Model):
     instructor = db.Column(db.String(100))
     contato = db.Column(db.String(20))
     operation_ready = db.Column(String(10))
+    # Forma canônica de operation_ready, derivada na escrita (ver _normalizar_apto_operacao)
+    is_operation_ready = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false(), index=True)
     integration_start = db.Column(db.Date)
     integration_end = db.Column(db.Date)
     normative_start = db.Column(db.Date)
@@ -357,12 +551,66 @@ class Employee(db.Model):
     loading_date = db.Column(db.Date)
     field_operation_date = db.Column(db.Date)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    __table_args__ = (db.UniqueConstraint('registration', 'brand', name='uq_registration_brand'),)
+    # Fase persistida: recalculada na escrita (ver _recalcular_fases_alteradas) e
+    # diariamente pela virada de data (ver atualizar_fases_vencidas e rollover_fases.py)
+    current_phase = db.Column(db.String(30), index=True)
+    phase_computed_on = db.Column(db.Date)
+    # Hash dos campos importáveis (ver impressao_digital): o upload pula as linhas iguais
+    import_fingerprint = db.Column(db.String(32))
+    __table_args__ = (
+        db.UniqueConstraint('registration', 'brand', name='uq_registration_brand'),
+        # Apoia a ordenação da listagem (field_operation_date DESC NULLS LAST, id) por marca.
+        # O SQLite não aceita NULLS LAST em índices, mas lá NULL já é o menor valor e
+        # DESC coloca os vazios no fim
+        db.Index('ix_employee_brand_field_operation_date', 'brand', field_operation_date.desc().nulls_last(),
+                 'id').ddl_if(dialect='postgresql'),
+        db.Index('ix_employee_brand_field_operation_date', 'brand', field_operation_date.desc(),
+                 'id').ddl_if(dialect='sqlite'),
+        # Relatório de gerentes: células (gerente, tipo, data de operação) por marca
+        db.Index('ix_employee_brand_manager_type_fod', 'brand', 'corporate_manager', 'employee_type', 'field_operation_date'),
+        db.Index('ix_employee_brand_employee_type', 'brand', 'employee_type'),
+        # Gestão de carregamento: apenas aptos com data de carregamento
+        db.Index('ix_employee_brand_loading_date_ready', 'brand', 'loading_date',
+                 sqlite_where=db.and_(is_operation_ready, loading_date.isnot(None)),
+                 postgresql_where=db.and_(is_operation_ready, loading_date.isnot(None))),
+        # Apresentação de duplado: apenas quem tem início de duplado
+        db.Index('ix_employee_brand_double_start', 'brand', 'double_start',
+                 sqlite_where=double_start.isnot(None),
+                 postgresql_where=double_start.isnot(None)),
+        # "Última atualização" dos relatórios
+        db.Index('ix_employee_brand_last_updated', 'brand', 'last_updated'),
+        # Virada diária de fase (phase_computed_on vencido)
+        db.Index('ix_employee_brand_phase_computed_on', 'brand', 'phase_computed_on'),
+    )
 
-    def get_current_phase(self):
+    def to_dict(self):
+        dados = {}
+        for coluna in self.__table__.columns:
+            valor = getattr(self, coluna.name)
+            dados[coluna.name] = valor.isoformat() if isinstance(valor, (date, datetime)) else valor
+        return dados
+
+    def get_current_phase(self, today=None, trace=None):
+        """
+        Calcula a fase atual do colaborador.
+
+        Args:
+            today: Data de referência (padrão: hoje)
+            trace: Lista opcional que recebe os passos da decisão (modo "explicar fase")
+        """
         # Corrigido erro de comparação datetime vs date - v3 - deploy completo
-        today = datetime.now().date()
-        
+        today = today or datetime.now().date()
+
+        # O rastreio só é montado quando pedido ou quando o log de fase está ativo
+        registrar_log = trace is None and debug_ativo(phase_logger)
+        if registrar_log:
+            trace = []
+        fase = self._decidir_fase(today, trace)
+        if registrar_log:
+            phase_logger.debug("Matrícula: %s | %s", self.registration, ' | '.join(trace))
+        return fase
+
+    def _decidir_fase(self, today, trace):
         # Função helper para garantir que as datas sejam do tipo date (não datetime)
         def to_date(dt):
             if dt is None:
@@ -383,48 +631,47 @@ class Employee(db.Model):
         loading_date = to_date(self.loading_date)
         field_op_date = to_date(self.field_operation_date)
         
-        # Log detalhado para depuração
-        print(f"[LOG FASE] Matrícula: {self.registration} | Nome: {self.full_name}")
-        print(f"[LOG FASE] Datas: Integração=({integration_start}, {integration_end}), Normativo=({normative_start}, {normative_end}), Técnico=({technical_course_start}, {technical_course_end}), Duplado=({double_start}, {double_end})")
-        print(f"[LOG FASE] Data Carregamento: {loading_date} | Data Operação Campo: {field_op_date}")
-        print(f"[LOG FASE] Status do Curso: {self.course_status} | Operation Ready: {self.operation_ready}")
-        print(f"[LOG FASE] Data atual: {today}")
+        if trace is not None:
+            trace.append(f"Datas: Integração=({integration_start}, {integration_end}), Normativo=({normative_start}, {normative_end}), Técnico=({technical_course_start}, {technical_course_end}), Duplado=({double_start}, {double_end})")
+            trace.append(f"Data Carregamento: {loading_date} | Data Operação Campo: {field_op_date}")
+            trace.append(f"Status do Curso: {self.course_status} | Operation Ready: {self.operation_ready}")
+            trace.append(f"Data atual: {today}")
 
         # 1. Verificar se está em alguma fase ativa
         if integration_start and integration_end and integration_start <= today <= integration_end:
-            print(f"[LOG FASE] Fase ativa detectada: Integração")
-            print(f"[LOG FASE] Fase retornada: Integração\n")
+            if trace is not None:
+                trace.append("Fase ativa detectada: Integração")
             return 'Integração'
             
         if normative_start and normative_end and normative_start <= today <= normative_end:
-            print(f"[LOG FASE] Fase ativa detectada: Normativo")
-            print(f"[LOG FASE] Fase retornada: Normativo\n")
+            if trace is not None:
+                trace.append("Fase ativa detectada: Normativo")
             return 'Normativo'
             
         if technical_course_start and technical_course_end and technical_course_start <= today <= technical_course_end:
-            print(f"[LOG FASE] Fase ativa detectada: Curso Técnico")
-            print(f"[LOG FASE] Fase retornada: Curso Técnico\n")
+            if trace is not None:
+                trace.append("Fase ativa detectada: Curso Técnico")
             return 'Curso Técnico'
             
         if double_start and double_end and double_start <= today <= double_end:
-            print(f"[LOG FASE] Fase ativa detectada: Duplado")
-            print(f"[LOG FASE] Fase retornada: Duplado\n")
+            if trace is not None:
+                trace.append("Fase ativa detectada: Duplado")
             return 'Duplado'
 
         # 2. Verificar condições especiais (Operação e Carregamento)
         if (field_op_date and today >= field_op_date and 
             self.course_status and ('concluído' in self.course_status.lower() or 'concluido' in self.course_status.lower())):
             if not loading_date or (loading_date and field_op_date >= loading_date):
-                print(f"[LOG FASE] Fase especial: Operação")
-                print(f"[LOG FASE] Fase retornada: Operação\n")
+                if trace is not None:
+                    trace.append("Fase especial: Operação")
                 return 'Operação'
-            else:
-                print(f"[LOG FASE] Condição não atendida para Operação: field_operation_date < loading_date")
+            elif trace is not None:
+                trace.append("Condição não atendida para Operação: field_operation_date < loading_date")
 
         if loading_date and today >= loading_date:
             if double_end and loading_date >= double_end:
-                print(f"[LOG FASE] Fase especial: Carregamento")
-                print(f"[LOG FASE] Fase retornada: Carregamento\n")
+                if trace is not None:
+                    trace.append("Fase especial: Carregamento")
                 return 'Carregamento'
 
         # 3. Verificar se todas as fases estão no futuro
@@ -441,8 +688,8 @@ class Employee(db.Model):
             (double_start and double_end)
         )
         if all_phases_in_future and has_any_phase:
-            print("[LOG FASE] Todas as fases estão no futuro, retornando 'Previsto'")
-            print(f"[LOG FASE] Fase retornada: Previsto\n")
+            if trace is not None:
+                trace.append("Todas as fases estão no futuro, retornando 'Previsto'")
             return 'Previsto'
 
         # 4. Verificar se há alguma fase futura
@@ -453,21 +700,731 @@ class Employee(db.Model):
             (double_start and double_start > today)
         )
         if has_future_phase:
-            print("[LOG FASE] Há fases futuras, retornando 'Previsto'")
-            print(f"[LOG FASE] Fase retornada: Previsto\n")
+            if trace is not None:
+                trace.append("Há fases futuras, retornando 'Previsto'")
             return 'Previsto'
 
-        print("[LOG FASE] Nenhuma condição atendida, retornando 'Sem Fase Ativa'")
-        print(f"[LOG FASE] Fase retornada: Sem Fase Ativa\n")
+        if trace is not None:
+            trace.append("Nenhuma condição atendida, retornando 'Sem Fase Ativa'")
         return 'Sem Fase Ativa'
 
+class DataVersion(db.Model):
+    """Contador de versão dos dados de cada marca, usado para invalidar o cache de resultados"""
+    __tablename__ = 'data_version'
+    brand = db.Column(db.String(20), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+MARCAS = ('Vivo', 'Claro')
+
+class UploadJob(db.Model):
+    """Importação de planilha executada em segundo plano (ver processar_upload)"""
+    __tablename__ = 'upload_job'
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    brand = db.Column(db.String(20), nullable=False)
+    filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='pending')  # preview, pending, running, done, error
+    created_by = db.Column(db.String(80), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    chunks = db.Column(db.Integer, nullable=False, default=0)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    created = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    unchanged = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Integer, nullable=False, default=0)
+    error_details = db.Column(db.Text)  # JSON: [{"row": n, "registration": ..., "error": ...}]
+    message = db.Column(db.String(500))
+    # Pré-visualização (dry-run): diff calculado e versão dos dados da marca naquele momento
+    diff = db.Column(db.Text)
+    base_version = db.Column(db.Integer)
+    # Hash do arquivo e versão dos dados da marca logo após a importação, quando
+    # nenhuma outra escrita se intercalou (ver upload_identico)
+    file_hash = db.Column(db.String(64))
+    data_version = db.Column(db.Integer)
+    __table_args__ = (db.Index('ix_upload_job_brand_file_hash', 'brand', 'file_hash'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'brand': self.brand,
+            'filename': self.filename,
+            'status': self.status,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'chunks': self.chunks,
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'errors': self.errors,
+            'error_details': json.loads(self.error_details) if self.error_details else [],
+            'message': self.message
+        }
+
+# Campos que determinam a fase do colaborador
+PHASE_DATE_FIELDS = (
+    'integration_start', 'integration_end', 'normative_start', 'normative_end',
+    'technical_course_start', 'technical_course_end', 'double_start', 'double_end',
+    'loading_date', 'field_operation_date'
+)
+PHASE_INPUT_FIELDS = PHASE_DATE_FIELDS + ('course_status', 'operation_ready')
+
+def classificar_fases(datas, course_status, today=None):
+    """
+    Classifica a fase de vários colaboradores de uma só vez.
+
+    Segue exatamente a mesma ordem de decisão de Employee.get_current_phase():
+    Integração, Normativo, Curso Técnico, Duplado, Operação/Carregamento,
+    Previsto e, por fim, Sem Fase Ativa.
+
+    Args:
+        datas: Dicionário {campo: array datetime64[D]} com os dez campos de
+            PHASE_DATE_FIELDS (datas ausentes como NaT)
+        course_status: Sequência com o status do curso de cada linha
+        today: Data de referência (padrão: hoje)
+
+    Returns:
+        numpy.ndarray: Fase de cada linha
+    """
+    hoje = np.datetime64(today or datetime.now().date(), 'D')
+    d = {campo: np.asarray(datas[campo], dtype='datetime64[D]') for campo in PHASE_DATE_FIELDS}
+
+    # Comparações com NaT são sempre falsas, o que reproduz os testes de "data preenchida"
+    def ativa(inicio, fim):
+        return (d[inicio] <= hoje) & (hoje <= d[fim])
+
+    status = np.char.lower(np.asarray([s or '' for s in course_status], dtype=str))
+    concluido = (np.char.find(status, 'concluído') >= 0) | (np.char.find(status, 'concluido') >= 0)
+
+    data_op = d['field_operation_date']
+    carregamento = d['loading_date']
+    operacao = (hoje >= data_op) & concluido & (np.isnat(carregamento) | (data_op >= carregamento))
+    em_carregamento = (hoje >= carregamento) & (carregamento >= d['double_end'])
+
+    pares = (('integration_start', 'integration_end'), ('normative_start', 'normative_end'),
+             ('technical_course_start', 'technical_course_end'), ('double_start', 'double_end'))
+    todas_no_futuro = np.ones(len(data_op), dtype=bool)
+    alguma_fase = np.zeros(len(data_op), dtype=bool)
+    inicio_futuro = np.zeros(len(data_op), dtype=bool)
+    for inicio, fim in pares:
+        todas_no_futuro &= (np.isnat(d[inicio]) | (d[inicio] > hoje)) & (np.isnat(d[fim]) | (d[fim] > hoje))
+        alguma_fase |= ~np.isnat(d[inicio]) & ~np.isnat(d[fim])
+        inicio_futuro |= d[inicio] > hoje
+
+    condicoes = [
+        ativa('integration_start', 'integration_end'),
+        ativa('normative_start', 'normative_end'),
+        ativa('technical_course_start', 'technical_course_end'),
+        ativa('double_start', 'double_end'),
+        operacao,
+        em_carregamento,
+        (todas_no_futuro & alguma_fase) | inicio_futuro,
+    ]
+    fases = ['Integração', 'Normativo', 'Curso Técnico', 'Duplado', 'Operação', 'Carregamento', 'Previsto']
+    return np.select(condicoes, fases, default='Sem Fase Ativa')
+
+def classificar_fases_linhas(linhas, today=None):
+    """
+    Classifica linhas de consulta no formato (*PHASE_DATE_FIELDS, course_status).
+
+    Returns:
+        list: Fase de cada linha, na mesma ordem
+    """
+    if not linhas:
+        return []
+    colunas = list(zip(*linhas))
+    datas = {
+        campo: np.array([v.date() if isinstance(v, datetime) else v for v in colunas[i]], dtype='datetime64[D]')
+        for i, campo in enumerate(PHASE_DATE_FIELDS)
+    }
+    return classificar_fases(datas, colunas[len(PHASE_DATE_FIELDS)], today=today).tolist()
+
+def _colunas_fase():
+    return [getattr(Employee, campo) for campo in PHASE_DATE_FIELDS] + [Employee.course_status]
+
+@event.listens_for(Session, 'before_flush')
+def _recalcular_fases_alteradas(session, flush_context, instances):
+    """Mantém current_phase atualizado sempre que uma data, o status do curso
+    ou o apto para operação de um colaborador for alterado (upload, API, edição)"""
+    alterados = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Employee):
+            continue
+        if obj in session.new:
+            alterados.append(obj)
+            continue
+        state = sa_inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in PHASE_INPUT_FIELDS):
+            alterados.append(obj)
+    if not alterados:
+        return
+
+    # Classifica todos os colaboradores alterados em uma única passada
+    today = datetime.now().date()
+    linhas = [tuple(getattr(obj, campo) for campo in PHASE_DATE_FIELDS + ('course_status',)) for obj in alterados]
+    for obj, fase in zip(alterados, classificar_fases_linhas(linhas, today=today)):
+        obj.current_phase = fase
+        obj.phase_computed_on = today
+
+def operacao_pronta(valor):
+    """Indica se um valor de operation_ready significa apto ('Sim' após translate_status)"""
+    return translate_status(valor, 'operation_ready') == 'Sim'
+
+@event.listens_for(Session, 'before_flush')
+def _normalizar_apto_operacao(session, flush_context, instances):
+    """Mantém is_operation_ready coerente com operation_ready em toda escrita pelo ORM"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Employee):
+            continue
+        if obj in session.new or sa_inspect(obj).attrs.operation_ready.history.has_changes():
+            obj.is_operation_ready = operacao_pronta(obj.operation_ready)
+
+def impressao_digital(valores):
+    """
+    Hash estável dos campos importáveis de um colaborador (valores na ordem de
+    UPLOAD_CAMPOS). Distingue None de texto vazio e grava datas em ISO, de modo
+    que linhas do banco e da planilha com o mesmo conteúdo geram o mesmo hash.
+    """
+    partes = []
+    for valor in valores:
+        if valor is None:
+            partes.append('\x00')
+        elif isinstance(valor, datetime):
+            partes.append(valor.date().isoformat())
+        elif isinstance(valor, date):
+            partes.append(valor.isoformat())
+        else:
+            partes.append(str(valor))
+    return hashlib.blake2b('\x1f'.join(partes).encode('utf-8'), digest_size=16).hexdigest()
+
+@event.listens_for(Session, 'before_flush')
+def _atualizar_impressao_digital(session, flush_context, instances):
+    """Mantém import_fingerprint coerente com os campos importáveis em toda escrita pelo ORM"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Employee):
+            continue
+        state = sa_inspect(obj)
+        if obj in session.new or any(state.attrs[campo].history.has_changes() for campo in UPLOAD_CAMPOS):
+            obj.import_fingerprint = impressao_digital(tuple(getattr(obj, campo) for campo in UPLOAD_CAMPOS))
+
+# Colaboradores lidos e classificados por lote na reclassificação de fases
+FASES_LOTE = int(os.getenv('FASES_LOTE', '1000'))
+
+def _reclassificar_fases(brand, today, pendentes, invalidar_cache):
+    """
+    Percorre os colaboradores (da marca, se informada) em lotes por id e grava a
+    fase apenas das linhas em que ela mudou ou que ainda não tinham fase calculada;
+    `pendentes=True` lê apenas estas últimas (phase_computed_on nulo).
+
+    A versão das fases (VERSAO_FASES) é incrementada uma vez por marca alterada,
+    ao final; a versão principal não muda, pois nenhum campo importado mudou.
+    Retorna quantos colaboradores foram gravados.
+    """
+    # Atualiza apenas as colunas da fase, sem alterar last_updated
+    tabela = Employee.__table__
+    stmt = tabela.update().where(tabela.c.id == db.bindparam('_id')).values(
+        current_phase=db.bindparam('_fase'),
+        phase_computed_on=db.bindparam('_dia'),
+        last_updated=tabela.c.last_updated
+    )
+    total, ultimo_id, alteradas = 0, None, set()
+    while True:
+        # Seleciona apenas as colunas usadas na classificação, sem montar objetos do ORM
+        query = db.session.query(Employee.id, Employee.brand, Employee.current_phase, Employee.phase_computed_on,
+                                 *_colunas_fase())
+        if brand:
+            query = query.filter(Employee.brand == brand)
+        if pendentes:
+            query = query.filter(Employee.phase_computed_on.is_(None))
+        if ultimo_id is not None:
+            query = query.filter(Employee.id > ultimo_id)
+        linhas = query.order_by(Employee.id).limit(FASES_LOTE).all()
+        if not linhas:
+            break
+        ultimo_id = linhas[-1][0]
+
+        fases = classificar_fases_linhas([linha[4:] for linha in linhas], today=today)
+        mudaram = [(linha, fase) for linha, fase in zip(linhas, fases) if linha[3] is None or fase != linha[2]]
+        # Grava em uma transação própria para não expirar os objetos já carregados na sessão
+        # (ex.: current_user), que as rotas de leitura continuam usando
+        if mudaram:
+            with db.engine.begin() as conn:
+                conn.execute(stmt, [{'_id': linha[0], '_fase': fase, '_dia': today} for linha, fase in mudaram])
+            alteradas.update(linha[1] for linha, _ in mudaram)
+            total += len(mudaram)
+
+    if invalidar_cache and alteradas:
+        with db.engine.begin() as conn:
+            for marca in alteradas:
+                incrementar_versao_dados(marca, conexao=conn, escopo=VERSAO_FASES)
+    return total
+
+def atualizar_fases_vencidas(brand=None, today=None, invalidar_cache=True):
+    """
+    Virada de data: reclassifica todos os colaboradores e grava apenas as fases
+    que mudaram (a fase depende da data atual). Executada pelo job diário
+    rollover_fases.py, fora das requisições. invalidar_cache=False não incrementa
+    a versão dos dados (preenchimento da migração 002, que roda antes de a
+    tabela data_version existir).
+
+    Returns:
+        int: Quantidade de colaboradores atualizados
+    """
+    return _reclassificar_fases(brand, today or datetime.now().date(), False, invalidar_cache)
+
+# Última data em que cada marca teve as fases pendentes verificadas neste processo
+_fases_verificadas_em = {}
+
+def preencher_fases_pendentes(brand=None, today=None):
+    """
+    Calcula a fase dos colaboradores que ainda não têm uma (phase_computed_on nulo,
+    ex.: linhas inseridas direto no banco), no máximo uma vez por dia e por marca
+    em cada processo. Usada pelas rotas de leitura; a virada diária fica com
+    atualizar_fases_vencidas.
+
+    Returns:
+        int: Quantidade de colaboradores atualizados
+    """
+    today = today or datetime.now().date()
+    if _fases_verificadas_em.get(brand) == today:
+        return 0
+    total = _reclassificar_fases(brand, today, True, True)
+    _fases_verificadas_em[brand] = today
+    return total
+
+def agregar_texto(coluna, separador=','):
+    """Concatena os valores de uma coluna no GROUP BY (group_concat no SQLite, string_agg no Postgres)"""
+    if db.engine.dialect.name == 'postgresql':
+        return db.func.string_agg(db.cast(coluna, db.String), separador)
+    return db.func.group_concat(coluna, separador)
+
+# Contadores de data_version com escopo (chave '<escopo>:<marca>'), incrementados
+# separados da versão principal: a reclassificação de fases invalida o cache sem
+# contar como alteração dos colaboradores (ver upload_identico) e o arquivamento
+# da auditoria invalida apenas as telas do log
+VERSAO_FASES = 'fases'
+VERSAO_AUDITORIA = 'auditoria'
+
+def _chaves_versao(brand=None, escopo=None):
+    marcas = [brand] if brand else MARCAS
+    return [marca if escopo is None else f'{escopo}:{marca}' for marca in marcas]
+
+def incrementar_versao_dados(brand=None, conexao=None, escopo=None):
+    """
+    Incrementa a versão dos dados da marca (ou de todas as marcas quando brand=None),
+    invalidando os resultados em cache em todos os workers. `escopo` incrementa o
+    contador separado desse escopo em vez da versão principal.
+
+    Deve ser chamada por toda rota que altera colaboradores. Executa na transação
+    da sessão atual (ou na conexão informada) e é confirmada junto com a escrita.
+    """
+    executor = conexao if conexao is not None else db.session
+    tabela = DataVersion.__table__
+    # Um único INSERT ... ON CONFLICT DO UPDATE: dois primeiros escritores da mesma
+    # marca não disputam a criação da linha
+    stmt = _insert_dialeto()(tabela).values(brand=db.bindparam('_marca'), version=1)
+    stmt = stmt.on_conflict_do_update(index_elements=['brand'], set_={'version': tabela.c.version + 1})
+    for chave in _chaves_versao(brand, escopo):
+        executor.execute(stmt, {'_marca': chave})
+
+def incrementar_versao_dados_se(brand, versao):
+    """
+    Incrementa a versão principal da marca apenas se ela ainda for `versao`
+    (UPDATE ... WHERE version = :versao), na transação da sessão atual. Retorna
+    False se outra escrita já a alterou. O UPDATE trava a linha da marca até o
+    commit, então as gravações feitas nessa transação não se intercalam com as
+    de outra escrita.
+    """
+    tabela = DataVersion.__table__
+    # Marca que ainda não tem linha está na versão 0
+    db.session.execute(
+        _insert_dialeto()(tabela).values(brand=brand, version=0).on_conflict_do_nothing(index_elements=['brand'])
+    )
+    resultado = db.session.execute(
+        tabela.update().where(tabela.c.brand == brand, tabela.c.version == versao).values(version=tabela.c.version + 1)
+    )
+    return resultado.rowcount == 1
+
+def versoes_dados(brand=None, escopos=(None,)):
+    """Versões da marca em cada escopo (None = principal), lidas em uma única consulta"""
+    chaves = {escopo: _chaves_versao(brand, escopo) for escopo in escopos}
+    versoes = dict(
+        db.session.query(DataVersion.brand, DataVersion.version)
+        .filter(DataVersion.brand.in_([chave for lista in chaves.values() for chave in lista]))
+        .all()
+    )
+    return tuple(sum(versoes.get(chave, 0) for chave in chaves[escopo]) for escopo in escopos)
+
+def versao_dados(brand=None, escopo=None):
+    """Versão atual dos dados da marca (soma de todas as marcas quando brand=None)"""
+    return versoes_dados(brand, (escopo,))[0]
+
+class ResultadoCache:
+    """
+    Cache em memória de resultados de relatórios e dashboards.
+
+    As chaves incluem (marca, rota, argumentos normalizados, versões dos dados e
+    das fases da marca, data atual). Como a versão fica no banco e é incrementada por toda
+    escrita, cada worker do gunicorn enxerga a invalidação na requisição seguinte.
+
+    Entradas expiram após `ttl` segundos. Durante mais `stale` segundos a entrada
+    vencida ainda é servida enquanto é recalculada em segundo plano
+    (stale-while-revalidate). Acima de `max_entradas`, a menos usada é descartada.
+    """
+
+    def __init__(self, max_entradas=256, ttl=300, stale=60):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.stale = stale
+        self._entradas = OrderedDict()
+        self._recalculando = set()
+        self._lock = threading.Lock()
+        self.contadores = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'evictions': 0, 'revalidations': 0}
+
+    def _chave(self, brand, rota, args, escopo=None):
+        args_normalizados = tuple(sorted((str(k), str(v)) for k, v in (args or {}).items()))
+        escopos = (None, VERSAO_FASES) + ((escopo,) if escopo else ())
+        return (brand or '*', rota, args_normalizados, versoes_dados(brand, escopos), datetime.now().date())
+
+    def obter(self, brand, rota, args, calcular, escopo=None):
+        """
+        Retorna o resultado em cache ou calcula com `calcular()`. `escopo` acrescenta
+        à chave a versão desse escopo (ex.: VERSAO_AUDITORIA).
+
+        `calcular` não pode depender do contexto da requisição, pois também é
+        executada em segundo plano para revalidar entradas vencidas.
+        """
+        chave = self._chave(brand, rota, args, escopo)
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                valor, criado_em = entrada
+                idade = agora - criado_em
+                if idade <= self.ttl:
+                    self._entradas.move_to_end(chave)
+                    self.contadores['hits'] += 1
+                    return valor
+                if idade <= self.ttl + self.stale:
+                    self._entradas.move_to_end(chave)
+                    self.contadores['stale_hits'] += 1
+                    if chave not in self._recalculando:
+                        self._recalculando.add(chave)
+                        threading.Thread(target=self._revalidar, args=(chave, calcular), daemon=True).start()
+                    return valor
+            self.contadores['misses'] += 1
+
+        valor = calcular()
+        self._guardar(chave, valor)
+        return valor
+
+    def _revalidar(self, chave, calcular):
+        try:
+            with app.app_context():
+                valor = calcular()
+            self._guardar(chave, valor)
+            with self._lock:
+                self.contadores['revalidations'] += 1
+        except Exception:
+            report_logger.exception("Erro ao revalidar o cache de %s", chave[1])
+        finally:
+            with self._lock:
+                self._recalculando.discard(chave)
+
+    def _guardar(self, chave, valor):
+        with self._lock:
+            self._entradas[chave] = (valor, time.monotonic())
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.contadores['evictions'] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return dict(self.contadores, entradas=len(self._entradas), max_entradas=self.max_entradas,
+                        ttl=self.ttl, stale=self.stale)
+
+result_cache = ResultadoCache(
+    max_entradas=int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '256')),
+    ttl=int(os.getenv('RESULT_CACHE_TTL', '300')),
+    stale=int(os.getenv('RESULT_CACHE_STALE', '60'))
+)
+
+class CacheFragmentos:
+    """
+    Cache em memória de fragmentos HTML já renderizados (linhas da tabela de
+    colaboradores), limitado pelo total de caracteres guardados, com descarte
+    da entrada menos usada (LRU).
+
+    As chaves carregam tudo de que o fragmento depende (ver linha_employee), então
+    não há invalidação: um colaborador alterado simplesmente gera outra chave e a
+    entrada antiga sai pelo LRU.
+    """
+
+    def __init__(self, max_caracteres=32 * 1024 * 1024):
+        self.max_caracteres = max_caracteres
+        self._entradas = OrderedDict()
+        self._tamanho = 0
+        self._lock = threading.Lock()
+        self.contadores = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def obter(self, chave, renderizar):
+        with self._lock:
+            fragmento = self._entradas.get(chave)
+            if fragmento is not None:
+                self._entradas.move_to_end(chave)
+                self.contadores['hits'] += 1
+                return fragmento
+            self.contadores['misses'] += 1
+
+        fragmento = renderizar()
+        with self._lock:
+            if chave not in self._entradas:
+                self._entradas[chave] = fragmento
+                self._tamanho += len(fragmento)
+                while self._tamanho > self.max_caracteres and self._entradas:
+                    _, descartado = self._entradas.popitem(last=False)
+                    self._tamanho -= len(descartado)
+                    self.contadores['evictions'] += 1
+        return fragmento
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._tamanho = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return dict(self.contadores, entradas=len(self._entradas), caracteres=self._tamanho,
+                        max_caracteres=self.max_caracteres)
+
+row_cache = CacheFragmentos(max_caracteres=int(os.getenv('ROW_CACHE_MAX_CHARS', str(32 * 1024 * 1024))))
+
+def linha_employee(employee, brand):
+    """
+    HTML da linha do colaborador na tabela (_employee_row.html), vindo do cache de
+    fragmentos. A chave inclui o que a linha exibe e pode mudar: last_updated (toda
+    edição), a fase persistida e o dia em que foi calculada (virada de data), a marca
+    dos links e o tipo de acesso do usuário (botões de edição).
+    """
+    access_type = current_user.access_type if current_user.is_authenticated else None
+    chave = (employee.id, employee.last_updated, employee.current_phase, employee.phase_computed_on,
+             brand, access_type)
+    return Markup(row_cache.obter(chave, lambda: app.jinja_env.get_template('_employee_row.html').render(
+        employee=employee, brand=brand, current_user=current_user
+    )))
+
+app.jinja_env.globals['linha_employee'] = linha_employee
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+# Listagem paginada de colaboradores (keyset)
+INDEX_PAGE_SIZE = int(os.getenv('INDEX_PAGE_SIZE', '200'))
+MAX_PAGE_SIZE = 1000
+
+EMPLOYEE_TEXT_FILTERS = ['registration', 'full_name', 'role', 'employee_type', 'status',
+                         'course_status', 'team', 'course_location', 'manager',
+                         'corporate_manager', 'instructor', 'operation_ready']
+EMPLOYEE_DATE_FILTERS = [
+    'admission_date', 'integration_start', 'integration_end',
+    'normative_start', 'normative_end', 'technical_course_start',
+    'technical_course_end', 'double_start', 'double_end',
+    'loading_date', 'field_operation_date'
+]
+
+# Campos da pesquisa livre (parâmetro q) quando q_field é 'all'
+EMPLOYEE_SEARCH_FIELDS = EMPLOYEE_TEXT_FILTERS + ['contato']
+
+def _valores_args(args, chave):
+    """Valores de um parâmetro repetido (MultiDict da requisição ou dict com lista)"""
+    if hasattr(args, 'getlist'):
+        return args.getlist(chave)
+    valor = args.get(chave)
+    if valor is None:
+        return []
+    return list(valor) if isinstance(valor, (list, tuple)) else [valor]
+
+def _filtro_pesquisa(campo, termos):
+    """
+    Condição da pesquisa livre: algum dos termos contido no campo, ou em qualquer
+    campo de EMPLOYEE_SEARCH_FIELDS com campo='all'. Nos campos de data o termo é
+    comparado como data DD/MM/AAAA.
+    """
+    datas = []
+    for termo in termos:
+        try:
+            datas.append(datetime.strptime(termo, '%d/%m/%Y').date())
+        except ValueError:
+            pass
+    if campo in EMPLOYEE_DATE_FILTERS:
+        return getattr(Employee, campo).in_(datas) if datas else db.false()
+    if campo in EMPLOYEE_SEARCH_FIELDS:
+        return db.or_(*[getattr(Employee, campo).ilike(f'%{termo}%') for termo in termos])
+    if campo != 'all':
+        return db.false()
+    condicoes = [getattr(Employee, c).ilike(f'%{termo}%') for c in EMPLOYEE_SEARCH_FIELDS for termo in termos]
+    if datas:
+        condicoes.extend(getattr(Employee, c).in_(datas) for c in EMPLOYEE_DATE_FILTERS)
+    return db.or_(*condicoes)
+
+def aplicar_filtros_employee(query, args):
+    """
+    Aplica à query os filtros vindos da requisição: texto por campo, valores marcados
+    nos filtros de coluna (<campo>_in, repetido), pesquisa livre (q, repetido, no
+    campo q_field) e intervalos de datas (<campo>_start/<campo>_end)
+    """
+    for field in EMPLOYEE_TEXT_FILTERS:
+        value = args.get(field)
+        if value and value != 'todos':  # 'todos' é o valor padrão dos selects
+            # Se for um campo de seleção múltipla (pode conter valores separados por vírgula)
+            if ',' in value:
+                values = [v.strip() for v in value.split(',') if v.strip()]
+                if values:
+                    query = query.filter(getattr(Employee, field).in_(values))
+            else:
+                query = query.filter(getattr(Employee, field).ilike(f'%{value}%'))
+
+        # Valores exatos, com as pontas aparadas e '' para vazio, como em facetas_employees
+        selecionados = _valores_args(args, f'{field}_in')
+        if selecionados:
+            coluna = db.func.trim(db.func.coalesce(getattr(Employee, field), ''))
+            query = query.filter(coluna.in_([valor.strip() for valor in selecionados]))
+
+    termos = [termo.strip() for termo in _valores_args(args, 'q') if termo.strip()]
+    if termos:
+        query = query.filter(_filtro_pesquisa(args.get('q_field') or 'all', termos))
+
+    for date_field in EMPLOYEE_DATE_FILTERS:
+        start_date = args.get(f'{date_field}_start')
+        end_date = args.get(f'{date_field}_end')
+
+        if start_date:
+            try:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+                query = query.filter(getattr(Employee, date_field) >= start_date)
+            except (ValueError, TypeError):
+                pass
+
+        if end_date:
+            try:
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+                query = query.filter(getattr(Employee, date_field) <= end_date)
+            except (ValueError, TypeError):
+                pass
+    return query
+
+def _codificar_cursor(employee):
+    """Cursor opaco com a posição (field_operation_date, id) do último item da página"""
+    data = employee.field_operation_date.isoformat() if employee.field_operation_date else None
+    bruto = json.dumps({'d': data, 'id': employee.id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+def _decodificar_cursor(cursor):
+    """Inverso de _codificar_cursor; levanta ValueError para cursores inválidos"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        data = datetime.strptime(dados['d'], '%Y-%m-%d').date() if dados['d'] else None
+        return data, int(dados['id'])
+    except (KeyError, TypeError, ValueError, binascii.Error) as e:
+        raise ValueError('Cursor inválido') from e
+
+def pagina_employees(brand, args=None, cursor=None, page_size=INDEX_PAGE_SIZE):
+    """
+    Retorna uma página de colaboradores da marca ordenada por
+    (field_operation_date DESC NULLS LAST, id), e o cursor da próxima página.
+
+    A paginação é por keyset: a página seguinte começa logo após a chave do
+    último item, sem OFFSET, então o custo não cresce com a profundidade.
+    """
+    query = Employee.query.filter_by(brand=brand)
+    if args is not None:
+        query = aplicar_filtros_employee(query, args)
+
+    fod = Employee.field_operation_date
+    if cursor:
+        ultima_data, ultimo_id = _decodificar_cursor(cursor)
+        if ultima_data is None:
+            query = query.filter(fod.is_(None), Employee.id > ultimo_id)
+        else:
+            query = query.filter(
+                (fod < ultima_data)
+                | ((fod == ultima_data) & (Employee.id > ultimo_id))
+                | fod.is_(None)
+            )
+
+    employees = query.order_by(fod.desc().nulls_last(), Employee.id).limit(page_size + 1).all()
+    next_cursor = None
+    if len(employees) > page_size:
+        employees = employees[:page_size]
+        next_cursor = _codificar_cursor(employees[-1])
+    return employees, next_cursor
+
+# Colunas da tabela de colaboradores com filtro por valor (checkboxes) e colunas de
+# data com filtro por mês/ano ou data exata
+FACETAS_CAMPOS = ('team', 'manager', 'corporate_manager', 'instructor', 'status',
+                  'course_status', 'employee_type', 'course_location')
+FACETAS_DATAS = ('field_operation_date', 'admission_date')
+MESES_PT = ('Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+            'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro')
+
+def facetas_employees(brand):
+    """
+    Valores distintos e contagens dos filtros da tabela de colaboradores da marca,
+    com um GROUP BY por coluna. Cada grupo é pequeno, então espaços nas pontas e
+    vazios são normalizados aqui (vazio vira None, exibido como '-' na tabela).
+    Datas vêm por dia e por mês/ano, das mais recentes para as mais antigas.
+    """
+    facetas = {}
+    for campo in FACETAS_CAMPOS:
+        coluna = getattr(Employee, campo)
+        contagens = Counter()
+        for valor, total in db.session.query(coluna, db.func.count()).filter(
+            Employee.brand == brand
+        ).group_by(coluna):
+            contagens[(valor or '').strip() or None] += total
+        facetas[campo] = [
+            {'value': valor, 'count': total}
+            for valor, total in sorted(contagens.items(), key=lambda item: (item[0] is None, (item[0] or '').lower()))
+        ]
+
+    for campo in FACETAS_DATAS:
+        coluna = getattr(Employee, campo)
+        datas = db.session.query(coluna, db.func.count()).filter(
+            Employee.brand == brand, coluna.isnot(None)
+        ).group_by(coluna).order_by(coluna.desc()).all()
+        meses = Counter()
+        for dia, total in datas:
+            meses[(dia.year, dia.month)] += total
+        facetas[campo] = {
+            'datas': [
+                {'value': dia.isoformat(), 'label': dia.strftime('%d/%m/%Y'), 'count': total}
+                for dia, total in datas
+            ],
+            'meses': [
+                {'value': f'{ano}-{mes:02d}', 'label': f'{MESES_PT[mes - 1]}/{ano}', 'count': total}
+                for (ano, mes), total in sorted(meses.items(), reverse=True)
+            ]
+        }
+    return facetas
+
 # Routes
 def safe_date_sort(a, b, field):
-    """Função auxiliar para ordenação segura de datas, lidando com valores None"""
+    """
+    Função auxiliar para ordenação segura de datas, lidando com valores None.
+
+    Consultas devem ordenar no banco (ver pagina_employees); isto fica apenas
+    para listas já carregadas em memória.
+    """
     a_val = getattr(a, field, None)
     b_val = getattr(b, field, None)
     
@@ -634,8 +1591,620 @@ def delete_user_claro(user_id):
     flash('Usuário excluído com sucesso')
     return redirect(url_for('user_management_claro'))
 
+# Colunas da planilha de importação (posição -> campo do modelo)
+UPLOAD_CAMPOS_TEXTO = (
+    ('full_name', 1),
+    ('role', 2),
+    ('employee_type', 3),
+    ('cep', 5),
+    ('status', 6),
+    ('course_status', 7),
+    ('team', 8),
+    ('course_location', 9),
+    ('manager', 10),
+    ('corporate_manager', 11),
+    ('instructor', 12),
+    ('contato', 13),
+    ('operation_ready', 14),
+)
+UPLOAD_CAMPOS_DATA = (
+    ('admission_date', 4),
+    ('integration_start', 15),        # Início Integração
+    ('integration_end', 16),          # Término Integração
+    ('normative_start', 17),          # Início Normativo
+    ('normative_end', 18),            # Término Normativo
+    ('technical_course_start', 19),   # Início Curso Técnico
+    ('technical_course_end', 20),     # Término Curso Técnico
+    ('double_start', 21),             # Início Duplado
+    ('double_end', 22),               # Término Duplado
+    ('loading_date', 23),             # Data de Carregamento
+    ('field_operation_date', 24),     # Data de Operação de Campo
+)
+UPLOAD_TOTAL_COLUNAS = 25
+# Linhas por bloco na importação (cada bloco é gravado e confirmado separadamente)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', '1000'))
+UPLOAD_CAMPOS = tuple(campo for campo, _ in UPLOAD_CAMPOS_TEXTO + UPLOAD_CAMPOS_DATA)
+UPLOAD_CAMPOS_DATA_NOMES = frozenset(campo for campo, _ in UPLOAD_CAMPOS_DATA)
+
+UPLOAD_FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%Y/%m/%d')
+# Data base dos números seriais do Excel (sistema 1900, com o bug do ano bissexto)
+EXCEL_EPOCA = pd.Timestamp('1899-12-30')
+
+TIPOS_NUMERICOS = (int, float, np.int64, np.float64)
+
+def _normalizar_texto(serie):
+    """
+    Normaliza uma coluna de texto da planilha de uma vez: vazio para células em
+    branco, strings sem espaços nas pontas e números inteiros sem o '.0' que o
+    pandas acrescenta em colunas numéricas com células vazias.
+    """
+    serie = serie.astype(object)
+    vazios = serie.isna()
+    e_numero = serie.map(type).isin(TIPOS_NUMERICOS) & ~vazios
+
+    resultado = serie.astype(str).str.strip()
+    if e_numero.any():
+        numeros = pd.to_numeric(serie.where(e_numero), errors='coerce')
+        inteiros = numeros.notna() & (numeros % 1 == 0)
+        resultado[inteiros] = numeros[inteiros].astype('int64').astype(str)
+    resultado[vazios] = ''
+    return resultado
+
+def _normalizar_datas(serie):
+    """
+    Converte uma coluna de datas da planilha de uma vez. Aceita textos nos formatos
+    de UPLOAD_FORMATOS_DATA (o primeiro que servir vence), datas/Timestamps e
+    números seriais do Excel; '  /  /    ' e células vazias viram None.
+
+    Retorna (datas, invalidas): uma série de date/None e a máscara das células
+    preenchidas que não puderam ser convertidas.
+    """
+    serie = serie.astype(object)
+    tipos = serie.map(type)
+    e_texto = tipos == str
+    textos = serie.where(e_texto).str.strip()
+    vazios = serie.isna() | textos.isin(['', '/  /'])
+
+    convertidas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    pendentes = e_texto & ~vazios
+    for formato in UPLOAD_FORMATOS_DATA:
+        if not pendentes.any():
+            break
+        tentativa = pd.to_datetime(textos.where(pendentes), format=formato, errors='coerce')
+        convertidas = convertidas.fillna(tentativa)
+        pendentes &= tentativa.isna()
+
+    # Números seriais do Excel (dias desde 1899-12-30)
+    e_numero = tipos.isin(TIPOS_NUMERICOS) & ~vazios
+    if e_numero.any():
+        dias = pd.to_numeric(serie.where(e_numero), errors='coerce')
+        dias = dias.where((dias >= 1) & (dias < 2958466))
+        convertidas = convertidas.fillna(EXCEL_EPOCA + pd.to_timedelta(dias.round(), unit='D'))
+
+    # Datas, datetimes e Timestamps já vindos do leitor
+    outros = ~e_texto & ~e_numero & ~vazios
+    if outros.any():
+        convertidas = convertidas.fillna(pd.to_datetime(serie.where(outros), errors='coerce'))
+
+    validas = convertidas.notna()
+    datas = pd.Series([None] * len(serie), index=serie.index, dtype=object)
+    datas[validas] = convertidas[validas].dt.date
+    return datas, ~vazios & ~validas
+
+def normalizar_bloco_upload(df):
+    """
+    Etapa de normalização da importação: converte as colunas de um bloco da
+    planilha (25 colunas por posição) em um DataFrame com as colunas
+    registration + UPLOAD_CAMPOS já normalizadas, coluna a coluna.
+
+    Retorna (normalizado, invalidas), onde `invalidas` marca, por linha e campo
+    de data, as células preenchidas com datas que não puderam ser lidas.
+    """
+    if df.shape[1] < UPLOAD_TOTAL_COLUNAS:
+        raise ValueError(f'A planilha tem {df.shape[1]} colunas; esperado {UPLOAD_TOTAL_COLUNAS}')
+
+    normalizado = pd.DataFrame(index=df.index)
+    normalizado['registration'] = _normalizar_texto(df[0])
+    for campo, idx in UPLOAD_CAMPOS_TEXTO:
+        normalizado[campo] = _normalizar_texto(df[idx])
+    invalidas = pd.DataFrame(index=df.index)
+    for campo, idx in UPLOAD_CAMPOS_DATA:
+        normalizado[campo], invalidas[campo] = _normalizar_datas(df[idx])
+    return normalizado, invalidas
+
+def _insert_dialeto():
+    """insert() com suporte a ON CONFLICT do banco em uso (Postgres ou SQLite)"""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def _bloco_planilha(linhas, inicio):
+    """DataFrame de um bloco, indexado pela posição da linha na planilha (sem cabeçalho)"""
+    # dtype object preserva os valores como lidos (sem virar float em colunas com vazios)
+    return pd.DataFrame(
+        linhas, columns=range(UPLOAD_TOTAL_COLUNAS), index=range(inicio, inicio + len(linhas)), dtype=object
+    )
+
+def ler_planilha_em_blocos(arquivo, nome_arquivo, tamanho=UPLOAD_CHUNK_SIZE):
+    """
+    Lê a planilha de importação (sem a linha de cabeçalho) em DataFrames de até
+    `tamanho` linhas com as 25 colunas conhecidas.
+
+    Arquivos .xlsx são lidos em streaming (openpyxl read_only), então a memória
+    não cresce com o tamanho do arquivo. O formato .xls antigo não permite isso
+    e é lido inteiro antes de ser fatiado.
+    """
+    if nome_arquivo.lower().endswith('.xlsx'):
+        workbook = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            # Mesma aba que o pd.read_excel usaria (a primeira)
+            planilha = workbook.worksheets[0]
+            if planilha.max_column is not None and planilha.max_column < UPLOAD_TOTAL_COLUNAS:
+                raise ValueError(f'A planilha tem {planilha.max_column} colunas; esperado {UPLOAD_TOTAL_COLUNAS}')
+            bloco = []
+            inicio = 0
+            for linha in planilha.iter_rows(min_row=2, max_col=UPLOAD_TOTAL_COLUNAS, values_only=True):
+                bloco.append(linha)
+                if len(bloco) >= tamanho:
+                    yield _bloco_planilha(bloco, inicio)
+                    inicio += len(bloco)
+                    bloco = []
+            if bloco:
+                yield _bloco_planilha(bloco, inicio)
+        finally:
+            workbook.close()
+    else:
+        df = pd.read_excel(arquivo, header=None, skiprows=1)
+        if df.shape[1] < UPLOAD_TOTAL_COLUNAS:
+            raise ValueError(f'A planilha tem {df.shape[1]} colunas; esperado {UPLOAD_TOTAL_COLUNAS}')
+        for inicio in range(0, len(df), tamanho):
+            yield df.iloc[inicio:inicio + tamanho]
+
+def _valor_diff(valor):
+    """Valor de campo em forma serializável (datas em ISO) para o diff do upload"""
+    return valor.isoformat() if isinstance(valor, date) else valor
+
+def _valor_campo(campo, valor):
+    """Inverso de _valor_diff: reconstrói as datas dos campos de data"""
+    if valor is not None and campo in UPLOAD_CAMPOS_DATA_NOMES:
+        return date.fromisoformat(valor)
+    return valor
+
+def instantaneo_employees(brand, matriculas, campos=UPLOAD_CAMPOS, lote=1000):
+    """Campos (por padrão os importáveis) dos colaboradores da marca com as matrículas dadas, como DataFrame"""
+    tabela = Employee.__table__
+    matriculas = list(matriculas)
+    linhas = []
+    for inicio in range(0, len(matriculas), lote):
+        linhas.extend(db.session.execute(
+            db.select(tabela.c.registration, *[tabela.c[campo] for campo in campos])
+            .where(tabela.c.brand == brand, tabela.c.registration.in_(matriculas[inicio:inicio + lote]))
+        ).all())
+    return pd.DataFrame(linhas, columns=['registration', *campos], dtype=object)
+
+def impressoes_digitais(normalizado):
+    """impressao_digital de cada linha de um DataFrame com as colunas UPLOAD_CAMPOS"""
+    colunas = normalizado[list(UPLOAD_CAMPOS)].astype(object)
+    colunas = colunas.where(colunas.notna(), None)
+    return pd.Series(
+        [impressao_digital(linha) for linha in colunas.itertuples(index=False, name=None)],
+        index=normalizado.index, dtype=object
+    )
+
+def registrar_datas_invalidas(normalizado, invalidas, erros):
+    """Acrescenta em `erros` um aviso por linha com data ilegível; retorna quantas linhas"""
+    linhas_invalidas = invalidas.loc[normalizado.index]
+    linhas_invalidas = linhas_invalidas[linhas_invalidas.any(axis=1)]
+    if erros is not None:
+        for posicao, marcadas in linhas_invalidas.iterrows():
+            campos = [campo for campo, invalida in marcadas.items() if invalida]
+            erros.append({
+                'row': int(posicao) + 2,
+                'registration': normalizado.at[posicao, 'registration'],
+                'error': 'Data inválida ignorada em: ' + ', '.join(campos)
+            })
+    return len(linhas_invalidas)
+
+def calcular_diff_upload(normalizado, brand):
+    """
+    Compara as linhas normalizadas da planilha com o estado atual dos colaboradores
+    da marca (merge por matrícula) sem gravar nada.
+
+    Matrículas repetidas na planilha são consolidadas como se as linhas fossem
+    aplicadas em ordem: os textos da última linha valem e datas vazias não apagam
+    as anteriores. Datas vazias ou ilegíveis também nunca apagam o valor gravado.
+
+    Linhas cujo hash (impressao_digital) coincide com o import_fingerprint gravado
+    são contadas como inalteradas sem comparar campo a campo.
+
+    Retorna um dict serializável em JSON com 'created' (linhas novas completas),
+    'updated' (apenas os campos que mudam, como [antigo, novo]), 'unchanged',
+    'rows' e 'fields' (quantas mudanças por campo). Ele pode ser aplicado depois
+    com aplicar_diff_upload.
+    """
+    normalizado = normalizado[normalizado['registration'] != '']
+    diff = {'brand': brand, 'rows': len(normalizado), 'created': [], 'updated': [], 'unchanged': 0,
+            'fields': {}}
+    if normalizado.empty:
+        return diff
+
+    consolidado = normalizado.groupby('registration', sort=False).last().reset_index()
+
+    # Linhas idênticas às gravadas saem pelo hash, sem buscar nem comparar os campos
+    gravadas = instantaneo_employees(brand, consolidado['registration'], campos=('import_fingerprint',))
+    gravadas = dict(zip(gravadas['registration'], gravadas['import_fingerprint']))
+    iguais = impressoes_digitais(consolidado) == consolidado['registration'].map(gravadas)
+    diff['unchanged'] = int(iguais.sum())
+    consolidado = consolidado[~iguais]
+    if consolidado.empty:
+        return diff
+
+    atual = instantaneo_employees(
+        brand, [matricula for matricula in consolidado['registration'] if matricula in gravadas]
+    )
+    mesclado = consolidado.merge(atual, on='registration', how='left', suffixes=('', '_atual'), indicator=True)
+
+    novos = mesclado[mesclado['_merge'] == 'left_only']
+    for linha in novos[['registration', *UPLOAD_CAMPOS]].itertuples(index=False, name=None):
+        registro = {'registration': linha[0]}
+        for campo, valor in zip(UPLOAD_CAMPOS, linha[1:]):
+            registro[campo] = _valor_diff(None if pd.isna(valor) else valor)
+        diff['created'].append(registro)
+
+    existentes = mesclado[mesclado['_merge'] == 'both']
+    mudancas = {}
+    for campo in UPLOAD_CAMPOS:
+        novo, antigo = existentes[campo], existentes[campo + '_atual']
+        # Mesma comparação da auditoria: NULL no banco e '' na planilha não são mudança,
+        # e toda linha marcada como alterada gera ao menos um registro de auditoria
+        diferente = (
+            novo.map(valor_comparavel_auditoria, na_action='ignore').fillna('')
+            != antigo.map(valor_comparavel_auditoria, na_action='ignore').fillna('')
+        )
+        if campo in UPLOAD_CAMPOS_DATA_NOMES:
+            diferente &= novo.notna()
+        if diferente.any():
+            mudancas[campo] = diferente
+            diff['fields'][campo] = int(diferente.sum())
+
+    if mudancas:
+        alguma = pd.concat(mudancas.values(), axis=1).any(axis=1)
+        for posicao in existentes.index[alguma]:
+            alteracoes = {}
+            for campo, diferente in mudancas.items():
+                if diferente.at[posicao]:
+                    antigo = existentes.at[posicao, campo + '_atual']
+                    alteracoes[campo] = [
+                        _valor_diff(None if pd.isna(antigo) else antigo),
+                        _valor_diff(existentes.at[posicao, campo])
+                    ]
+            diff['updated'].append({'registration': existentes.at[posicao, 'registration'], 'changes': alteracoes})
+        diff['unchanged'] += int((~alguma).sum())
+    else:
+        diff['unchanged'] += len(existentes)
+    return diff
+
+def aplicar_diff_upload(diff, changed_by):
+    """
+    Grava um diff de calcular_diff_upload: apenas as linhas novas ou alteradas,
+    com um INSERT ... ON CONFLICT (registration, brand) DO UPDATE; os registros de
+    auditoria vão para o buffer da sessão (buffer_auditoria) e são gravados no
+    commit. As colunas derivadas (current_phase, phase_computed_on,
+    is_operation_ready, import_fingerprint) são calculadas aqui, pois o caminho
+    em lote não passa pelos eventos do ORM.
+
+    Não faz commit.
+    """
+    brand = diff['brand']
+    auditoria = []
+    estados = {}   # matrícula -> estado final da linha a gravar
+
+    for registro in diff['created']:
+        estados[registro['registration']] = {
+            campo: _valor_campo(campo, registro[campo]) for campo in UPLOAD_CAMPOS
+        }
+        auditoria.append(registro_auditoria(
+            registro['registration'], 'new_employee', None, 'Novo colaborador criado', 'upload', changed_by, brand
+        ))
+
+    if diff['updated']:
+        # Estado completo das linhas alteradas (as colunas derivadas dependem de todos os campos)
+        atual = instantaneo_employees(brand, [registro['registration'] for registro in diff['updated']])
+        atuais = {
+            linha[0]: dict(zip(UPLOAD_CAMPOS, linha[1:]))
+            for linha in atual.itertuples(index=False, name=None)
+        }
+        for registro in diff['updated']:
+            matricula = registro['registration']
+            estado = atuais[matricula]
+            for campo, (antigo, novo) in registro['changes'].items():
+                antigo, novo = _valor_campo(campo, antigo), _valor_campo(campo, novo)
+                estado[campo] = novo
+                valores = registro_auditoria(matricula, campo, antigo, novo, 'upload', changed_by, brand)
+                if valores is not None:
+                    auditoria.append(valores)
+            estados[matricula] = estado
+
+    if estados:
+        hoje = datetime.now().date()
+        agora = get_brasil_time()
+        matriculas = list(estados)
+        fases = classificar_fases_linhas(
+            [tuple(estados[m][campo] for campo in PHASE_DATE_FIELDS + ('course_status',)) for m in matriculas],
+            today=hoje
+        )
+        aptos = traduzir_coluna([estados[m]['operation_ready'] for m in matriculas], 'operation_ready')
+        linhas = []
+        for matricula, fase, apto in zip(matriculas, fases, aptos):
+            dados = estados[matricula]
+            linhas.append(dict(
+                dados,
+                registration=matricula,
+                brand=brand,
+                is_operation_ready=apto == 'Sim',
+                import_fingerprint=impressao_digital(tuple(dados[campo] for campo in UPLOAD_CAMPOS)),
+                current_phase=fase,
+                phase_computed_on=hoje,
+                last_updated=agora
+            ))
+
+        tabela = Employee.__table__
+        insert = _insert_dialeto()
+        stmt = insert(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['registration', 'brand'],
+            set_={coluna: stmt.excluded[coluna] for coluna in linhas[0] if coluna not in ('registration', 'brand')}
+        )
+        for inicio in range(0, len(linhas), 500):
+            db.session.execute(stmt, linhas[inicio:inicio + 500])
+
+    buffer_auditoria().extend(auditoria)
+
+def contagem_diff(diff):
+    """Contagens de um diff no formato usado pelos jobs de upload"""
+    return {
+        'rows': diff['rows'],
+        'created': len(diff['created']),
+        'updated': len(diff['updated']),
+        'unchanged': diff['unchanged']
+    }
+
+def importar_employees(df, brand, changed_by, erros=None):
+    """
+    Aplica as linhas da planilha (DataFrame sem cabeçalho, 25 colunas) aos
+    colaboradores da marca: normaliza o bloco, calcula o diff contra o banco e
+    grava só o que mudou (ver calcular_diff_upload e aplicar_diff_upload).
+
+    Não faz commit. Retorna as contagens rows/created/updated/unchanged/errors; se
+    `erros` for uma lista, recebe o aviso de cada linha com data ilegível (número
+    da linha na planilha, matrícula e mensagem).
+    """
+    normalizado, invalidas = normalizar_bloco_upload(df)
+    normalizado = normalizado[normalizado['registration'] != '']
+    com_erro = registrar_datas_invalidas(normalizado, invalidas, erros)
+
+    diff = calcular_diff_upload(normalizado, brand)
+    aplicar_diff_upload(diff, changed_by)
+    return dict(contagem_diff(diff), errors=com_erro)
+
+def processar_upload(arquivo, nome_arquivo, brand, changed_by, progresso=None, erros=None):
+    """
+    Importa a planilha bloco a bloco: cada bloco é aplicado com importar_employees
+    e confirmado (commit) antes do próximo, liberando o lock de escrita entre
+    blocos. `progresso`, se informado, recebe os totais acumulados após cada bloco.
+    A versão dos dados só é incrementada nos blocos que gravaram alguma linha.
+
+    Se a gravação de um bloco falhar (ex.: violação de integridade), apenas esse
+    bloco é desfeito: suas linhas contam como erro, `erros` recebe o intervalo de
+    linhas da planilha e a mensagem, e a importação segue com o próximo bloco.
+    Erros de leitura do arquivo interrompem a importação (os blocos anteriores
+    permanecem gravados).
+
+    Retorna (totais, incrementos, falhas), onde `incrementos` é quantas vezes a
+    versão dos dados da marca foi incrementada e `falhas` quantos blocos foram
+    desfeitos.
+    """
+    totais = {'chunks': 0, 'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+    incrementos = falhas = 0
+    for bloco in ler_planilha_em_blocos(arquivo, nome_arquivo):
+        avisos_anteriores = len(erros) if erros is not None else 0
+        try:
+            parcial = importar_employees(bloco, brand, changed_by, erros)
+            if parcial['created'] or parcial['updated']:
+                incrementar_versao_dados(brand)
+            db.session.commit()
+            if parcial['created'] or parcial['updated']:
+                incrementos += 1
+        except Exception as e:
+            db.session.rollback()
+            falhas += 1
+            primeira, ultima = int(bloco.index[0]) + 2, int(bloco.index[-1]) + 2
+            upload_logger.exception("Upload %s: bloco das linhas %d a %d desfeito", brand, primeira, ultima)
+            if erros is not None:
+                # Os avisos de data desse bloco não valem mais: nenhuma linha dele foi gravada
+                del erros[avisos_anteriores:]
+                erros.append({
+                    'row': primeira,
+                    'registration': None,
+                    'error': f'Linhas {primeira} a {ultima} não importadas: {str(e)}'[:500]
+                })
+            parcial = {'rows': len(bloco), 'created': 0, 'updated': 0, 'unchanged': 0, 'errors': len(bloco)}
+        for chave, valor in parcial.items():
+            totais[chave] += valor
+        totais['chunks'] += 1
+        upload_logger.info(
+            "Upload %s: bloco %d gravado (%d linhas; %d criados, %d atualizados, %d erros)",
+            brand, totais['chunks'], parcial['rows'], parcial['created'], parcial['updated'], parcial['errors']
+        )
+        if progresso is not None:
+            progresso(dict(totais))
+    return totais, incrementos, falhas
+
+# Execução das importações em segundo plano (por processo)
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', '2'))
+UPLOAD_MAX_ERROR_DETAILS = 200
+upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='upload')
+upload_dir = os.path.join(instance_path, 'uploads')
+
+def hash_arquivo(arquivo):
+    """SHA-256 do conteúdo de um arquivo aberto, lido em blocos; volta o arquivo ao início"""
+    sha = hashlib.sha256()
+    for parte in iter(lambda: arquivo.read(1024 * 1024), b''):
+        sha.update(parte)
+    arquivo.seek(0)
+    return sha.hexdigest()
+
+def upload_identico(brand, file_hash):
+    """
+    Importação concluída do mesmo arquivo cuja versão de dados ainda é a atual da
+    marca, ou None. Nesse caso nada mudou desde então e reimportar não teria efeito.
+    A reclassificação diária das fases não conta (ela incrementa VERSAO_FASES).
+    """
+    return (
+        UploadJob.query
+        .filter_by(brand=brand, file_hash=file_hash, status='done')
+        .filter(UploadJob.data_version == versao_dados(brand))
+        .order_by(UploadJob.finished_at.desc())
+        .first()
+    )
+
+def mensagem_upload(contagem):
+    return (f'Importação concluída com sucesso! {contagem["created"]} registros criados, '
+            f'{contagem["updated"]} registros atualizados, {contagem["unchanged"]} sem alterações.')
+
+def executar_upload_job(job_id, caminho):
+    """Processa a planilha salva em `caminho` e registra o andamento em UploadJob"""
+    with app.app_context():
+        job = db.session.get(UploadJob, job_id)
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        brand, nome_arquivo, changed_by = job.brand, job.filename, job.created_by
+        versao_inicial = versao_dados(brand)
+
+        erros = []
+
+        def registrar_progresso(totais):
+            # Chamado após o commit de cada bloco
+            db.session.execute(
+                db.update(UploadJob).where(UploadJob.id == job_id).values(
+                    error_details=json.dumps(erros[:UPLOAD_MAX_ERROR_DETAILS]) if erros else None,
+                    **totais
+                )
+            )
+            db.session.commit()
+
+        try:
+            with open(caminho, 'rb') as arquivo:
+                totais, incrementos, falhas = processar_upload(
+                    arquivo, nome_arquivo, brand, changed_by, progresso=registrar_progresso, erros=erros
+                )
+            job = db.session.get(UploadJob, job_id)
+            job.status = 'done'
+            job.message = mensagem_upload(totais)
+            if falhas:
+                job.message += f' {falhas} bloco(s) não importado(s), ver os erros.'
+            # Só serve de referência para reenvios idênticos se a planilha foi gravada
+            # inteira e ninguém mais escreveu nesse meio tempo
+            versao_final = versao_dados(brand)
+            if not falhas and versao_final == versao_inicial + incrementos:
+                job.data_version = versao_final
+        except Exception as e:
+            db.session.rollback()
+            upload_logger.exception("Falha no upload %s", job_id)
+            job = db.session.get(UploadJob, job_id)
+            job.status = 'error'
+            job.message = f'Erro ao processar o arquivo: {str(e)}'[:500]
+        finally:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        db.session.remove()
+
+UPLOAD_PREVIEW_LIMIT = 200
+
+def pre_visualizar_upload(file, brand):
+    """
+    Modo dry-run do upload: calcula o diff da planilha contra os colaboradores da
+    marca sem gravar nada nos colaboradores e guarda o diff em um UploadJob
+    ('preview') para ser aplicado depois em /upload/jobs/<id>/apply.
+    """
+    # A versão é lida antes do diff: qualquer escrita a partir daqui invalida a pré-visualização
+    base_version = versao_dados(brand)
+    file_hash = hash_arquivo(file.stream)
+    normalizados, erros = [], []
+    for bloco in ler_planilha_em_blocos(file, file.filename):
+        normalizado, invalidas = normalizar_bloco_upload(bloco)
+        normalizado = normalizado[normalizado['registration'] != '']
+        registrar_datas_invalidas(normalizado, invalidas, erros)
+        normalizados.append(normalizado)
+    if not normalizados:
+        normalizados.append(pd.DataFrame(columns=['registration', *UPLOAD_CAMPOS]))
+    diff = calcular_diff_upload(pd.concat(normalizados), brand)
+    contagem = contagem_diff(diff)
+
+    job = UploadJob(
+        brand=brand, filename=file.filename, created_by=current_user.username, status='preview',
+        base_version=base_version, file_hash=file_hash, diff=json.dumps(diff), errors=len(erros),
+        error_details=json.dumps(erros[:UPLOAD_MAX_ERROR_DETAILS]) if erros else None,
+        **contagem
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    return jsonify({
+        'job_id': job.id,
+        'dry_run': True,
+        **contagem,
+        'errors': len(erros),
+        'error_details': erros[:UPLOAD_PREVIEW_LIMIT],
+        'fields': diff['fields'],
+        'new': diff['created'][:UPLOAD_PREVIEW_LIMIT],
+        'changes': diff['updated'][:UPLOAD_PREVIEW_LIMIT],
+        'apply_url': url_for_brand('apply_upload_job', brand=brand, job_id=job.id)
+    })
+
+def executar_aplicacao_diff(job_id, changed_by):
+    """Grava o diff guardado por uma pré-visualização, se os dados da marca não mudaram"""
+    with app.app_context():
+        job = db.session.get(UploadJob, job_id)
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        try:
+            if versao_dados(job.brand) != job.base_version:
+                raise ValueError('Os dados mudaram desde a pré-visualização; envie a planilha novamente')
+            diff = json.loads(job.diff)
+            if diff['created'] or diff['updated']:
+                # A conferência acima não trava nada: o incremento condicional, na mesma
+                # transação da gravação, garante que ninguém escreveu desde a pré-visualização
+                if not incrementar_versao_dados_se(job.brand, job.base_version):
+                    raise ValueError('Os dados mudaram desde a pré-visualização; envie a planilha novamente')
+                aplicar_diff_upload(diff, changed_by)
+                job.data_version = job.base_version + 1
+            else:
+                # Nada a gravar: a versão (e o cache dos relatórios) continua valendo
+                job.data_version = job.base_version
+            job.status = 'done'
+            job.message = mensagem_upload(contagem_diff(diff))
+            job.diff = None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            upload_logger.exception("Falha ao aplicar a pré-visualização %s", job_id)
+            job = db.session.get(UploadJob, job_id)
+            job.status = 'error'
+            job.message = f'Erro ao aplicar as alterações: {str(e)}'[:500]
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        db.session.remove()
+
 def handle_upload_file(brand='Vivo'):
-    """Função auxiliar para processar upload de arquivo"""
+    """Função auxiliar para receber o upload e agendar a importação em segundo plano"""
     if current_user.access_type != 'admin':
         return jsonify({'error': 'Acesso negado. Apenas administradores podem fazer upload de arquivos.'}), 403
         
@@ -647,192 +2216,71 @@ def handle_upload_file(brand='Vivo'):
         return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
     
     if file and file.filename.endswith(('.xlsx', '.xls')):
-        try:
-            # Lê o Excel ignorando a primeira linha (cabeçalho)
-            df = pd.read_excel(file, header=None, skiprows=1)
-            updated = 0
-            created = 0
-            
-            def parse_date(date_val):
-                if pd.isna(date_val) or date_val in ['', ' ', '  /  /    ']:
-                    return None
-                try:
-                    if isinstance(date_val, str):
-                        date_val = date_val.strip()
-                        for fmt in ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%Y/%m/%d'):
-                            try:
-                                return datetime.strptime(date_val, fmt).date()
-                            except ValueError:
-                                continue
-                        return None
-                    elif hasattr(date_val, 'date'):
-                        return date_val.date()
-                    elif hasattr(date_val, 'strftime'):
-                        return date_val
-                    return None
-                except Exception as e:
-                    print(f"Erro ao converter data: {date_val} - {str(e)}")
-                    return None
-            
-            # Índices das colunas (baseado na ordem do modelo)
-            COLS = {
-                'matricula': 0,
-                'nome': 1,
-                'funcao': 2,
-                'tipo': 3,
-                'data_admissao': 4,
-                'cep': 5,
-                'situacao': 6,
-                'status_curso': 7,
-                'turma': 8,
-                'local_curso': 9,
-                'gerente': 10,
-                'gerente_corporativo': 11,
-                'instrutor': 12,
-                'contato': 13,
-                'apto_operacao': 14,
-                'inicio_integracao': 15,  # Início Integração
-                'fim_integracao': 16,     # Término Integração
-                'inicio_normativo': 17,    # Início Normativo
-                'fim_normativo': 18,       # Término Normativo
-                'inicio_curso_tecnico': 19, # Início Curso Técnico
-                'fim_curso_tecnico': 20,    # Término Curso Técnico
-                'inicio_duplado': 21,       # Início Duplado
-                'fim_duplado': 22,          # Término Duplado
-                'data_carregamento': 23,    # Data de Carregamento
-                'data_operacao_campo': 24   # Data de Operação de Campo
-            }
-            
-            for _, row in df.iterrows():
-                try:
-                    # Obter valores por posição
-                    matricula = str(row[COLS['matricula']]) if pd.notna(row[COLS['matricula']]) else ''
-                    
-                    # Verificar se a linha está vazia
-                    if not matricula.strip():
-                        continue
-                        
-                    # Verificar se o colaborador já existe
-                    employee = Employee.query.filter_by(registration=matricula).first()
-                    
-                    # Processar valores não nulos
-                    def get_value(idx, default=''):
-                        return row[idx] if pd.notna(row[idx]) else default
-                        
-                    if employee:
-                        # Função auxiliar para atualizar campo e registrar mudança
-                        def update_field(field_name, value, is_date=False):
-                            old_value = getattr(employee, field_name)
-                            new_value = parse_date(value) if is_date and value is not None else value
-                            
-                            if is_date and new_value is not None:
-                                new_value = new_value.date() if hasattr(new_value, 'date') else new_value
-                            
-                            if old_value != new_value and new_value is not None:
-                                setattr(employee, field_name, new_value)
-                                log_change(
-                                    registration=employee.registration,
-                                    field_changed=field_name,
-                                    old_value=old_value,
-                                    new_value=new_value,
-                                    change_source='upload'
-                                )
-                        
-                        # Atualizar campos regulares
-                        update_field('full_name', get_value(COLS['nome']))
-                        update_field('role', get_value(COLS['funcao']))
-                        update_field('employee_type', get_value(COLS['tipo']))
-                        update_field('cep', get_value(COLS['cep']))
-                        update_field('status', get_value(COLS['situacao']))
-                        update_field('course_status', get_value(COLS['status_curso']))
-                        update_field('team', get_value(COLS['turma']))
-                        update_field('course_location', get_value(COLS['local_curso']))
-                        update_field('manager', get_value(COLS['gerente']))
-                        update_field('corporate_manager', get_value(COLS['gerente_corporativo']))
-                        update_field('instructor', get_value(COLS['instrutor']))
-                        update_field('contato', get_value(COLS['contato']))
-                        update_field('operation_ready', get_value(COLS['apto_operacao']))
-                        
-                        # Atualizar campos de data
-                        date_fields = {
-                            'admission_date': row[COLS['data_admissao']],
-                            'integration_start': row[COLS['inicio_integracao']],
-                            'integration_end': row[COLS['fim_integracao']],
-                            'normative_start': row[COLS['inicio_normativo']],
-                            'normative_end': row[COLS['fim_normativo']],
-                            'technical_course_start': row[COLS['inicio_curso_tecnico']],
-                            'technical_course_end': row[COLS['fim_curso_tecnico']],
-                            'double_start': row[COLS['inicio_duplado']],
-                            'double_end': row[COLS['fim_duplado']],
-                            'loading_date': row[COLS['data_carregamento']],
-                            'field_operation_date': row[COLS['data_operacao_campo']]
-                        }
-                        
-                        for field, value in date_fields.items():
-                            if pd.notna(value):
-                                update_field(field, value, is_date=True)
-                        
-                        employee.last_updated = get_brasil_time()
-                        
-                        updated += 1
-                    else:
-                        # Criar novo colaborador
-                        new_employee = Employee(
-                            registration=matricula,
-                            brand=brand,
-                            full_name=get_value(COLS['nome']),
-                            role=get_value(COLS['funcao']),
-                            employee_type=get_value(COLS['tipo']),
-                            admission_date=parse_date(row[COLS['data_admissao']]),
-                            cep=get_value(COLS['cep']),
-                            status=get_value(COLS['situacao']),
-                            course_status=get_value(COLS['status_curso']),
-                            team=get_value(COLS['turma']),
-                            course_location=get_value(COLS['local_curso']),
-                            manager=get_value(COLS['gerente']),
-                            corporate_manager=get_value(COLS['gerente_corporativo']),
-                            instructor=get_value(COLS['instrutor']),
-                            contato=get_value(COLS['contato']),
-                            operation_ready=get_value(COLS['apto_operacao']),
-                            integration_start=parse_date(row[COLS['inicio_integracao']]),
-                            integration_end=parse_date(row[COLS['fim_integracao']]),
-                            normative_start=parse_date(row[COLS['inicio_normativo']]),
-                            normative_end=parse_date(row[COLS['fim_normativo']]),
-                            technical_course_start=parse_date(row[COLS['inicio_curso_tecnico']]),
-                            technical_course_end=parse_date(row[COLS['fim_curso_tecnico']]),
-                            double_start=parse_date(row[COLS['inicio_duplado']]),
-                            double_end=parse_date(row[COLS['fim_duplado']]),
-                            loading_date=parse_date(row[COLS['data_carregamento']]),
-                            field_operation_date=parse_date(row[COLS['data_operacao_campo']]),
-                            last_updated=get_brasil_time()
-                        )
-                        
-                        # Registrar a criação do novo colaborador
-                        log_change(
-                            registration=matricula,
-                            field_changed='new_employee',
-                            old_value=None,
-                            new_value='Novo colaborador criado',
-                            change_source='upload'
-                        )
-                        db.session.add(new_employee)
-                        created += 1
-                        
-                except Exception as e:
-                    print(f"Erro ao processar linha: {row}\nErro: {str(e)}")
-                    continue
-            
-            db.session.commit()
+        if request.args.get('dry_run') == '1':
+            try:
+                return pre_visualizar_upload(file, brand)
+            except Exception as e:
+                db.session.rollback()
+                return jsonify({'error': f'Erro ao processar o arquivo: {str(e)}'}), 500
+
+        # Reenvio do mesmo arquivo sem nenhuma escrita desde a última importação: nada a fazer
+        file_hash = hash_arquivo(file.stream)
+        anterior = upload_identico(brand, file_hash)
+        if anterior is not None:
             return jsonify({
-                'message': f'Importação concluída com sucesso! {created} registros criados, {updated} registros atualizados.'
+                'message': 'A planilha é idêntica à última importação e os dados não mudaram desde então; nada a importar.',
+                'job_id': anterior.id,
+                'unchanged': anterior.created + anterior.updated + anterior.unchanged
             })
-            
-        except Exception as e:
-            db.session.rollback()
-            return jsonify({'error': f'Erro ao processar o arquivo: {str(e)}'}), 500
+
+        job = UploadJob(brand=brand, filename=file.filename, created_by=current_user.username, file_hash=file_hash)
+        db.session.add(job)
+        db.session.flush()
+
+        # O arquivo é salvo em disco porque a requisição termina antes da importação
+        os.makedirs(upload_dir, exist_ok=True)
+        caminho = os.path.join(upload_dir, f'{job.id}{os.path.splitext(file.filename)[1].lower()}')
+        file.save(caminho)
+        db.session.commit()
+
+        upload_executor.submit(executar_upload_job, job.id, caminho)
+        status_url = url_for_brand('upload_job_status', brand=brand, job_id=job.id)
+        return jsonify({
+            'message': 'Arquivo recebido; a importação está em andamento.',
+            'job_id': job.id,
+            'status_url': status_url
+        }), 202, {'Location': status_url}
     
     return jsonify({'error': 'Formato de arquivo não suportado'}), 400
 
+def upload_job_status_impl(brand, job_id):
+    job = UploadJob.query.filter_by(id=job_id, brand=brand).first()
+    if job is None:
+        return jsonify({'error': 'Importação não encontrada'}), 404
+    return jsonify(job.to_dict())
+
+def apply_upload_job_impl(brand, job_id):
+    """Agenda a gravação de uma pré-visualização de upload (somente as linhas alteradas)"""
+    if current_user.access_type != 'admin':
+        return jsonify({'error': 'Acesso negado. Apenas administradores podem fazer upload de arquivos.'}), 403
+    job = UploadJob.query.filter_by(id=job_id, brand=brand).first()
+    if job is None:
+        return jsonify({'error': 'Importação não encontrada'}), 404
+    if job.status != 'preview':
+        return jsonify({'error': 'Esta importação não é uma pré-visualização pendente'}), 409
+    if versao_dados(brand) != job.base_version:
+        return jsonify({'error': 'Os dados mudaram desde a pré-visualização; envie a planilha novamente'}), 409
+
+    job.status = 'pending'
+    db.session.commit()
+    upload_executor.submit(executar_aplicacao_diff, job.id, current_user.username)
+    status_url = url_for_brand('upload_job_status', brand=brand, job_id=job.id)
+    return jsonify({
+        'message': 'Aplicação das alterações em andamento.',
+        'job_id': job.id,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
 @app.route('/vivo/upload', methods=['POST'])
 @login_required
 def upload_file_vivo():
@@ -843,10 +2291,31 @@ def upload_file_vivo():
 def upload_file_claro():
     return handle_upload_file(brand='Claro')
 
+@app.route('/vivo/upload/jobs/<job_id>')
+@login_required
+def upload_job_status_vivo(job_id):
+    return upload_job_status_impl('Vivo', job_id)
+
+@app.route('/claro/upload/jobs/<job_id>')
+@login_required
+def upload_job_status_claro(job_id):
+    return upload_job_status_impl('Claro', job_id)
+
+@app.route('/vivo/upload/jobs/<job_id>/apply', methods=['POST'])
+@login_required
+def apply_upload_job_vivo(job_id):
+    return apply_upload_job_impl('Vivo', job_id)
+
+@app.route('/claro/upload/jobs/<job_id>/apply', methods=['POST'])
+@login_required
+def apply_upload_job_claro(job_id):
+    return apply_upload_job_impl('Claro', job_id)
+
 @app.route('/vivo/employee/view/<int:employee_id>')
 @app.route('/vivo/employee/view/<int:employee_id>/<referrer>')
 @login_required
 def view_employee_vivo(employee_id, referrer=None):
+    preencher_fases_pendentes('Vivo')
     employee = Employee.query.filter_by(id=employee_id, brand='Vivo').first_or_404()
     return render_template('view_employee.html', employee=employee, now=datetime.now(), referrer=referrer, brand='Vivo')
 
@@ -854,6 +2323,7 @@ def view_employee_vivo(employee_id, referrer=None):
 @app.route('/claro/employee/view/<int:employee_id>/<referrer>')
 @login_required
 def view_employee_claro(employee_id, referrer=None):
+    preencher_fases_pendentes('Claro')
     employee = Employee.query.filter_by(id=employee_id, brand='Claro').first_or_404()
     return render_template('view_employee.html', employee=employee, now=datetime.now(), referrer=referrer, brand='Claro')
 
@@ -861,6 +2331,7 @@ def view_employee_claro(employee_id, referrer=None):
 @app.route('/employee/view/<int:employee_id>/<referrer>')
 @login_required
 def view_employee(employee_id, referrer=None):
+    preencher_fases_pendentes()
     employee = Employee.query.get_or_404(employee_id)
     return render_template('view_employee.html', employee=employee, now=datetime.now(), referrer=referrer)
 
@@ -870,10 +2341,12 @@ def edit_employee_vivo(employee_id):
     if current_user.access_type != 'admin':
         flash('Acesso negado. Apenas administradores podem editar colaboradores.', 'danger')
         return redirect(url_for('view_employee_vivo', employee_id=employee_id))
+    preencher_fases_pendentes('Vivo')
     employee = Employee.query.filter_by(id=employee_id, brand='Vivo').first_or_404()
     if request.method == 'POST':
         employee.full_name = request.form.get('full_name', employee.full_name)
         employee.contato = request.form.get('contato', employee.contato)
+        incrementar_versao_dados('Vivo')
         db.session.commit()
         flash('Dados do colaborador atualizados com sucesso', 'success')
         return redirect(url_for('view_employee_vivo', employee_id=employee_id))
@@ -885,10 +2358,12 @@ def edit_employee_claro(employee_id):
     if current_user.access_type != 'admin':
         flash('Acesso negado. Apenas administradores podem editar colaboradores.', 'danger')
         return redirect(url_for('view_employee_claro', employee_id=employee_id))
+    preencher_fases_pendentes('Claro')
     employee = Employee.query.filter_by(id=employee_id, brand='Claro').first_or_404()
     if request.method == 'POST':
         employee.full_name = request.form.get('full_name', employee.full_name)
         employee.contato = request.form.get('contato', employee.contato)
+        incrementar_versao_dados('Claro')
         db.session.commit()
         flash('Dados do colaborador atualizados com sucesso', 'success')
         return redirect(url_for('view_employee_claro', employee_id=employee_id))
@@ -901,12 +2376,14 @@ def edit_employee(employee_id):
         flash('Acesso negado. Apenas administradores podem editar colaboradores.', 'danger')
         return redirect(url_for('view_employee', employee_id=employee_id))
         
+    preencher_fases_pendentes()
     employee = Employee.query.get_or_404(employee_id)
     
     if request.method == 'POST':
         # Atualiza o nome e o contato
         employee.full_name = request.form.get('full_name', employee.full_name)
         employee.contato = request.form.get('contato', employee.contato)
+        incrementar_versao_dados(employee.brand)
         db.session.commit()
         flash('Dados do colaborador atualizados com sucesso', 'success')
         return redirect(url_for('view_employee', employee_id=employee_id))
@@ -925,7 +2402,7 @@ def update_employee_api_vivo(employee_id):
         if field in data and getattr(employee, field) != data[field]:
             old_value = getattr(employee, field)
             setattr(employee, field, data[field])
-            log_change(registration=employee.registration, field_changed=field, old_value=old_value, new_value=data[field], change_source='system')
+            log_change(registration=employee.registration, brand=employee.brand, field_changed=field, old_value=old_value, new_value=data[field], change_source='system')
     date_fields = {'admission_date': '%Y-%m-%d', 'integration_start': '%Y-%m-%d', 'integration_end': '%Y-%m-%d',
                    'normative_start': '%Y-%m-%d', 'normative_end': '%Y-%m-%d', 'technical_course_start': '%Y-%m-%d',
                    'technical_course_end': '%Y-%m-%d', 'double_start': '%Y-%m-%d', 'double_end': '%Y-%m-%d',
@@ -937,11 +2414,12 @@ def update_employee_api_vivo(employee_id):
                 old_date = getattr(employee, field)
                 if old_date != new_date:
                     setattr(employee, field, new_date)
-                    log_change(registration=employee.registration, field_changed=field, old_value=old_date, new_value=new_date, change_source='system')
+                    log_change(registration=employee.registration, brand=employee.brand, field_changed=field, old_value=old_date, new_value=new_date, change_source='system')
             except ValueError:
                 return jsonify({'error': f'Formato de data inválido para o campo {field}'}), 400
+    incrementar_versao_dados('Vivo')
     db.session.commit()
-    return jsonify({'message': 'Dados atualizados com sucesso', 'employee': {'id': employee.id, 'full_name': employee.full_name, 'registration': employee.registration, 'admission_date': employee.admission_date.strftime('%d/%m/%Y') if employee.admission_date else None, 'current_phase': employee.get_current_phase()}})
+    return jsonify({'message': 'Dados atualizados com sucesso', 'employee': {'id': employee.id, 'full_name': employee.full_name, 'registration': employee.registration, 'admission_date': employee.admission_date.strftime('%d/%m/%Y') if employee.admission_date else None, 'current_phase': employee.current_phase}})
 
 @app.route('/claro/api/employee/<int:employee_id>', methods=['PUT'])
 @login_required
@@ -955,7 +2433,7 @@ def update_employee_api_claro(employee_id):
         if field in data and getattr(employee, field) != data[field]:
             old_value = getattr(employee, field)
             setattr(employee, field, data[field])
-            log_change(registration=employee.registration, field_changed=field, old_value=old_value, new_value=data[field], change_source='system')
+            log_change(registration=employee.registration, brand=employee.brand, field_changed=field, old_value=old_value, new_value=data[field], change_source='system')
     date_fields = {'admission_date': '%Y-%m-%d', 'integration_start': '%Y-%m-%d', 'integration_end': '%Y-%m-%d',
                    'normative_start': '%Y-%m-%d', 'normative_end': '%Y-%m-%d', 'technical_course_start': '%Y-%m-%d',
                    'technical_course_end': '%Y-%m-%d', 'double_start': '%Y-%m-%d', 'double_end': '%Y-%m-%d',
@@ -967,11 +2445,12 @@ def update_employee_api_claro(employee_id):
                 old_date = getattr(employee, field)
                 if old_date != new_date:
                     setattr(employee, field, new_date)
-                    log_change(registration=employee.registration, field_changed=field, old_value=old_date, new_value=new_date, change_source='system')
+                    log_change(registration=employee.registration, brand=employee.brand, field_changed=field, old_value=old_date, new_value=new_date, change_source='system')
             except ValueError:
                 return jsonify({'error': f'Formato de data inválido para o campo {field}'}), 400
+    incrementar_versao_dados('Claro')
     db.session.commit()
-    return jsonify({'message': 'Dados atualizados com sucesso', 'employee': {'id': employee.id, 'full_name': employee.full_name, 'registration': employee.registration, 'admission_date': employee.admission_date.strftime('%d/%m/%Y') if employee.admission_date else None, 'current_phase': employee.get_current_phase()}})
+    return jsonify({'message': 'Dados atualizados com sucesso', 'employee': {'id': employee.id, 'full_name': employee.full_name, 'registration': employee.registration, 'admission_date': employee.admission_date.strftime('%d/%m/%Y') if employee.admission_date else None, 'current_phase': employee.current_phase}})
 
 @app.route('/api/employee/<int:employee_id>', methods=['PUT'])
 @login_required
@@ -990,6 +2469,7 @@ def update_employee_api(employee_id):
             setattr(employee, field, data[field])
             log_change(
                 registration=employee.registration,
+                brand=employee.brand,
                 field_changed=field,
                 old_value=old_value,
                 new_value=data[field],
@@ -1021,6 +2501,7 @@ def update_employee_api(employee_id):
                     setattr(employee, field, new_date)
                     log_change(
                         registration=employee.registration,
+                        brand=employee.brand,
                         field_changed=field,
                         old_value=old_date,
                         new_value=new_date,
@@ -1029,6 +2510,7 @@ def update_employee_api(employee_id):
             except ValueError:
                 return jsonify({'error': f'Formato de data inválido para o campo {field}'}), 400
     
+    incrementar_versao_dados(employee.brand)
     db.session.commit()
     return jsonify({
         'message': 'Dados atualizados com sucesso',
@@ -1037,10 +2519,43 @@ def update_employee_api(employee_id):
             'full_name': employee.full_name,
             'registration': employee.registration,
             'admission_date': employee.admission_date.strftime('%d/%m/%Y') if employee.admission_date else None,
-            'current_phase': employee.get_current_phase()
+            'current_phase': employee.current_phase
         }
     })
 
+def explain_phase_impl(employee_id, brand=None):
+    """Retorna o rastreio da decisão de fase de um único colaborador"""
+    query = Employee.query.filter_by(id=employee_id)
+    if brand:
+        query = query.filter_by(brand=brand)
+    employee = query.first_or_404()
+    trace = []
+    phase = employee.get_current_phase(trace=trace)
+    return jsonify({
+        'id': employee.id,
+        'registration': employee.registration,
+        'full_name': employee.full_name,
+        'phase': phase,
+        'stored_phase': employee.current_phase,
+        'phase_computed_on': employee.phase_computed_on.strftime('%Y-%m-%d') if employee.phase_computed_on else None,
+        'trace': trace
+    })
+
+@app.route('/vivo/api/employee/<int:employee_id>/explain_phase')
+@login_required
+def explain_phase_vivo(employee_id):
+    return explain_phase_impl(employee_id, brand='Vivo')
+
+@app.route('/claro/api/employee/<int:employee_id>/explain_phase')
+@login_required
+def explain_phase_claro(employee_id):
+    return explain_phase_impl(employee_id, brand='Claro')
+
+@app.route('/api/employee/<int:employee_id>/explain_phase')
+@login_required
+def explain_phase(employee_id):
+    return explain_phase_impl(employee_id)
+
 @app.route('/vivo/delete_employee/<int:employee_id>', methods=['POST'])
 @login_required
 def delete_employee_vivo(employee_id):
@@ -1050,6 +2565,7 @@ def delete_employee_vivo(employee_id):
     if request.method == 'POST':
         employee = Employee.query.filter_by(id=employee_id, brand='Vivo').first_or_404()
         db.session.delete(employee)
+        incrementar_versao_dados('Vivo')
         db.session.commit()
         return jsonify({'message': 'Colaborador excluído com sucesso'})
     return jsonify({'error': 'Método não permitido'}), 405
@@ -1063,6 +2579,7 @@ def delete_employee_claro(employee_id):
     if request.method == 'POST':
         employee = Employee.query.filter_by(id=employee_id, brand='Claro').first_or_404()
         db.session.delete(employee)
+        incrementar_versao_dados('Claro')
         db.session.commit()
         return jsonify({'message': 'Colaborador excluído com sucesso'})
     return jsonify({'error': 'Método não permitido'}), 405
@@ -1077,6 +2594,7 @@ def delete_employee(employee_id):
     if request.method == 'POST':
         employee = Employee.query.get_or_404(employee_id)
         db.session.delete(employee)
+        incrementar_versao_dados(employee.brand)
         db.session.commit()
         return jsonify({'message': 'Colaborador excluído com sucesso'})
     return jsonify({'error': 'Método não permitido'}), 405
@@ -1095,6 +2613,7 @@ def delete_employees_vivo():
             for i in range(0, len(employee_ids), 100):
                 batch = employee_ids[i:i+100]
                 Employee.query.filter(Employee.id.in_(batch), Employee.brand == 'Vivo').delete(synchronize_session=False)
+                incrementar_versao_dados('Vivo')
                 db.session.commit()
             return jsonify({'message': f'{len(employee_ids)} colaborador(es) excluído(s) com sucesso'})
         except Exception as e:
@@ -1116,6 +2635,7 @@ def delete_employees_claro():
             for i in range(0, len(employee_ids), 100):
                 batch = employee_ids[i:i+100]
                 Employee.query.filter(Employee.id.in_(batch), Employee.brand == 'Claro').delete(synchronize_session=False)
+                incrementar_versao_dados('Claro')
                 db.session.commit()
             return jsonify({'message': f'{len(employee_ids)} colaborador(es) excluído(s) com sucesso'})
         except Exception as e:
@@ -1141,6 +2661,7 @@ def delete_employees():
             for i in range(0, len(employee_ids), 100):
                 batch = employee_ids[i:i+100]
                 Employee.query.filter(Employee.id.in_(batch)).delete(synchronize_session=False)
+                incrementar_versao_dados()
                 db.session.commit()
             
             return jsonify({'message': f'{len(employee_ids)} colaborador(es) excluído(s) com sucesso'})
@@ -1305,10 +2826,29 @@ def download_modelo_impl():
 @app.route('/relatorio/gerentes')
 @login_required
 def relatorio_gerentes():
-    from datetime import datetime
     # Determinar a marca do usuário (se autenticado) para filtrar dados
     brand = getattr(current_user, 'brand', None) if current_user and hasattr(current_user, 'is_authenticated') and current_user.is_authenticated else None
+    preencher_fases_pendentes(brand)
+    contexto = result_cache.obter(brand, 'relatorio_gerentes', {}, lambda: _contexto_relatorio_gerentes(brand))
 
+    # Função para formatar tooltip com as datas de admissão
+    def formatar_tooltip(datas):
+        if not datas:
+            return ""
+        if len(datas) == 1:
+            return f"Admitido em: {datas[0]}"
+        return "Admissões: " + ", ".join(datas)
+
+    # Forçar o fechamento da sessão atual para evitar cache
+    db.session.remove()
+
+    return render_template('relatorio_gerentes.html',
+                         formatar_tooltip=formatar_tooltip,
+                         now=datetime.now,
+                         **contexto)
+
+def _contexto_relatorio_gerentes(brand):
+    """Calcula os dados do relatório de gerentes da marca (sem depender da requisição)"""
     # Obter todos os gerentes corporativos distintos (filtrando pela marca quando disponível)
     gerentes_q = db.session.query(Employee.corporate_manager).distinct().filter(
         Employee.corporate_manager.isnot(None)
@@ -1339,6 +2879,24 @@ def relatorio_gerentes():
         datas_q = datas_q.filter(Employee.brand == brand)
     datas_operacao = datas_q.order_by(Employee.field_operation_date, Employee.employee_type).all()
     
+    # Obter as fases distintas de cada data de operação em uma única consulta
+    fases_datas_q = db.session.query(
+        Employee.field_operation_date,
+        Employee.current_phase
+    ).filter(
+        Employee.field_operation_date.isnot(None)
+    )
+    if brand:
+        fases_datas_q = fases_datas_q.filter(Employee.brand == brand)
+    fases_datas_q = fases_datas_q.group_by(Employee.field_operation_date, Employee.current_phase)
+    fases_por_data_operacao = {}
+    log_relatorio = debug_ativo(report_logger)
+    for data, fase in fases_datas_q.all():
+        if log_relatorio:
+            report_logger.debug("Data: %s | Fase: %s", data.strftime('%d/%m/%Y'), fase)
+        if fase and fase != 'Sem fase ativa':
+            fases_por_data_operacao.setdefault(data, set()).add(fase)
+
     # Criar estrutura de dados para datas e tipos
     datas_tipos = {}
     fases_por_data = {}
@@ -1347,19 +2905,7 @@ def relatorio_gerentes():
             data_str = data.strftime('%d/%m/%Y')
             if data_str not in datas_tipos:
                 datas_tipos[data_str] = []
-                # Obter fases de todos os colaboradores para esta data
-                fases_q = db.session.query(Employee).filter(
-                    Employee.field_operation_date == data
-                )
-                if brand:
-                    fases_q = fases_q.filter(Employee.brand == brand)
-                fases = fases_q.all()
-                fases_unicas = set()
-                for emp in fases:
-                    fase = emp.get_current_phase()
-                    print(f"[LOG RELATORIO] Data: {data_str} | Matrícula: {emp.registration} | Fase: {fase}")
-                    if fase and fase != 'Sem fase ativa':
-                        fases_unicas.add(fase)
+                fases_unicas = fases_por_data_operacao.get(data, set())
 
                 # Escolher fase preferencial por prioridade (evita seleção por ordenação alfabética)
                 prioridade = ['Integração', 'Normativo', 'Curso Técnico', 'Duplado', 'Operação', 'Carregamento', 'Previsto']
@@ -1373,91 +2919,68 @@ def relatorio_gerentes():
                     fases_por_data[data_str] = [preferred]
                 else:
                     # fallback: lista ordenada (vazia se não houver)
-                    print(f"[LOG RELATORIO] Data: {data_str} | Fases únicas: {sorted(list(fases_unicas)) if fases_unicas else []}")
+                    if log_relatorio:
+                        report_logger.debug("Data: %s | Fases únicas: %s", data_str, sorted(fases_unicas))
                     fases_por_data[data_str] = sorted(list(fases_unicas)) if fases_unicas else []
             if tipo and tipo not in datas_tipos[data_str]:
                 datas_tipos[data_str].append(tipo)
     
-    # Criar dicionário com a contagem e datas de admissão por gerente, data e tipo
-    dados = {}
-    for gerente in gerentes:
-        dados[gerente] = {}
-        for data_str, tipos_data in datas_tipos.items():
-            data = datetime.strptime(data_str, '%d/%m/%Y').date()
-            dados[gerente][data_str] = {}
-            for tipo in tipos_data:
-                # Buscar todos os colaboradores para contagem total
-                colaboradores_q = Employee.query.filter(
-                    Employee.corporate_manager == gerente,
-                    Employee.field_operation_date == data,
-                    Employee.employee_type == tipo
-                )
-                if brand:
-                    colaboradores_q = colaboradores_q.filter(Employee.brand == brand)
-                colaboradores_todos = colaboradores_q.all()
-                
-                # Buscar apenas os colaboradores aptos (SIM) para a tabela principal
-                colaboradores_q2 = Employee.query.filter(
-                    Employee.corporate_manager == gerente,
-                    Employee.field_operation_date == data,
-                    Employee.employee_type == tipo,
-                    db.or_(
-                        db.func.lower(Employee.operation_ready) == 'sim',
-                        db.func.upper(Employee.operation_ready) == 'SIM',
-                        db.func.lower(Employee.operation_ready) == 'sin',
-                        db.func.upper(Employee.operation_ready) == 'SIN',
-                        db.func.lower(Employee.operation_ready).like('sim%'),
-                        db.func.lower(Employee.operation_ready).like('sin%')
-                    )
-                )
-                if brand:
-                    colaboradores_q2 = colaboradores_q2.filter(Employee.brand == brand)
-                colaboradores = colaboradores_q2.all()
-                
-                # Usar todos os colaboradores para a contagem total
-                colaboradores_info = []
-                for col in colaboradores_todos:
-                    print(f"[LOG RELATORIO] Gerente: {gerente} | Data: {data_str} | Tipo: {tipo} | Matrícula: {col.registration} | Fase: {col.get_current_phase()}")
-                    colaboradores_info.append({
-                        'operation_ready': col.operation_ready,
-                        'course_status': col.course_status,
-                        'admission_date': col.admission_date.strftime('%d/%m/%Y') if col.admission_date else None,
-                        'registration': col.registration,
-                        'full_name': col.full_name
-                    })
-                
-                # Usar apenas os aptos para a contagem da tabela principal
-                contagem_aptos = len(colaboradores)
-                contagem_total = len(colaboradores_todos)
-                
-                if contagem_total > 0:
-                    # Formatar as datas de admissão dos aptos
-                    datas_admissao = []
-                    for col in colaboradores:  # Usando apenas os aptos para as datas de admissão
-                        if col.admission_date:
-                            try:
-                                data_formatada = col.admission_date.strftime('%d/%m/%Y')
-                                datas_admissao.append(data_formatada)
-                            except:
-                                # Se houver erro ao formatar, usar a data como string
-                                datas_admissao.append(str(col.admission_date))
-                    
-                    # Usar a contagem de aptos para a célula principal
-                    # mas manter todos os colaboradores (aptos e não aptos) na lista de colaboradores
-                    dados[gerente][data_str][tipo] = {
-                        'quantidade': contagem_aptos,  # Mostrar apenas a contagem de aptos
-                        'datas_admissao': datas_admissao if datas_admissao else [],
-                        'colaboradores': colaboradores_info  # Mantendo todos para a linha de não aptos
-                    }
-    
-    # Função para formatar tooltip com as datas de admissão
-    def formatar_tooltip(datas):
-        if not datas:
-            return ""
-        if len(datas) == 1:
-            return f"Admitido em: {datas[0]}"
-        return "Admissões: " + ", ".join(datas)
+    # Contagens e datas de admissão por gerente, data e tipo em uma única consulta agrupada
+    apto = Employee.is_operation_ready
+    chave = (Employee.corporate_manager, Employee.field_operation_date, Employee.employee_type)
+    filtros_celula = [
+        Employee.corporate_manager.isnot(None),
+        Employee.field_operation_date.isnot(None),
+        Employee.employee_type.isnot(None)
+    ]
+    if brand:
+        filtros_celula.append(Employee.brand == brand)
+    celulas_q = db.session.query(
+        *chave,
+        db.func.count(Employee.id),
+        db.func.sum(db.case((apto, 1), else_=0)),
+        agregar_texto(db.case((apto, Employee.admission_date), else_=None))
+    ).filter(*filtros_celula).group_by(*chave)
+
+    # Colaboradores de cada célula (aptos e não aptos) em uma segunda consulta
+    colaboradores_q = db.session.query(
+        *chave,
+        Employee.operation_ready,
+        Employee.course_status,
+        Employee.admission_date,
+        Employee.registration,
+        Employee.full_name,
+        Employee.current_phase
+    ).filter(*filtros_celula).order_by(Employee.id)
+    colaboradores_por_celula = {}
+    for gerente, data, tipo, operation_ready, course_status, admission_date, registration, full_name, fase in colaboradores_q.all():
+        if log_relatorio:
+            report_logger.debug("Gerente: %s | Data: %s | Tipo: %s | Matrícula: %s | Fase: %s",
+                                gerente, data, tipo, registration, fase)
+        colaboradores_por_celula.setdefault((gerente, data, tipo), []).append({
+            'operation_ready': operation_ready,
+            'course_status': course_status,
+            'admission_date': admission_date.strftime('%d/%m/%Y') if admission_date else None,
+            'registration': registration,
+            'full_name': full_name
+        })
 
+    # Montar a estrutura do template em uma única passada
+    dados = {gerente: {data_str: {} for data_str in datas_tipos} for gerente in gerentes}
+    for gerente, data, tipo, contagem_total, contagem_aptos, datas_aptos in celulas_q.all():
+        data_str = data.strftime('%d/%m/%Y')
+        if gerente not in dados or tipo not in datas_tipos.get(data_str, []) or not contagem_total:
+            continue
+        # Datas chegam como 'AAAA-MM-DD' e são exibidas como 'DD/MM/AAAA'
+        datas_admissao = ['/'.join(reversed(d.split('-'))) for d in datas_aptos.split(',')] if datas_aptos else []
+        # Usar a contagem de aptos para a célula principal
+        # mas manter todos os colaboradores (aptos e não aptos) na lista de colaboradores
+        dados[gerente][data_str][tipo] = {
+            'quantidade': int(contagem_aptos or 0),  # Mostrar apenas a contagem de aptos
+            'datas_admissao': datas_admissao,
+            'colaboradores': colaboradores_por_celula.get((gerente, data, tipo), [])  # Mantendo todos para a linha de não aptos
+        }
+    
     # Calcular o total de colaboradores
     total_colaboradores = 0
     for gerente_data in dados.values():
@@ -1481,14 +3004,14 @@ def relatorio_gerentes():
     
     if ultimo_registro and ultimo_registro.last_updated:
         ultima_atualizacao = ultimo_registro.last_updated
-        print(f"Data mais recente encontrada: {ultima_atualizacao}")
+        report_logger.debug("Data mais recente encontrada: %s", ultima_atualizacao)
     else:
         ultima_atualizacao = datetime.utcnow()
-        print("Usando data atual como última atualização")
+        report_logger.debug("Usando data atual como última atualização")
     
     # Garantir que temos um objeto datetime
     if not isinstance(ultima_atualizacao, datetime):
-        print(f"Aviso: Formato de data inesperado: {ultima_atualizacao} (tipo: {type(ultima_atualizacao)})")
+        report_logger.warning("Formato de data inesperado: %s (tipo: %s)", ultima_atualizacao, type(ultima_atualizacao))
         ultima_atualizacao = datetime.utcnow()
     
     # Verificar se a data já está em UTC (sem informação de timezone)
@@ -1504,21 +3027,15 @@ def relatorio_gerentes():
         brasil_tz = timezone(timedelta(hours=-3))
         ultima_atualizacao = ultima_atualizacao.astimezone(brasil_tz)
     
-    print(f"Data após conversão para Brasília: {ultima_atualizacao}")
-    
-    # Forçar o fechamento da sessão atual para evitar cache
-    db.session.remove()
+    report_logger.debug("Data após conversão para Brasília: %s", ultima_atualizacao)
 
-    return render_template('relatorio_gerentes.html', 
-                         gerentes=gerentes, 
-                         datas_tipos=datas_tipos_ordenado,
-                         fases_por_data=fases_por_data,
-                         ultima_atualizacao=ultima_atualizacao,
-                         dados=dados,
-                         total_colaboradores=total_colaboradores,
-                         formatar_tooltip=formatar_tooltip,
-                         tipos=tipos,
-                         now=datetime.now)
+    return dict(gerentes=gerentes,
+                datas_tipos=datas_tipos_ordenado,
+                fases_por_data=fases_por_data,
+                ultima_atualizacao=ultima_atualizacao,
+                dados=dados,
+                total_colaboradores=total_colaboradores,
+                tipos=tipos)
 
 @app.route('/dashboard_fases')
 @login_required
@@ -1529,7 +3046,16 @@ def dashboard_fases():
     
     # Determinar a marca do usuário (se autenticado) para filtrar dados
     brand = getattr(current_user, 'brand', None) if current_user and hasattr(current_user, 'is_authenticated') and current_user.is_authenticated else None
+    preencher_fases_pendentes(brand)
 
+    contexto = result_cache.obter(
+        brand, 'dashboard_fases', {'apto_operacao': apto_operacao, 'mes_operacao': mes_operacao},
+        lambda: _contexto_dashboard_fases(brand, apto_operacao, mes_operacao)
+    )
+    return render_template('dashboard_fases.html', **contexto)
+
+def _contexto_dashboard_fases(brand, apto_operacao, mes_operacao):
+    """Calcula os dados do dashboard de fases (sem depender da requisição)"""
     # Obter lista de meses/anos disponíveis no banco de dados (filtrando por marca quando aplicável)
     meses_q = db.session.query(
         db.func.strftime('%Y-%m', Employee.field_operation_date).label('mes_ano')
@@ -1549,10 +3075,7 @@ def dashboard_fases():
             try:
                 # Converte de 'YYYY-MM' para (valor, label) ex: ('2023-11', 'Novembro/2023')
                 ano, mes = mes_ano[0].split('-')
-                mes_nome = [
-                    'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-                    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-                ][int(mes)-1]
+                mes_nome = MESES_PT[int(mes)-1]
                 meses_formatados.append((mes_ano[0], f"{mes_nome}/{ano}"))
             except (ValueError, IndexError):
                 continue
@@ -1575,54 +3098,15 @@ def dashboard_fases():
     
     # Aplicar filtro de apto para operação
     if apto_operacao == 'sim':
-        # Busca por 'Sim' em qualquer formato (case insensitive)
-        query = query.filter(
-            db.or_(
-                db.func.lower(Employee.operation_ready) == 'sim',
-                db.func.lower(Employee.operation_ready) == 's',
-                db.func.lower(Employee.operation_ready) == 'y',
-                db.func.lower(Employee.operation_ready) == 'yes',
-                db.func.lower(Employee.operation_ready) == '1',
-                Employee.operation_ready == 'Sim',
-                Employee.operation_ready == 'SIM',
-                Employee.operation_ready == 'S',
-                Employee.operation_ready == 's',
-                Employee.operation_ready == '1'
-            )
-        )
+        query = query.filter(Employee.is_operation_ready)
     elif apto_operacao == 'nao':
-        # Busca por qualquer coisa que não seja considerado 'Sim'
-        query = query.filter(
-            db.or_(
-                Employee.operation_ready.is_(None),
-                Employee.operation_ready == '',
-                db.func.lower(Employee.operation_ready) == 'não',
-                db.func.lower(Employee.operation_ready) == 'nao',
-                db.func.lower(Employee.operation_ready) == 'n',
-                db.func.lower(Employee.operation_ready) == 'no',
-                db.func.lower(Employee.operation_ready) == '0',
-                Employee.operation_ready == 'Não',
-                Employee.operation_ready == 'NÃO',
-                Employee.operation_ready == 'N',
-                Employee.operation_ready == 'n',
-                Employee.operation_ready == '0',
-                # Inclui qualquer outro valor que não seja considerado 'Sim'
-                ~db.or_(
-                    db.func.lower(Employee.operation_ready) == 'sim',
-                    db.func.lower(Employee.operation_ready) == 's',
-                    db.func.lower(Employee.operation_ready) == 'y',
-                    db.func.lower(Employee.operation_ready) == 'yes',
-                    db.func.lower(Employee.operation_ready) == '1',
-                    Employee.operation_ready == 'Sim',
-                    Employee.operation_ready == 'SIM',
-                    Employee.operation_ready == 'S',
-                    Employee.operation_ready == 's',
-                    Employee.operation_ready == '1'
-                )
-            )
-        )
+        query = query.filter(db.not_(Employee.is_operation_ready))
     
-    employees = query.order_by(Employee.full_name).all()
+    # Linhas somente leitura (não objetos do ORM), seguras para ficar em cache,
+    # já ordenadas por data de operação de campo (mais recente primeiro, vazias no fim)
+    employees = query.with_entities(*Employee.__table__.columns).order_by(
+        Employee.field_operation_date.desc().nulls_last(), Employee.full_name
+    ).all()
     
     # Contar colaboradores por fase (apenas fases ativas)
     # As chaves devem corresponder exatamente ao retorno de get_current_phase
@@ -1637,12 +3121,14 @@ def dashboard_fases():
         'Previsto': 0
     }
     
-    # Contar colaboradores em cada fase
-    for employee in employees:
-        phase = employee.get_current_phase()
+    # Contar colaboradores em cada fase diretamente no banco
+    contagem_q = query.with_entities(
+        Employee.current_phase, db.func.count(Employee.id)
+    ).group_by(Employee.current_phase)
+    for phase, total in contagem_q.all():
         # Contar apenas as fases que estão na lista phase_counts
         if phase in phase_counts:
-            phase_counts[phase] += 1
+            phase_counts[phase] += total
     
     # Preparar dados para o gráfico
     labels = list(phase_counts.keys())
@@ -1654,27 +3140,12 @@ def dashboard_fases():
         employees_by_phase[phase] = []
     
     for employee in employees:
-        phase = employee.get_current_phase()
+        phase = employee.current_phase
         # Incluir apenas se a fase estiver na lista de fases ativas
         if phase in employees_by_phase:
             employees_by_phase[phase].append(employee)
     
-    # Ordenar colaboradores por data de operação de campo (mais recente primeiro)
-    def to_date(dt):
-        if dt is None:
-            return None
-        if isinstance(dt, datetime):
-            return dt.date()
-        return dt
-    
-    for phase in employees_by_phase:
-        employees_by_phase[phase].sort(
-            key=lambda x: to_date(x.field_operation_date) if x.field_operation_date else datetime.min.date(),
-            reverse=True
-        )
-    
-    return render_template(
-        'dashboard_fases.html',
+    return dict(
         phase_counts=phase_counts,
         labels=labels,
         data=data,
@@ -1695,128 +3166,195 @@ def export_employees_excel_vivo():
 def export_employees_excel_claro():
     return export_employees_excel_impl(brand='Claro')
 
+# Colunas da exportação de colaboradores: (cabeçalho, coluna de Employee, formato das datas)
+EXPORT_COLUNAS = (
+    ('Matrícula', 'registration', None),
+    ('Nome Completo', 'full_name', None),
+    ('Cargo', 'role', None),
+    ('Tipo de Colaborador', 'employee_type', None),
+    ('Data de Admissão', 'admission_date', '%d/%m/%Y'),
+    ('CEP', 'cep', None),
+    ('Status', 'status', None),
+    ('Status do Curso', 'course_status', None),
+    ('Time', 'team', None),
+    ('Local do Curso', 'course_location', None),
+    ('Gestor', 'manager', None),
+    ('Gestor Corporativo', 'corporate_manager', None),
+    ('Instrutor', 'instructor', None),
+    ('Contato', 'contato', None),
+    ('Pronto para Operação', 'operation_ready', None),
+    ('Início Integração', 'integration_start', '%d/%m/%Y'),
+    ('Fim Integração', 'integration_end', '%d/%m/%Y'),
+    ('Início Normativo', 'normative_start', '%d/%m/%Y'),
+    ('Fim Normativo', 'normative_end', '%d/%m/%Y'),
+    ('Início Curso Técnico', 'technical_course_start', '%d/%m/%Y'),
+    ('Fim Curso Técnico', 'technical_course_end', '%d/%m/%Y'),
+    ('Início Duplado', 'double_start', '%d/%m/%Y'),
+    ('Fim Duplado', 'double_end', '%d/%m/%Y'),
+    ('Data de Carregamento', 'loading_date', '%d/%m/%Y'),
+    ('Data de Operação no Campo', 'field_operation_date', '%d/%m/%Y'),
+    ('Fase Atual', 'current_phase', None),
+    ('Última Atualização', 'last_updated', '%d/%m/%Y %H:%M:%S'),
+)
+# Colunas exportadas com os valores traduzidos para o português (ver translate_status)
+EXPORT_TRADUZIDAS = ('status', 'course_status', 'employee_type', 'operation_ready')
+# Linhas lidas do banco por vez na exportação
+EXPORT_LOTE = 1000
+EXPORT_LARGURA_MAXIMA = 30
+# Acima deste tamanho o arquivo gerado vai da memória para o disco
+EXPORT_SPOOL_MAX = 8 * 1024 * 1024
+
+def consulta_exportacao(brand, args):
+    """Consulta filtrada da exportação de colaboradores, apenas com as colunas exportadas"""
+    query = aplicar_filtros_employee(Employee.query.filter_by(brand=brand), args)
+    return query.with_entities(*[getattr(Employee, coluna) for _, coluna, _ in EXPORT_COLUNAS])
+
+def lotes_exportacao(query):
+    """
+    Itera a exportação em lotes de até EXPORT_LOTE linhas lidas do banco, cada lote
+    como uma lista de colunas na ordem de EXPORT_COLUNAS, com as colunas de
+    EXPORT_TRADUZIDAS traduzidas (traduzir_coluna, um valor distinto por vez).
+    """
+    linhas = iter(query.yield_per(EXPORT_LOTE))
+    while True:
+        lote = list(islice(linhas, EXPORT_LOTE))
+        if not lote:
+            return
+        colunas = [list(valores) for valores in zip(*lote)]
+        for i, (_, coluna, _) in enumerate(EXPORT_COLUNAS):
+            if coluna in EXPORT_TRADUZIDAS:
+                colunas[i] = traduzir_coluna(colunas[i], coluna)
+        yield colunas
+
+def linhas_exportacao(query):
+    """
+    Itera as linhas da exportação já formatadas (datas como texto, '' quando vazias,
+    status traduzidos), buscando EXPORT_LOTE linhas do banco por vez.
+    """
+    formatos = [formato for _, _, formato in EXPORT_COLUNAS]
+    for colunas in lotes_exportacao(query):
+        for linha in zip(*colunas):
+            yield tuple(
+                (valor.strftime(formato) if valor else '') if formato else valor
+                for valor, formato in zip(linha, formatos)
+            )
+
+def escrever_xlsx_exportacao(linhas, destino):
+    """
+    Grava as linhas em uma planilha .xlsx no arquivo `destino` com o xlsxwriter em
+    modo constant_memory (cada linha vai para o disco assim que é escrita). A
+    largura das colunas é acompanhada durante a escrita.
+    """
+    workbook = xlsxwriter.Workbook(destino, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Colaboradores')
+    header_format = workbook.add_format({
+        'bold': True,
+        'text_wrap': True,
+        'valign': 'top',
+        'fg_color': '#D7E4BC',
+        'border': 1
+    })
+
+    larguras = []
+    for i, (cabecalho, _, _) in enumerate(EXPORT_COLUNAS):
+        worksheet.write_string(0, i, cabecalho, header_format)
+        larguras.append(len(cabecalho))
+
+    for numero, linha in enumerate(linhas, start=1):
+        for i, valor in enumerate(linha):
+            if valor:
+                worksheet.write_string(numero, i, valor)
+                if len(valor) > larguras[i]:
+                    larguras[i] = len(valor)
+
+    for i, largura in enumerate(larguras):
+        worksheet.set_column(i, i, min(largura + 2, EXPORT_LARGURA_MAXIMA))
+    workbook.close()
+
+def gerar_csv_exportacao(linhas):
+    """Gera o CSV da exportação em pedaços de EXPORT_LOTE linhas, sem montar o arquivo inteiro"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([cabecalho for cabecalho, _, _ in EXPORT_COLUNAS])
+    for numero, linha in enumerate(linhas, start=1):
+        writer.writerow(linha)
+        if numero % EXPORT_LOTE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def escrever_parquet_exportacao(query, destino):
+    """
+    Grava a exportação em Parquet (compressão snappy) com datas como date32 e a
+    última atualização como timestamp, um row group por lote de lotes_exportacao.
+    Requer o pacote opcional pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipos = {'last_updated': pa.timestamp('us')}
+    schema = pa.schema([
+        (cabecalho, tipos.get(coluna, pa.date32() if formato else pa.string()))
+        for cabecalho, coluna, formato in EXPORT_COLUNAS
+    ])
+    def tabela(colunas):
+        return pa.Table.from_arrays(
+            [pa.array(coluna, type=campo.type) for coluna, campo in zip(colunas, schema)], schema=schema
+        )
+
+    with pq.ParquetWriter(destino, schema, compression='snappy') as writer:
+        vazio = True
+        for colunas in lotes_exportacao(query):
+            writer.write_table(tabela(colunas))
+            vazio = False
+        if vazio:
+            writer.write_table(tabela([[] for _ in EXPORT_COLUNAS]))
+
 def export_employees_excel_impl(brand='Vivo'):
+    formato = request.args.get('format', 'xlsx')
+    if formato not in ('xlsx', 'csv', 'parquet'):
+        return f'Formato de exportação não suportado: {formato}', 400
+    if formato == 'parquet':
+        # pyarrow é dependência opcional, importada apenas por escrever_parquet_exportacao
+        if importlib.util.find_spec('pyarrow') is None:
+            return 'A exportação em Parquet requer o pacote pyarrow, que não está instalado no servidor.', 501
+
     try:
-        # Inicializar a query com filtro de marca
-        query = Employee.query.filter_by(brand=brand)
-        
-        # Coletar e aplicar filtros de texto
-        text_filters = ['registration', 'full_name', 'role', 'employee_type', 'status', 
-                       'course_status', 'team', 'course_location', 'manager', 
-                       'corporate_manager', 'instructor', 'operation_ready']
-        
-        for field in text_filters:
-            value = request.args.get(field)
-            if value and value != 'todos':  # 'todos' é o valor padrão dos selects
-                # Se for um campo de seleção múltipla (pode conter valores separados por vírgula)
-                if ',' in value:
-                    values = [v.strip() for v in value.split(',') if v.strip()]
-                    if values:
-                        query = query.filter(getattr(Employee, field).in_(values))
-                else:
-                    query = query.filter(getattr(Employee, field).ilike(f'%{value}%'))
-        
-        # Aplicar filtros de data
-        date_fields = [
-            'admission_date', 'integration_start', 'integration_end', 
-            'normative_start', 'normative_end', 'technical_course_start', 
-            'technical_course_end', 'double_start', 'double_end', 
-            'loading_date', 'field_operation_date'
-        ]
-        
-        for date_field in date_fields:
-            start_date = request.args.get(f'{date_field}_start')
-            end_date = request.args.get(f'{date_field}_end')
-            
-            if start_date:
-                try:
-                    start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                    query = query.filter(getattr(Employee, date_field) >= start_date)
-                except (ValueError, TypeError):
-                    pass
-            
-            if end_date:
-                try:
-                    end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-                    query = query.filter(getattr(Employee, date_field) <= end_date)
-                except (ValueError, TypeError):
-                    pass
-        
-        # Get filtered employees
-        employees = query.all()
-        
-        # Convert to pandas DataFrame
-        data = []
-        for emp in employees:
-            emp_data = {
-                'Matrícula': emp.registration,
-                'Nome Completo': emp.full_name,
-                'Cargo': emp.role,
-                'Tipo de Colaborador': emp.employee_type,
-                'Data de Admissão': emp.admission_date.strftime('%d/%m/%Y') if emp.admission_date else '',
-                'CEP': emp.cep,
-                'Status': emp.status,
-                'Status do Curso': emp.course_status,
-                'Time': emp.team,
-                'Local do Curso': emp.course_location,
-                'Gestor': emp.manager,
-                'Gestor Corporativo': emp.corporate_manager,
-                'Instrutor': emp.instructor,
-                'Contato': emp.contato,
-                'Pronto para Operação': emp.operation_ready,
-                'Início Integração': emp.integration_start.strftime('%d/%m/%Y') if emp.integration_start else '',
-                'Fim Integração': emp.integration_end.strftime('%d/%m/%Y') if emp.integration_end else '',
-                'Início Normativo': emp.normative_start.strftime('%d/%m/%Y') if emp.normative_start else '',
-                'Fim Normativo': emp.normative_end.strftime('%d/%m/%Y') if emp.normative_end else '',
-                'Início Curso Técnico': emp.technical_course_start.strftime('%d/%m/%Y') if emp.technical_course_start else '',
-                'Fim Curso Técnico': emp.technical_course_end.strftime('%d/%m/%Y') if emp.technical_course_end else '',
-                'Início Duplado': emp.double_start.strftime('%d/%m/%Y') if emp.double_start else '',
-                'Fim Duplado': emp.double_end.strftime('%d/%m/%Y') if emp.double_end else '',
-                'Data de Carregamento': emp.loading_date.strftime('%d/%m/%Y') if emp.loading_date else '',
-                'Data de Operação no Campo': emp.field_operation_date.strftime('%d/%m/%Y') if emp.field_operation_date else '',
-                'Fase Atual': emp.get_current_phase(),
-                'Última Atualização': emp.last_updated.strftime('%d/%m/%Y %H:%M:%S') if emp.last_updated else ''
-            }
-            data.append(emp_data)
-        
-        # Create DataFrame
-        df = pd.DataFrame(data)
-        
-        # Create Excel file in memory
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Colaboradores')
-            
-            # Get the xlsxwriter workbook and worksheet objects
-            workbook = writer.book
-            worksheet = writer.sheets['Colaboradores']
-            
-            # Add a header format
-            header_format = workbook.add_format({
-                'bold': True,
-                'text_wrap': True,
-                'valign': 'top',
-                'fg_color': '#D7E4BC',
-                'border': 1
-            })
-            
-            # Set column widths and format headers
-            for i, col in enumerate(df.columns):
-                # Set column width based on header length
-                max_length = max(df[col].astype(str).apply(len).max(), len(col)) + 2
-                worksheet.set_column(i, i, min(max_length, 30))
-                
-                # Write the column headers with the defined format
-                worksheet.write(0, i, col, header_format)
-        
+        preencher_fases_pendentes(brand)
+        query = consulta_exportacao(brand, request.args)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        if formato == 'csv':
+            # Resposta em streaming: as linhas saem do banco direto para o cliente
+            return app.response_class(
+                stream_with_context(gerar_csv_exportacao(linhas_exportacao(query))),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename=colaboradores_exportados_{timestamp}.csv'}
+            )
+
+        # O arquivo fica em memória enquanto pequeno e passa para o disco quando cresce
+        output = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX)
+        try:
+            if formato == 'parquet':
+                escrever_parquet_exportacao(query, output)
+            else:
+                escrever_xlsx_exportacao(linhas_exportacao(query), output)
+        except Exception:
+            output.close()
+            raise
+
         # Prepare the response
         output.seek(0)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if formato == 'parquet':
+            mimetype = 'application/vnd.apache.parquet'
+        else:
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         return send_file(
             output,
             as_attachment=True,
-            download_name=f'colaboradores_exportados_{timestamp}.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            download_name=f'colaboradores_exportados_{timestamp}.{formato}',
+            mimetype=mimetype
         )
     except Exception as e:
         return str(e), 500
@@ -1844,69 +3382,234 @@ def delete_audit_logs():
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/audit_log')
-@login_required
-def audit_log():
-    # Allow all authenticated users to view the audit log
-    is_admin = current_user.access_type == 'admin'
-    
-    # Get filter parameters
-    registration = request.args.get('registration')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    field = request.args.get('field')
-    source = request.args.get('source')
-    
-    # Determinar a marca do usuário (se autenticado) para filtrar dados
-    brand = getattr(current_user, 'brand', None) if current_user and hasattr(current_user, 'is_authenticated') and current_user.is_authenticated else None
+# Registros por página no log de auditoria
+AUDIT_PAGE_SIZE = int(os.getenv('AUDIT_PAGE_SIZE', '100'))
 
-    # Build query
-    query = AuditLog.query
-    # If brand is set, limit audit logs to registrations that belong to that brand
+def _codificar_cursor_auditoria(log):
+    """Cursor opaco com a posição (changed_at, id) do último registro da página"""
+    bruto = json.dumps({'t': log.changed_at.isoformat(), 'id': log.id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+def _decodificar_cursor_auditoria(cursor):
+    """Inverso de _codificar_cursor_auditoria; levanta ValueError para cursores inválidos"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        return datetime.fromisoformat(dados['t']), int(dados['id'])
+    except (KeyError, TypeError, ValueError, binascii.Error) as e:
+        raise ValueError('Cursor inválido') from e
+
+def filtrar_auditoria(query, brand, args):
+    """
+    Aplica ao log de auditoria o escopo da marca e os filtros de matrícula, campo,
+    origem e período (start_date/end_date em AAAA-MM-DD, end_date inclusivo).
+    """
     if brand:
-        regs_q = db.session.query(Employee.registration).filter(Employee.brand == brand).distinct()
-        regs = [r[0] for r in regs_q.all()]
-        if regs:
-            query = query.filter(AuditLog.registration.in_(regs))
-        else:
-            # No registrations for this brand yet -> empty result
-            query = query.filter(False)
-    
+        query = query.filter(AuditLog.brand == brand)
+
+    registration = args.get('registration')
+    field = args.get('field')
+    source = args.get('source')
     if registration:
         query = query.filter(AuditLog.registration == registration)
     if field and field != 'all':
         query = query.filter(AuditLog.field_changed == field)
     if source and source != 'all':
         query = query.filter(AuditLog.change_source == source)
-    if start_date:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d')
-            query = query.filter(AuditLog.changed_at >= start_date)
-        except ValueError:
-            pass
-    if end_date:
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
-            query = query.filter(AuditLog.changed_at <= end_date)
-        except ValueError:
-            pass
-    
-    # Order by date descending
-    logs = query.order_by(AuditLog.changed_at.desc()).all()
-    
-    # Get unique fields for filter dropdown
-    fields = [r[0] for r in db.session.query(AuditLog.field_changed).distinct().all() if r[0]]
-    
+    try:
+        if args.get('start_date'):
+            query = query.filter(AuditLog.changed_at >= datetime.strptime(args['start_date'], '%Y-%m-%d'))
+    except ValueError:
+        pass
+    try:
+        if args.get('end_date'):
+            fim = datetime.strptime(args['end_date'], '%Y-%m-%d') + timedelta(days=1)
+            query = query.filter(AuditLog.changed_at < fim)
+    except ValueError:
+        pass
+    return query
+
+def pagina_auditoria(brand, args, cursor=None, page_size=AUDIT_PAGE_SIZE):
+    """
+    Retorna uma página do log de auditoria ordenada por (changed_at DESC, id DESC)
+    e o cursor da próxima página. Paginação por keyset, como em pagina_employees.
+    """
+    query = filtrar_auditoria(AuditLog.query, brand, args)
+    if cursor:
+        ultima_data, ultimo_id = _decodificar_cursor_auditoria(cursor)
+        query = query.filter(db.tuple_(AuditLog.changed_at, AuditLog.id) < (ultima_data, ultimo_id))
+
+    logs = query.order_by(AuditLog.changed_at.desc(), AuditLog.id.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(logs) > page_size:
+        logs = logs[:page_size]
+        next_cursor = _codificar_cursor_auditoria(logs[-1])
+    return logs, next_cursor
+
+def campos_auditoria(brand=None):
+    """Campos distintos presentes no log de auditoria da marca (opções do filtro)"""
+    query = db.session.query(AuditLog.field_changed)
+    if brand:
+        query = query.filter(AuditLog.brand == brand)
+    return sorted(r[0] for r in query.distinct() if r[0])
+
+# Retenção do log de auditoria: registros mais antigos que N meses (por marca) são
+# movidos para arquivos instance/audit_archive/<marca>/AAAA-MM.jsonl.gz e apagados
+AUDIT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', '12'))
+AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', os.path.join(instance_path, 'audit_archive'))
+AUDIT_ARCHIVE_CHUNK = 5000
+# Pasta dos registros antigos sem marca (ver migração 010)
+AUDIT_ARCHIVE_SEM_MARCA = 'sem_marca'
+
+def retencao_auditoria(brand):
+    """Meses de retenção da marca: AUDIT_RETENTION_MONTHS_<MARCA> ou o padrão (0 = sem limite)"""
+    chave = f'AUDIT_RETENTION_MONTHS_{(brand or AUDIT_ARCHIVE_SEM_MARCA).upper()}'
+    return int(os.getenv(chave, AUDIT_RETENTION_MONTHS))
+
+def inicio_retencao(meses, today=None):
+    """Primeiro dia do mês mais antigo mantido na tabela: só meses completos são arquivados"""
+    today = today or datetime.now().date()
+    indice = today.year * 12 + (today.month - 1) - meses
+    return datetime(indice // 12, indice % 12 + 1, 1)
+
+def _linha_arquivo_auditoria(linha):
+    return json.dumps(
+        {coluna: (valor.isoformat() if isinstance(valor, datetime) else valor) for coluna, valor in linha.items()},
+        ensure_ascii=False
+    )
+
+def arquivar_auditoria(brand, meses=None, today=None, lote=AUDIT_ARCHIVE_CHUNK):
+    """
+    Move os registros de auditoria da marca anteriores ao limite de retenção para
+    os arquivos comprimidos por mês e os apaga da tabela.
+
+    Cada lote (em ordem de changed_at, id) é acrescentado aos arquivos como um novo
+    membro gzip e sincronizado em disco antes de ser apagado por intervalo, em uma
+    transação curta. Ao final, se algo foi arquivado, a versão da auditoria
+    (VERSAO_AUDITORIA) da marca é incrementada uma vez (todas as marcas para os
+    registros sem marca); os colaboradores não mudaram, então a versão principal
+    fica como está. Se o processo cair entre as duas etapas, o lote é arquivado
+    de novo na execução seguinte; consultar_arquivo_auditoria ignora ids repetidos.
+
+    `brand=None` trata os registros sem marca. Retorna quantos registros foram arquivados.
+    """
+    meses = retencao_auditoria(brand) if meses is None else meses
+    if meses <= 0:
+        return 0
+    limite = inicio_retencao(meses, today)
+    pasta = os.path.join(AUDIT_ARCHIVE_DIR, brand or AUDIT_ARCHIVE_SEM_MARCA)
+    os.makedirs(pasta, exist_ok=True)
+
+    tabela = AuditLog.__table__
+    filtro_marca = tabela.c.brand == brand if brand else tabela.c.brand.is_(None)
+    total = 0
+    while True:
+        linhas = db.session.execute(
+            db.select(tabela)
+            .where(filtro_marca, tabela.c.changed_at < limite)
+            .order_by(tabela.c.changed_at, tabela.c.id)
+            .limit(lote)
+        ).mappings().all()
+        if not linhas:
+            break
+
+        por_mes = {}
+        for linha in linhas:
+            por_mes.setdefault(linha['changed_at'].strftime('%Y-%m'), []).append(_linha_arquivo_auditoria(linha))
+        for mes, conteudo in por_mes.items():
+            with open(os.path.join(pasta, f'{mes}.jsonl.gz'), 'ab') as bruto:
+                with gzip.GzipFile(fileobj=bruto, mode='ab') as arquivo:
+                    arquivo.write(('\n'.join(conteudo) + '\n').encode('utf-8'))
+                bruto.flush()
+                os.fsync(bruto.fileno())
+
+        # Tudo até a chave do último registro já foi arquivado (lotes anteriores foram apagados)
+        ultimo = linhas[-1]
+        db.session.execute(
+            tabela.delete().where(
+                filtro_marca,
+                tabela.c.changed_at < limite,
+                db.tuple_(tabela.c.changed_at, tabela.c.id) <= (ultimo['changed_at'], ultimo['id'])
+            )
+        )
+        db.session.commit()
+        total += len(linhas)
+        report_logger.info("Auditoria %s: %d registros arquivados até %s", brand or AUDIT_ARCHIVE_SEM_MARCA,
+                           total, ultimo['changed_at'])
+
+    if total:
+        # As opções do filtro de campo do log ficam em cache pela versão da auditoria
+        incrementar_versao_dados(brand, escopo=VERSAO_AUDITORIA)
+        db.session.commit()
+    return total
+
+def consultar_arquivo_auditoria(brand, inicio=None, fim=None, registration=None, field=None):
+    """
+    Itera os registros arquivados da marca (dicts, changed_at em ISO) entre as datas
+    `inicio` e `fim` (inclusivas), lendo apenas os arquivos dos meses do intervalo.
+    """
+    pasta = os.path.join(AUDIT_ARCHIVE_DIR, brand or AUDIT_ARCHIVE_SEM_MARCA)
+    if not os.path.isdir(pasta):
+        return
+    primeiro = inicio.strftime('%Y-%m') if inicio else None
+    ultimo = fim.strftime('%Y-%m') if fim else None
+    inicio_iso = inicio.isoformat() if inicio else None
+    fim_iso = (fim + timedelta(days=1)).isoformat() if fim else None
+
+    for nome in sorted(os.listdir(pasta)):
+        if not nome.endswith('.jsonl.gz'):
+            continue
+        mes = nome[:7]
+        if (primeiro and mes < primeiro) or (ultimo and mes > ultimo):
+            continue
+        vistos = set()
+        with gzip.open(os.path.join(pasta, nome), 'rt', encoding='utf-8') as arquivo:
+            for texto in arquivo:
+                linha = json.loads(texto)
+                if linha['id'] in vistos:
+                    continue
+                vistos.add(linha['id'])
+                if inicio_iso and linha['changed_at'] < inicio_iso:
+                    continue
+                if fim_iso and linha['changed_at'] >= fim_iso:
+                    continue
+                if registration and linha['registration'] != registration:
+                    continue
+                if field and linha['field_changed'] != field:
+                    continue
+                yield linha
+
+@app.route('/audit_log')
+@login_required
+def audit_log():
+    # Allow all authenticated users to view the audit log
+    # Determinar a marca do usuário (se autenticado) para filtrar dados
+    brand = getattr(current_user, 'brand', None) if current_user and hasattr(current_user, 'is_authenticated') and current_user.is_authenticated else None
+
+    cursor = request.args.get('cursor')
+    try:
+        logs, next_cursor = pagina_auditoria(brand, request.args, cursor=cursor)
+    except ValueError:
+        return 'Cursor inválido', 400
+
+    # Opções do filtro de campo: a lista muda pouco e é recalculada quando os dados mudam
+    fields = result_cache.obter(brand, 'campos_auditoria', {}, lambda: campos_auditoria(brand),
+                                escopo=VERSAO_AUDITORIA)
+
+    current_filters = {
+        'registration': request.args.get('registration') or '',
+        'start_date': request.args.get('start_date') or '',
+        'end_date': request.args.get('end_date') or '',
+        'field': request.args.get('field') or 'all',
+        'source': request.args.get('source') or 'all'
+    }
     return render_template('audit_log.html', 
                          logs=logs, 
                          fields=fields,
-                         current_filters={
-                             'registration': registration or '',
-                             'start_date': start_date.strftime('%Y-%m-%d') if start_date and hasattr(start_date, 'strftime') else '',
-                             'end_date': end_date.strftime('%Y-%m-%d') if end_date and hasattr(end_date, 'strftime') else '',
-                             'field': field or 'all',
-                             'source': source or 'all'
-                         })
+                         next_cursor=next_cursor,
+                         is_first_page=not cursor,
+                         page_args={k: v for k, v in request.args.items() if k != 'cursor' and v},
+                         current_filters=current_filters)
 
 
 @app.route('/gestao_carregamento')
@@ -1916,14 +3619,19 @@ def gestao_carregamento():
     # Determinar a marca do usuário (se autenticado) para filtrar dados
     brand = getattr(current_user, 'brand', None) if current_user and hasattr(current_user, 'is_authenticated') and current_user.is_authenticated else None
 
+    contexto = result_cache.obter(brand, 'gestao_carregamento', {}, lambda: _contexto_gestao_carregamento(brand))
+    return render_template('gestao_carregamento.html', **contexto)
+
+def _contexto_gestao_carregamento(brand):
+    """Calcula os dados da gestão de carregamento (sem depender da requisição)"""
     # Obter apenas colaboradores aptos para operação e com data de carregamento definida
     colaboradores_q = Employee.query.filter(
-        Employee.operation_ready == 'Sim',
+        Employee.is_operation_ready,
         Employee.loading_date.isnot(None)
     )
     if brand:
         colaboradores_q = colaboradores_q.filter(Employee.brand == brand)
-    colaboradores = colaboradores_q.order_by(Employee.loading_date).all()
+    colaboradores = colaboradores_q.with_entities(*Employee.__table__.columns).order_by(Employee.loading_date).all()
     
     # Organizar por data de carregamento
     carregamentos = {}
@@ -1946,8 +3654,7 @@ def gestao_carregamento():
     carregamentos_futuros.sort(key=lambda x: x['data'])
     carregamentos_passados.sort(key=lambda x: x['data'], reverse=True)
     
-    return render_template(
-        'gestao_carregamento.html',
+    return dict(
         carregamentos_futuros=carregamentos_futuros,
         carregamentos_passados=carregamentos_passados,
         hoje=hoje
@@ -1964,7 +3671,7 @@ def exportar_carregamento():
         return redirect(url_for('gestao_carregamento'))
     
     # Construir a consulta base
-    query = Employee.query.filter(Employee.operation_ready == 'Sim')
+    query = Employee.query.filter(Employee.is_operation_ready)
     
     # Filtrar por data ou IDs
     if data:
@@ -2031,19 +3738,18 @@ def apresentacao_duplado():
     # Determinar a marca do usuário (se autenticado) para filtrar dados
     brand = getattr(current_user, 'brand', None) if current_user and hasattr(current_user, 'is_authenticated') and current_user.is_authenticated else None
 
+    contexto = result_cache.obter(brand, 'apresentacao_duplado', {}, lambda: _contexto_apresentacao_duplado(brand))
+    return render_template('apresentacao_duplado.html', **contexto)
+
+def _contexto_apresentacao_duplado(brand):
+    """Calcula os dados da apresentação de duplado (sem depender da requisição)"""
     colaboradores_q = Employee.query.filter(
         Employee.double_start.isnot(None),
-        db.or_(
-            db.func.lower(Employee.operation_ready).like('sim%'),
-            db.func.lower(Employee.operation_ready) == 's',
-            db.func.lower(Employee.operation_ready) == '1',
-            db.func.lower(Employee.operation_ready) == 'y',
-            db.func.lower(Employee.operation_ready) == 'yes'
-        )
+        Employee.is_operation_ready
     )
     if brand:
         colaboradores_q = colaboradores_q.filter(Employee.brand == brand)
-    colaboradores = colaboradores_q.order_by(Employee.double_start).all()
+    colaboradores = colaboradores_q.with_entities(*Employee.__table__.columns).order_by(Employee.double_start).all()
     
     # Organizar por data de início do duplado
     duplados = {}
@@ -2066,8 +3772,7 @@ def apresentacao_duplado():
     duplados_futuros.sort(key=lambda x: x['data'])
     duplados_passados.sort(key=lambda x: x['data'], reverse=True)
     
-    return render_template(
-        'apresentacao_duplado.html',
+    return dict(
         duplados_futuros=duplados_futuros,
         duplados_passados=duplados_passados,
         hoje=hoje
@@ -2089,13 +3794,7 @@ def exportar_duplado():
     # Construir a consulta base (aplicar mesmo filtro de 'apto' usado na tela)
     query = Employee.query.filter(
         Employee.double_start.isnot(None),
-        db.or_(
-            db.func.lower(Employee.operation_ready).like('sim%'),
-            db.func.lower(Employee.operation_ready) == 's',
-            db.func.lower(Employee.operation_ready) == '1',
-            db.func.lower(Employee.operation_ready) == 'y',
-            db.func.lower(Employee.operation_ready) == 'yes'
-        )
+        Employee.is_operation_ready
     )
     if brand:
         query = query.filter(Employee.brand == brand)
@@ -2168,6 +3867,67 @@ def set_bind_key(bind):
     for model in [Employee, User, AuditLog]:
         model.__bind_key__ = bind
 
+def list_employees_api_impl(brand):
+    """Página de colaboradores em JSON; com html=1 inclui as linhas já renderizadas da tabela"""
+    try:
+        page_size = int(request.args.get('page_size', INDEX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'page_size inválido'}), 400
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'page_size deve estar entre 1 e {MAX_PAGE_SIZE}'}), 400
+
+    preencher_fases_pendentes(brand)
+    try:
+        employees, next_cursor = pagina_employees(
+            brand, request.args, cursor=request.args.get('cursor'), page_size=page_size
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    resposta = {
+        'items': [emp.to_dict() for emp in employees],
+        'next_cursor': next_cursor,
+        'page_size': page_size
+    }
+    if request.args.get('html') == '1':
+        resposta['html'] = render_template('_employee_rows.html', employees=employees, brand=brand)
+    return jsonify(resposta)
+
+@app.route('/vivo/api/employees')
+@login_required
+def list_employees_api_vivo():
+    return list_employees_api_impl('Vivo')
+
+@app.route('/claro/api/employees')
+@login_required
+def list_employees_api_claro():
+    return list_employees_api_impl('Claro')
+
+def list_employee_facets_impl(brand):
+    """Valores e contagens dos filtros da tabela, em cache pela versão dos dados da marca"""
+    return jsonify(result_cache.obter(brand, 'facetas', {}, lambda: facetas_employees(brand)))
+
+@app.route('/vivo/api/employees/facets')
+@login_required
+def list_employee_facets_vivo():
+    return list_employee_facets_impl('Vivo')
+
+@app.route('/claro/api/employees/facets')
+@login_required
+def list_employee_facets_claro():
+    return list_employee_facets_impl('Claro')
+
+@app.route('/cache/stats')
+@login_required
+def cache_stats():
+    if current_user.access_type != 'admin':
+        return jsonify({'error': 'Acesso negado'}), 403
+    return jsonify(dict(
+        result_cache.estatisticas(),
+        linhas=row_cache.estatisticas(),
+        url_for_brand_nao_resolvidos=dict(url_for_brand_nao_resolvidos)
+    ))
+
 @app.route('/')
 def select_brand():
     return render_template('select_brand.html')
@@ -2175,16 +3935,16 @@ def select_brand():
 @app.route('/vivo/')
 @login_required
 def index_vivo():
-    employees = Employee.query.filter_by(brand='Vivo').all()
-    employees.sort(key=cmp_to_key(lambda a, b: safe_date_sort(a, b, 'field_operation_date')), reverse=True)
-    return render_template('index.html', employees=employees, brand='Vivo')
+    preencher_fases_pendentes('Vivo')
+    employees, next_cursor = pagina_employees('Vivo')
+    return render_template('index.html', employees=employees, brand='Vivo', next_cursor=next_cursor)
 
 @app.route('/claro/')
 @login_required
 def index_claro():
-    employees = Employee.query.filter_by(brand='Claro').all()
-    employees.sort(key=cmp_to_key(lambda a, b: safe_date_sort(a, b, 'field_operation_date')), reverse=True)
-    return render_template('index.html', employees=employees, brand='Claro')
+    preencher_fases_pendentes('Claro')
+    employees, next_cursor = pagina_employees('Claro')
+    return render_template('index.html', employees=employees, brand='Claro', next_cursor=next_cursor)
 
 @app.route('/vivo/login', methods=['GET', 'POST'])
 def login_vivo():
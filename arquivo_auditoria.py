@@ -0,0 +1,87 @@
+"""
+Retenção do log de auditoria: arquiva e apaga da tabela os registros mais antigos
+que a política da marca (AUDIT_RETENTION_MONTHS / AUDIT_RETENTION_MONTHS_<MARCA>)
+e consulta os arquivos gerados. Agende o arquivamento mensalmente, por exemplo:
+
+    30 1 1 * * cd /app && python arquivo_auditoria.py arquivar
+
+    python arquivo_auditoria.py arquivar Vivo --meses 6
+    python arquivo_auditoria.py listar
+    python arquivo_auditoria.py consultar Vivo --inicio 2024-01-01 --fim 2024-03-31 --matricula 12345
+    python arquivo_auditoria.py consultar Claro --campo team --formato csv > alteracoes.csv
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+from datetime import datetime
+from app import (app, MARCAS, AUDIT_ARCHIVE_DIR, AUDIT_ARCHIVE_SEM_MARCA, AUDIT_COLUNAS,
+                 arquivar_auditoria, consultar_arquivo_auditoria, retencao_auditoria)
+
+def data(texto):
+    return datetime.strptime(texto, '%Y-%m-%d').date()
+
+def marca(texto):
+    return None if texto == AUDIT_ARCHIVE_SEM_MARCA else texto
+
+def arquivar(args):
+    marcas = [marca(m) for m in args.marcas] if args.marcas else list(MARCAS) + [None]
+    with app.app_context():
+        for m in marcas:
+            meses = args.meses if args.meses is not None else retencao_auditoria(m)
+            total = arquivar_auditoria(m, meses=meses)
+            print(f"{m or AUDIT_ARCHIVE_SEM_MARCA}: {total} registro(s) arquivado(s) (retenção de {meses} meses)")
+
+def listar(args):
+    if not os.path.isdir(AUDIT_ARCHIVE_DIR):
+        print("Nenhum arquivo de auditoria")
+        return
+    for pasta in sorted(os.listdir(AUDIT_ARCHIVE_DIR)):
+        caminho = os.path.join(AUDIT_ARCHIVE_DIR, pasta)
+        for nome in sorted(os.listdir(caminho)):
+            # Um lote pode ter sido arquivado duas vezes (queda entre a gravação e a exclusão):
+            # conta ids distintos, como consultar_arquivo_auditoria
+            with gzip.open(os.path.join(caminho, nome), 'rt', encoding='utf-8') as arquivo:
+                ids = {json.loads(texto)['id'] for texto in arquivo}
+            print(f"{pasta}/{nome}: {len(ids)} registro(s)")
+
+def consultar(args):
+    linhas = consultar_arquivo_auditoria(
+        marca(args.marca), inicio=args.inicio, fim=args.fim, registration=args.matricula, field=args.campo
+    )
+    if args.formato == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=['id', *AUDIT_COLUNAS], extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(linhas)
+    else:
+        for linha in linhas:
+            print(json.dumps(linha, ensure_ascii=False))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Arquivamento e consulta do log de auditoria')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p = comandos.add_parser('arquivar', help='arquiva e apaga os registros fora da retenção')
+    p.add_argument('marcas', nargs='*', help=f'marcas (padrão: todas e {AUDIT_ARCHIVE_SEM_MARCA})')
+    p.add_argument('--meses', type=int, help='sobrepõe a retenção configurada')
+    p.set_defaults(func=arquivar)
+
+    p = comandos.add_parser('listar', help='lista os arquivos mensais e quantos registros têm')
+    p.set_defaults(func=listar)
+
+    p = comandos.add_parser('consultar', help='consulta registros arquivados')
+    p.add_argument('marca', help=f'Vivo, Claro ou {AUDIT_ARCHIVE_SEM_MARCA}')
+    p.add_argument('--inicio', type=data, help='data inicial (AAAA-MM-DD)')
+    p.add_argument('--fim', type=data, help='data final, inclusiva (AAAA-MM-DD)')
+    p.add_argument('--matricula')
+    p.add_argument('--campo')
+    p.add_argument('--formato', choices=('jsonl', 'csv'), default='jsonl')
+    p.set_defaults(func=consultar)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
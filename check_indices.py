@@ -0,0 +1,102 @@
+"""
+Verifica se as consultas das rotas principais usam índices.
+
+Executa cada rota com o cliente de teste do Flask (autenticado como o primeiro
+administrador), captura os SELECTs emitidos, roda EXPLAIN em cada um e lista os
+que fazem varredura completa de tabela. Sai com código 1 se encontrar alguma.
+
+    python check_indices.py              # rotas padrão
+    python check_indices.py /vivo/ ...   # apenas as rotas informadas
+
+No Postgres o EXPLAIN roda com enable_seqscan desligado: se ainda assim aparecer
+um Seq Scan, não existe índice utilizável (em tabelas pequenas o planejador
+prefere o Seq Scan mesmo com índice).
+"""
+import sys
+from sqlalchemy import event
+from app import app, db, User, result_cache
+
+ROTAS = (
+    '/vivo/',
+    '/claro/',
+    '/vivo/api/employees',
+    '/relatorio/gerentes',
+    '/dashboard_fases',
+    '/dashboard_fases?apto_operacao=sim',
+    '/gestao_carregamento',
+    '/apresentacao_duplado',
+    '/audit_log',
+)
+
+# Tabelas de poucas linhas em que a varredura completa é esperada
+TABELAS_PEQUENAS = ('data_version', 'user')
+
+def capturar_consultas(cliente, rota):
+    """Executa a rota e devolve os SELECTs (sql, parâmetros) emitidos por ela"""
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            consultas.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        # Sem cache, para que as consultas realmente cheguem ao banco
+        result_cache.limpar()
+        resposta = cliente.get(rota)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    return resposta.status_code, consultas
+
+def varreduras_completas(conn, statement, parameters):
+    """Roda EXPLAIN na consulta e devolve as linhas do plano com varredura completa"""
+    if conn.dialect.name == 'postgresql':
+        plano = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+        linhas = [linha[0] for linha in plano]
+        return [
+            linha.strip() for linha in linhas
+            if 'Seq Scan' in linha and not any(f' on {t} ' in linha + ' ' for t in TABELAS_PEQUENAS)
+        ]
+
+    plano = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    linhas = [linha[-1] for linha in plano]
+    return [
+        linha for linha in linhas
+        if linha.startswith('SCAN ') and 'USING' not in linha
+        and linha.split()[1] not in TABELAS_PEQUENAS and 'CONSTANT ROW' not in linha
+    ]
+
+def verificar(rotas):
+    problemas = 0
+    with app.app_context():
+        admin = User.query.filter_by(access_type='admin').first()
+        if admin is None:
+            print("Nenhum usuário administrador encontrado")
+            return 1
+
+        cliente = app.test_client()
+        with cliente.session_transaction() as sessao:
+            sessao['_user_id'] = str(admin.id)
+            sessao['_fresh'] = True
+
+        for rota in rotas:
+            status, consultas = capturar_consultas(cliente, rota)
+            print(f"{rota} (HTTP {status}, {len(consultas)} consulta(s))")
+            vistas = set()
+            with db.engine.connect() as conn:
+                if conn.dialect.name == 'postgresql':
+                    conn.exec_driver_sql('SET enable_seqscan = off')
+                for statement, parameters in consultas:
+                    if statement in vistas:
+                        continue
+                    vistas.add(statement)
+                    for linha in varreduras_completas(conn, statement, parameters):
+                        problemas += 1
+                        print(f"  VARREDURA COMPLETA: {linha}")
+                        print(f"    {' '.join(statement.split())[:300]}")
+
+    print(f"\n{problemas} varredura(s) completa(s) encontrada(s)")
+    return 1 if problemas else 0
+
+if __name__ == "__main__":
+    sys.exit(verificar(sys.argv[1:] or ROTAS))
@@ -29,6 +29,7 @@ CREATE TABLE IF NOT EXISTS employees (
     instructor VARCHAR(100),
     contato VARCHAR(20),
     operation_ready VARCHAR(10),
+    is_operation_ready BOOLEAN NOT NULL DEFAULT false,
     integration_start DATE,
     integration_end DATE,
     normative_start DATE,
@@ -40,6 +41,9 @@ CREATE TABLE IF NOT EXISTS employees (
     loading_date DATE,
     field_operation_date DATE,
     last_updated TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+    current_phase VARCHAR(30),
+    phase_computed_on DATE,
+    import_fingerprint VARCHAR(32),
     CONSTRAINT uq_registration_brand UNIQUE (registration, brand)
 );
 
@@ -51,9 +55,58 @@ CREATE TABLE IF NOT EXISTS audit_log (
     new_value VARCHAR(500),
     changed_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
     changed_by VARCHAR(80) NOT NULL,
-    change_source VARCHAR(20) NOT NULL
+    change_source VARCHAR(20) NOT NULL,
+    brand VARCHAR(20)
+);
+
+-- Versão dos dados por marca (invalidação do cache de relatórios/dashboards)
+CREATE TABLE IF NOT EXISTS data_version (
+    brand VARCHAR(20) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO data_version (brand, version) VALUES ('Vivo', 0), ('Claro', 0)
+ON CONFLICT (brand) DO NOTHING;
+
+-- Importações de planilha executadas em segundo plano
+CREATE TABLE IF NOT EXISTS upload_job (
+    id VARCHAR(32) PRIMARY KEY,
+    brand VARCHAR(20) NOT NULL,
+    filename VARCHAR(255),
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    created_by VARCHAR(80) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    created INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    error_details TEXT,
+    message VARCHAR(500),
+    diff TEXT,
+    base_version INTEGER,
+    file_hash VARCHAR(64),
+    data_version INTEGER
 );
 
 CREATE INDEX IF NOT EXISTS idx_audit_registration ON audit_log (registration);
+CREATE INDEX IF NOT EXISTS ix_employee_current_phase ON employees (current_phase);
+CREATE INDEX IF NOT EXISTS ix_employee_is_operation_ready ON employees (is_operation_ready);
+CREATE INDEX IF NOT EXISTS ix_employee_brand_field_operation_date ON employees (brand, field_operation_date DESC NULLS LAST, id);
+CREATE INDEX IF NOT EXISTS ix_employee_brand_manager_type_fod ON employees (brand, corporate_manager, employee_type, field_operation_date);
+CREATE INDEX IF NOT EXISTS ix_employee_brand_employee_type ON employees (brand, employee_type);
+CREATE INDEX IF NOT EXISTS ix_employee_brand_loading_date_ready ON employees (brand, loading_date) WHERE is_operation_ready AND loading_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_employee_brand_double_start ON employees (brand, double_start) WHERE double_start IS NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_employee_brand_last_updated ON employees (brand, last_updated);
+CREATE INDEX IF NOT EXISTS ix_employee_brand_phase_computed_on ON employees (brand, phase_computed_on);
+CREATE INDEX IF NOT EXISTS ix_audit_log_changed_at ON audit_log (changed_at);
+CREATE INDEX IF NOT EXISTS ix_audit_log_field_changed ON audit_log (field_changed);
+CREATE INDEX IF NOT EXISTS ix_audit_log_brand_changed_at ON audit_log (brand, changed_at);
+CREATE INDEX IF NOT EXISTS ix_audit_log_brand_registration_changed_at ON audit_log (brand, registration, changed_at);
+CREATE INDEX IF NOT EXISTS ix_audit_log_brand_field_changed ON audit_log (brand, field_changed);
+CREATE INDEX IF NOT EXISTS ix_upload_job_brand_file_hash ON upload_job (brand, file_hash);
 
 -- End of schema
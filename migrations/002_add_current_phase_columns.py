@@ -0,0 +1,26 @@
+"""
+Migration script to add the persisted current_phase / phase_computed_on columns
+to the employee table and backfill them
+"""
+from sqlalchemy import text
+from app import db, atualizar_fases_vencidas
+
+def upgrade():
+    inspector = db.inspect(db.engine)
+    columns = [column['name'] for column in inspector.get_columns('employee')]
+
+    if 'current_phase' not in columns:
+        db.session.execute(text('ALTER TABLE employee ADD COLUMN current_phase VARCHAR(30)'))
+    if 'phase_computed_on' not in columns:
+        db.session.execute(text('ALTER TABLE employee ADD COLUMN phase_computed_on DATE'))
+    db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_employee_current_phase ON employee (current_phase)'))
+    db.session.commit()
+
+    # A tabela data_version só é criada pela migração 003; ainda não há cache a invalidar
+    total = atualizar_fases_vencidas(invalidar_cache=False)
+    print(f"Current phase columns created successfully ({total} employees backfilled)")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
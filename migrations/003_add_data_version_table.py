@@ -0,0 +1,18 @@
+"""
+Migration script to add the data_version table used to invalidate the
+result cache of reports and dashboards
+"""
+from app import db, DataVersion, MARCAS
+
+def upgrade():
+    DataVersion.__table__.create(db.engine, checkfirst=True)
+    for marca in MARCAS:
+        if not db.session.get(DataVersion, marca):
+            db.session.add(DataVersion(brand=marca, version=0))
+    db.session.commit()
+    print("Data version table created successfully")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
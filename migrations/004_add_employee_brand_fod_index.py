@@ -0,0 +1,25 @@
+"""
+Migration script to add the (brand, field_operation_date) index that backs
+the employee list ordering (field_operation_date DESC NULLS LAST, id)
+"""
+from sqlalchemy import text
+from app import db
+
+def upgrade():
+    # Mesmas colunas do índice declarado no modelo Employee (db.create_all)
+    if db.engine.dialect.name == 'postgresql':
+        # No Postgres o índice precisa da mesma ordenação da consulta para evitar o sort
+        colunas = 'brand, field_operation_date DESC NULLS LAST, id'
+    else:
+        # No SQLite NULL já é o menor valor, então DESC coloca os vazios no fim
+        colunas = 'brand, field_operation_date DESC, id'
+    db.session.execute(text(
+        f'CREATE INDEX IF NOT EXISTS ix_employee_brand_field_operation_date ON employee ({colunas})'
+    ))
+    db.session.commit()
+    print("Employee (brand, field_operation_date) index created successfully")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,36 @@
+"""
+Migration script to add the composite/partial indexes used by the listing,
+reports and audit log queries (see check_indices.py)
+"""
+from app import db, Employee, AuditLog
+
+INDICES = (
+    'ix_employee_brand_manager_type_fod',
+    'ix_employee_brand_employee_type',
+    'ix_employee_brand_loading_date_ready',
+    'ix_employee_brand_double_start',
+    'ix_employee_brand_last_updated',
+    'ix_employee_brand_phase_computed_on',
+    'ix_audit_log_changed_at',
+    'ix_audit_log_field_changed',
+)
+
+def upgrade():
+    por_nome = {
+        index.name: index
+        for index in list(Employee.__table__.indexes) + list(AuditLog.__table__.indexes)
+    }
+    columns = [column['name'] for column in db.inspect(db.engine).get_columns('employee')]
+    for nome in INDICES:
+        if nome == 'ix_employee_brand_loading_date_ready' and 'is_operation_ready' not in columns:
+            # O predicado usa is_operation_ready; a migração 006 cria este índice
+            continue
+        # checkfirst evita erro em bancos onde o índice já existe
+        por_nome[nome].create(db.engine, checkfirst=True)
+        print(f"Index {nome} ok")
+    print("Query indexes created successfully")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,45 @@
+"""
+Migration script to add the canonical is_operation_ready boolean to the
+employee table, backfill it from operation_ready and rebuild the indexes
+that depend on it
+"""
+from sqlalchemy import text
+from app import db, Employee, operacao_pronta
+
+def upgrade():
+    inspector = db.inspect(db.engine)
+    columns = [column['name'] for column in inspector.get_columns('employee')]
+
+    if 'is_operation_ready' not in columns:
+        falso = 'false' if db.engine.dialect.name == 'postgresql' else '0'
+        db.session.execute(text(
+            f'ALTER TABLE employee ADD COLUMN is_operation_ready BOOLEAN NOT NULL DEFAULT {falso}'
+        ))
+
+    # Poucos valores distintos: normaliza cada um uma vez e atualiza em bloco
+    valores = [v for (v,) in db.session.query(Employee.operation_ready).distinct() if v is not None]
+    aptos = [v for v in valores if operacao_pronta(v)]
+    tabela = Employee.__table__
+    db.session.execute(tabela.update().values(is_operation_ready=False, last_updated=tabela.c.last_updated))
+    if aptos:
+        db.session.execute(
+            tabela.update()
+            .where(tabela.c.operation_ready.in_(aptos))
+            .values(is_operation_ready=True, last_updated=tabela.c.last_updated)
+        )
+    db.session.commit()
+
+    # O índice parcial de carregamento passou a usar o booleano
+    db.session.execute(text('DROP INDEX IF EXISTS ix_employee_brand_loading_date_ready'))
+    db.session.commit()
+    for index in Employee.__table__.indexes:
+        if index.name in ('ix_employee_is_operation_ready', 'ix_employee_brand_loading_date_ready'):
+            index.create(db.engine, checkfirst=True)
+
+    total = db.session.query(db.func.count(Employee.id)).filter(Employee.is_operation_ready).scalar()
+    print(f"is_operation_ready column created successfully ({total} employees ready)")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,14 @@
+"""
+Migration script to add the upload_job table used by the background
+spreadsheet import
+"""
+from app import db, UploadJob
+
+def upgrade():
+    UploadJob.__table__.create(db.engine, checkfirst=True)
+    print("Upload job table created successfully")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,22 @@
+"""
+Migration script to add the dry-run preview columns (diff, base_version)
+to the upload_job table
+"""
+from sqlalchemy import text
+from app import db
+
+def upgrade():
+    inspector = db.inspect(db.engine)
+    columns = [column['name'] for column in inspector.get_columns('upload_job')]
+
+    if 'diff' not in columns:
+        db.session.execute(text('ALTER TABLE upload_job ADD COLUMN diff TEXT'))
+    if 'base_version' not in columns:
+        db.session.execute(text('ALTER TABLE upload_job ADD COLUMN base_version INTEGER'))
+    db.session.commit()
+    print("Upload job preview columns created successfully")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
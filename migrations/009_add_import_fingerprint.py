@@ -0,0 +1,53 @@
+"""
+Migration script to add the import_fingerprint hash to the employee table
+(backfilled in chunks) and the file_hash/data_version columns to upload_job,
+used by the upload to skip unchanged rows and identical re-uploads
+"""
+from sqlalchemy import text
+from app import db, Employee, UploadJob, UPLOAD_CAMPOS, impressao_digital
+
+LOTE = 1000
+
+def upgrade():
+    inspector = db.inspect(db.engine)
+    columns = [column['name'] for column in inspector.get_columns('employee')]
+    if 'import_fingerprint' not in columns:
+        db.session.execute(text('ALTER TABLE employee ADD COLUMN import_fingerprint VARCHAR(32)'))
+
+    columns = [column['name'] for column in inspector.get_columns('upload_job')]
+    if 'file_hash' not in columns:
+        db.session.execute(text('ALTER TABLE upload_job ADD COLUMN file_hash VARCHAR(64)'))
+    if 'data_version' not in columns:
+        db.session.execute(text('ALTER TABLE upload_job ADD COLUMN data_version INTEGER'))
+    db.session.commit()
+    for index in UploadJob.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+    # Backfill em lotes por id, sem alterar last_updated
+    tabela = Employee.__table__
+    stmt = tabela.update().where(tabela.c.id == db.bindparam('_id')).values(
+        import_fingerprint=db.bindparam('_fingerprint'), last_updated=tabela.c.last_updated
+    )
+    ultimo_id, total = 0, 0
+    while True:
+        linhas = db.session.execute(
+            db.select(tabela.c.id, *[tabela.c[campo] for campo in UPLOAD_CAMPOS])
+            .where(tabela.c.id > ultimo_id)
+            .order_by(tabela.c.id)
+            .limit(LOTE)
+        ).all()
+        if not linhas:
+            break
+        db.session.execute(stmt, [
+            {'_id': linha[0], '_fingerprint': impressao_digital(linha[1:])} for linha in linhas
+        ])
+        db.session.commit()
+        ultimo_id = linhas[-1][0]
+        total += len(linhas)
+
+    print(f"import_fingerprint column created successfully ({total} employees hashed)")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,69 @@
+"""
+Migration script to add the brand column and the composite brand indexes to
+the audit_log table, backfilling existing rows in small batches
+"""
+from sqlalchemy import text
+from app import db, AuditLog, Employee, User
+
+LOTE = 1000
+
+def marcas_por(coluna_chave, valores):
+    """Mapa valor -> conjunto de marcas para as linhas com coluna_chave em valores"""
+    tabela = coluna_chave.table
+    marcas = {}
+    for valor, marca in db.session.execute(
+        db.select(coluna_chave, tabela.c.brand).where(coluna_chave.in_(valores)).distinct()
+    ):
+        marcas.setdefault(valor, set()).add(marca)
+    return marcas
+
+def upgrade():
+    inspector = db.inspect(db.engine)
+    columns = [column['name'] for column in inspector.get_columns('audit_log')]
+    if 'brand' not in columns:
+        db.session.execute(text('ALTER TABLE audit_log ADD COLUMN brand VARCHAR(20)'))
+        db.session.commit()
+
+    # Backfill em lotes por id, cada lote na sua transação, para não travar as escritas.
+    # A marca vem da matrícula; se ela existir nas duas marcas (ou não existir mais),
+    # usa a marca do usuário que fez a alteração, quando ela é única.
+    tabela = AuditLog.__table__
+    stmt = tabela.update().where(tabela.c.id == db.bindparam('_id')).values(brand=db.bindparam('_brand'))
+    ultimo_id, preenchidos, sem_marca = 0, 0, 0
+    while True:
+        linhas = db.session.execute(
+            db.select(tabela.c.id, tabela.c.registration, tabela.c.changed_by)
+            .where(tabela.c.id > ultimo_id, tabela.c.brand.is_(None))
+            .order_by(tabela.c.id)
+            .limit(LOTE)
+        ).all()
+        if not linhas:
+            break
+        por_matricula = marcas_por(Employee.__table__.c.registration, {linha[1] for linha in linhas})
+        por_usuario = marcas_por(User.__table__.c.username, {linha[2] for linha in linhas})
+
+        valores = []
+        for log_id, registration, changed_by in linhas:
+            marcas = por_matricula.get(registration, set())
+            if len(marcas) != 1:
+                marcas = por_usuario.get(changed_by, set()) & (marcas or {'Vivo', 'Claro'})
+            if len(marcas) == 1:
+                valores.append({'_id': log_id, '_brand': next(iter(marcas))})
+            else:
+                sem_marca += 1
+        if valores:
+            db.session.execute(stmt, valores)
+        db.session.commit()
+        preenchidos += len(valores)
+        ultimo_id = linhas[-1][0]
+
+    for index in tabela.indexes:
+        index.create(db.engine, checkfirst=True)
+
+    print(f"Audit log brand column created successfully ({preenchidos} rows backfilled, "
+          f"{sem_marca} without an unambiguous brand)")
+
+if __name__ == "__main__":
+    from app import app
+    with app.app_context():
+        upgrade()
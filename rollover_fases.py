@@ -0,0 +1,18 @@
+"""
+Job diário de virada de data: reclassifica todos os colaboradores e grava a
+fase persistida (current_phase) apenas de quem mudou de fase. As rotas de
+leitura só calculam a fase de quem ainda não tem uma. Agende para rodar logo
+após a meia-noite, por exemplo:
+
+    5 0 * * * cd /app && python rollover_fases.py
+"""
+import sys
+from app import app, atualizar_fases_vencidas
+
+def rollover(brand=None):
+    with app.app_context():
+        total = atualizar_fases_vencidas(brand)
+        print(f"Fases recalculadas: {total} colaborador(es)")
+
+if __name__ == "__main__":
+    rollover(sys.argv[1] if len(sys.argv) > 1 else None)
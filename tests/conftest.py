@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+# O app configura o banco ao ser importado: os testes usam um SQLite descartável
+_pasta_banco = tempfile.mkdtemp(prefix='sistema-consulta-testes-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_pasta_banco, 'employees.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as sistema  # noqa: E402
+
+
+@pytest.fixture
+def banco():
+    """Contexto do app com as tabelas recriadas e os caches limpos; retorna o módulo app"""
+    with sistema.app.app_context():
+        sistema.db.drop_all()
+        sistema.db.create_all()
+        sistema.result_cache.limpar()
+        sistema._fases_verificadas_em.clear()
+        yield sistema
+        sistema.db.session.remove()
+
+
+@pytest.fixture
+def cliente(banco):
+    """Cliente de teste autenticado como administrador da Vivo"""
+    banco.db.session.add(banco.User(username='admin', password=generate_password_hash('senha'), name='Admin',
+                                    access_type='admin', brand='Vivo'))
+    banco.db.session.commit()
+    cliente = banco.app.test_client()
+    cliente.post('/vivo/login', data={'username': 'admin', 'password': 'senha'})
+    return cliente
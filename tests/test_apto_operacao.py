@@ -0,0 +1,81 @@
+import importlib.util
+import os
+
+import pytest
+
+VALORES = {
+    'Sim': True, 'SIM': True, 'sim ': True, 'S': True, 'Yes': True, 'sim ok': True, 'Sin': True,
+    'Não': False, 'nao': False, 'N': False, '0': False, '1': False, '': False, None: False, 'Talvez': False,
+}
+
+
+def _criar_employees(banco):
+    for i, valor in enumerate(VALORES):
+        banco.db.session.add(banco.Employee(registration=f'{i:03d}', brand='Vivo', full_name=f'Colaborador {i}',
+                                            operation_ready=valor))
+    banco.db.session.commit()
+
+
+def _aptos(banco):
+    banco.db.session.expire_all()
+    return {e.operation_ready: e.is_operation_ready for e in banco.Employee.query}
+
+
+def test_orm_deriva_is_operation_ready(banco):
+    _criar_employees(banco)
+
+    assert _aptos(banco) == VALORES
+
+
+def test_alterar_operation_ready_atualiza_o_booleano(banco):
+    _criar_employees(banco)
+    employee = banco.Employee.query.filter_by(operation_ready='Não').one()
+
+    employee.operation_ready = 'Sim'
+    banco.db.session.commit()
+    assert banco.db.session.get(banco.Employee, employee.id).is_operation_ready is True
+
+    employee.operation_ready = 'nao'
+    banco.db.session.commit()
+    assert banco.db.session.get(banco.Employee, employee.id).is_operation_ready is False
+
+
+def test_upload_deriva_igual_ao_orm(banco):
+    posicao = dict(banco.UPLOAD_CAMPOS_TEXTO)['operation_ready']
+    linhas = []
+    for i, valor in enumerate(VALORES):
+        linha = [None] * banco.UPLOAD_TOTAL_COLUNAS
+        linha[0], linha[1], linha[posicao] = f'{i:03d}', f'Colaborador {i}', valor
+        linhas.append(linha)
+
+    banco.importar_employees(banco._bloco_planilha(linhas, 0), 'Vivo', 'admin')
+    banco.db.session.commit()
+
+    # A planilha normaliza o texto (sem espaços nas pontas, vazio para células em branco)
+    esperado = {(valor or '').strip(): apto for valor, apto in VALORES.items()}
+    assert {(valor or '').strip(): apto for valor, apto in _aptos(banco).items()} == esperado
+
+
+@pytest.fixture
+def migracao_006():
+    caminho = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'migrations', '006_add_is_operation_ready.py')
+    spec = importlib.util.spec_from_file_location('migracao_006', caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def test_migracao_preenche_o_booleano(banco, migracao_006):
+    _criar_employees(banco)
+    tabela = banco.Employee.__table__
+    ultima = {e.id: e.last_updated for e in banco.Employee.query}
+    # Booleano invertido, como se tivesse sido gravado antes da regra
+    banco.db.session.execute(tabela.update().values(is_operation_ready=~tabela.c.is_operation_ready,
+                                                    last_updated=tabela.c.last_updated))
+    banco.db.session.commit()
+
+    migracao_006.upgrade()
+
+    assert _aptos(banco) == VALORES
+    assert {e.id: e.last_updated for e in banco.Employee.query} == ultima
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _criar_logs(banco, total=17, inicio=datetime(2024, 5, 1, 8, 0)):
+    """Registros da Vivo com horários repetidos (empates resolvidos pelo id) e alguns da Claro"""
+    for i in range(total):
+        banco.db.session.add(banco.AuditLog(
+            registration=f'{i % 5:03d}', field_changed='team' if i % 2 else 'status',
+            old_value='antes', new_value='depois', changed_at=inicio + timedelta(hours=i // 3),
+            changed_by='admin', change_source='upload' if i % 3 else 'system', brand='Vivo'
+        ))
+    for i in range(3):
+        banco.db.session.add(banco.AuditLog(
+            registration='900', field_changed='team', changed_at=inicio + timedelta(hours=i),
+            changed_by='admin', change_source='system', brand='Claro'
+        ))
+    banco.db.session.commit()
+
+
+def _ordem_esperada(banco, filtro=lambda log: True):
+    logs = [log for log in banco.AuditLog.query.filter_by(brand='Vivo') if filtro(log)]
+    logs.sort(key=lambda log: (log.changed_at, log.id), reverse=True)
+    return [log.id for log in logs]
+
+
+def _todas_as_paginas(banco, args, page_size):
+    ids, cursor = [], None
+    while True:
+        logs, cursor = banco.pagina_auditoria('Vivo', args, cursor=cursor, page_size=page_size)
+        ids.extend(log.id for log in logs)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('page_size', [1, 2, 3, 5, 17, 40])
+def test_cursor_percorre_o_log_sem_repetir(banco, page_size):
+    _criar_logs(banco)
+
+    assert _todas_as_paginas(banco, {}, page_size) == _ordem_esperada(banco)
+
+
+def test_cursor_mantem_os_filtros(banco):
+    _criar_logs(banco)
+    args = {'field': 'team', 'source': 'upload', 'start_date': '2024-05-01', 'end_date': '2024-05-01'}
+
+    ids = _todas_as_paginas(banco, args, page_size=2)
+
+    assert ids == _ordem_esperada(banco, lambda log: log.field_changed == 'team' and log.change_source == 'upload')
+    assert ids
+
+
+def test_cursor_invalido(banco):
+    with pytest.raises(ValueError):
+        banco.pagina_auditoria('Vivo', {}, cursor='nao-e-um-cursor')
+
+
+def test_rota_pagina_o_log_da_marca(banco, cliente):
+    _criar_logs(banco)
+    pagina = cliente.get('/audit_log')
+    assert pagina.status_code == 200
+    assert '900' not in pagina.get_data(as_text=True)
+    assert cliente.get('/audit_log?cursor=%%%').status_code == 400
+
+
+def test_arquivar_apaga_e_consulta_o_arquivo(banco, monkeypatch, tmp_path):
+    monkeypatch.setattr(banco, 'AUDIT_ARCHIVE_DIR', str(tmp_path))
+    _criar_logs(banco, total=6, inicio=datetime(2024, 1, 31, 23, 0))     # janeiro e fevereiro
+    _criar_logs(banco, total=3, inicio=datetime(2024, 5, 10, 9, 0))      # dentro da retenção
+    antigos = banco.AuditLog.query.filter(banco.AuditLog.brand == 'Vivo', banco.AuditLog.changed_at < datetime(2024, 3, 1))
+    antigos = {log.id: (log.changed_at.isoformat(), log.registration, log.field_changed, log.new_value)
+               for log in antigos}
+    versoes = banco.versoes_dados('Vivo', (None, banco.VERSAO_AUDITORIA))
+
+    # Retenção de 3 meses em 15/06: ficam de março em diante; lotes pequenos para cruzar meses
+    total = banco.arquivar_auditoria('Vivo', meses=3, today=datetime(2024, 6, 15).date(), lote=4)
+
+    assert total == len(antigos) == 6
+    # Uma única invalidação, só das telas do log: os colaboradores não mudaram
+    assert banco.versoes_dados('Vivo', (None, banco.VERSAO_AUDITORIA)) == (versoes[0], versoes[1] + 1)
+    assert banco.AuditLog.query.filter(banco.AuditLog.id.in_(antigos)).count() == 0
+    assert banco.AuditLog.query.filter_by(brand='Vivo').count() == 3
+    assert banco.AuditLog.query.filter_by(brand='Claro').count() == 6
+    assert sorted(p.name for p in (tmp_path / 'Vivo').iterdir()) == ['2024-01.jsonl.gz', '2024-02.jsonl.gz']
+
+    arquivados = {linha['id']: linha for linha in banco.consultar_arquivo_auditoria('Vivo')}
+    assert arquivados.keys() == antigos.keys()
+    for id, linha in arquivados.items():
+        assert (linha['changed_at'], linha['registration'], linha['field_changed'], linha['new_value']) == antigos[id]
+
+    fevereiro = list(banco.consultar_arquivo_auditoria(
+        'Vivo', inicio=datetime(2024, 2, 1).date(), fim=datetime(2024, 2, 29).date()))
+    assert {linha['id'] for linha in fevereiro} == {
+        id for id, log in antigos.items() if log[0] >= '2024-02-01'}
+    assert fevereiro
+
+    # Uma segunda execução não tem mais nada a arquivar nem a invalidar
+    assert banco.arquivar_auditoria('Vivo', meses=3, today=datetime(2024, 6, 15).date()) == 0
+    assert banco.versoes_dados('Vivo', (None, banco.VERSAO_AUDITORIA)) == (versoes[0], versoes[1] + 1)
+
+
+def test_arquivar_invalida_so_o_cache_do_log(banco, monkeypatch, tmp_path):
+    monkeypatch.setattr(banco, 'AUDIT_ARCHIVE_DIR', str(tmp_path))
+    _criar_logs(banco, total=3, inicio=datetime(2024, 1, 10, 8, 0))
+    chamadas = []
+
+    def obter(rota, escopo=None):
+        return banco.result_cache.obter('Vivo', rota, {}, lambda: chamadas.append(rota) or len(chamadas),
+                                        escopo=escopo)
+
+    obter('relatorio_gerentes')
+    obter('campos_auditoria', escopo=banco.VERSAO_AUDITORIA)
+
+    banco.arquivar_auditoria('Vivo', meses=3, today=datetime(2024, 6, 15).date())
+    obter('relatorio_gerentes')
+    obter('campos_auditoria', escopo=banco.VERSAO_AUDITORIA)
+
+    assert chamadas == ['relatorio_gerentes', 'campos_auditoria', 'campos_auditoria']
+
+
+@pytest.fixture
+def requisicao(banco):
+    """Contexto de requisição anônima: log_change registra as alterações como 'system'"""
+    with banco.app.test_request_context('/'):
+        yield banco
+
+
+def _registros(banco):
+    return [(log.registration, log.field_changed, log.old_value, log.new_value, log.changed_by, log.brand)
+            for log in banco.AuditLog.query.order_by(banco.AuditLog.id)]
+
+
+def test_registro_sem_mudanca_e_none(banco):
+    assert banco.registro_auditoria('001', 'team', 'Turma A', 'Turma A', changed_by='admin') is None
+    assert banco.registro_auditoria('001', 'team', None, '', changed_by='admin') is None
+    assert banco.registro_auditoria('001', 'team', None, 'Turma A', changed_by='admin', brand='Vivo')[:7] == (
+        '001', 'team', '', 'Turma A', 'admin', 'system', 'Vivo')
+
+
+def test_buffer_gravado_no_commit(requisicao):
+    banco = requisicao
+    banco.log_change('001', 'team', 'Turma A', 'Turma B', brand='Vivo')
+    banco.log_change('001', 'status', 'Ativo', 'Ativo', brand='Vivo')
+    banco.log_change('002', 'admission_date', None, datetime(2024, 5, 1), change_source='upload', brand='Claro')
+
+    # Nada é gravado antes do commit
+    assert len(banco.buffer_auditoria()) == 2
+    assert banco.AuditLog.query.count() == 0
+
+    banco.db.session.commit()
+
+    assert banco.buffer_auditoria() == []
+    assert _registros(banco) == [('001', 'team', 'Turma A', 'Turma B', 'system', 'Vivo'),
+                                 ('002', 'admission_date', '', '01/05/2024', 'system', 'Claro')]
+
+
+def test_buffer_em_lotes_de_insert(requisicao):
+    banco = requisicao
+    for i in range(1203):
+        banco.log_change(f'{i:04d}', 'team', 'Turma A', 'Turma B', brand='Vivo')
+
+    banco.db.session.commit()
+
+    assert banco.AuditLog.query.count() == 1203
+
+
+def test_buffer_descartado_no_rollback(requisicao):
+    banco = requisicao
+    banco.log_change('001', 'team', 'Turma A', 'Turma B', brand='Vivo')
+
+    banco.db.session.rollback()
+
+    assert banco.buffer_auditoria() == []
+    # O commit seguinte não grava o que foi desfeito
+    banco.log_change('002', 'team', 'Turma A', 'Turma C', brand='Vivo')
+    banco.db.session.commit()
+    assert _registros(banco) == [('002', 'team', 'Turma A', 'Turma C', 'system', 'Vivo')]
+
+
+def test_buffer_mantido_ao_desfazer_savepoint(requisicao):
+    banco = requisicao
+    banco.log_change('001', 'team', 'Turma A', 'Turma B', brand='Vivo')
+
+    # Desfazer um savepoint não encerra a transação principal
+    with pytest.raises(RuntimeError):
+        with banco.db.session.begin_nested():
+            raise RuntimeError
+    banco.db.session.commit()
+
+    assert _registros(banco) == [('001', 'team', 'Turma A', 'Turma B', 'system', 'Vivo')]
@@ -0,0 +1,57 @@
+def _contador():
+    chamadas = []
+
+    def calcular():
+        chamadas.append(1)
+        return len(chamadas)
+    return calcular, chamadas
+
+
+def test_resultado_em_cache_ate_a_versao_mudar(banco):
+    calcular, chamadas = _contador()
+
+    assert banco.result_cache.obter('Vivo', 'relatorio', {'mes': '6'}, calcular) == 1
+    assert banco.result_cache.obter('Vivo', 'relatorio', {'mes': '6'}, calcular) == 1
+    assert len(chamadas) == 1
+
+    banco.incrementar_versao_dados('Vivo')
+    banco.db.session.commit()
+
+    assert banco.result_cache.obter('Vivo', 'relatorio', {'mes': '6'}, calcular) == 2
+    assert len(chamadas) == 2
+
+
+def test_versao_de_outra_marca_nao_invalida(banco):
+    calcular, chamadas = _contador()
+    banco.result_cache.obter('Vivo', 'relatorio', {}, calcular)
+
+    banco.incrementar_versao_dados('Claro')
+    banco.db.session.commit()
+
+    banco.result_cache.obter('Vivo', 'relatorio', {}, calcular)
+    assert len(chamadas) == 1
+
+
+def test_incremento_sem_marca_invalida_todas(banco):
+    calcular, chamadas = _contador()
+    banco.result_cache.obter('Vivo', 'relatorio', {}, calcular)
+    banco.result_cache.obter('Claro', 'relatorio', {}, calcular)
+
+    banco.incrementar_versao_dados()
+    banco.db.session.commit()
+
+    banco.result_cache.obter('Vivo', 'relatorio', {}, calcular)
+    banco.result_cache.obter('Claro', 'relatorio', {}, calcular)
+    assert len(chamadas) == 4
+    assert banco.versao_dados('Vivo') == banco.versao_dados('Claro') == 1
+
+
+def test_incremento_desfeito_nao_invalida(banco):
+    calcular, chamadas = _contador()
+    banco.result_cache.obter('Vivo', 'relatorio', {}, calcular)
+
+    banco.incrementar_versao_dados('Vivo')
+    banco.db.session.rollback()
+
+    banco.result_cache.obter('Vivo', 'relatorio', {}, calcular)
+    assert len(chamadas) == 1
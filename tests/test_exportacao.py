@@ -0,0 +1,134 @@
+import csv
+import importlib.util
+import io
+from datetime import date, datetime
+
+import openpyxl
+import pytest
+
+
+def _criar_employees(banco, total=7):
+    for i in range(total):
+        banco.db.session.add(banco.Employee(
+            registration=f'{i:03d}', brand='Vivo', full_name=f'Colaborador {i}',
+            team='Turma A' if i % 2 else 'Turma B', status='active' if i % 3 else 'on_leave',
+            course_status='completed' if i % 2 else None, employee_type='Técnico', operation_ready='sim' if i % 2 else 'Não',
+            admission_date=date(2024, 1, i + 1), field_operation_date=date(2024, 5, 20) if i % 3 else None,
+            last_updated=datetime(2024, 6, 1, 12, 30, i)
+        ))
+    banco.db.session.add(banco.Employee(registration='900', brand='Claro', full_name='Outra marca'))
+    banco.db.session.commit()
+
+
+def _esperado(banco, filtro=lambda e: True):
+    """Linhas da exportação montadas a partir do ORM, ordenadas pela matrícula"""
+    linhas = []
+    for employee in banco.Employee.query.filter_by(brand='Vivo').order_by(banco.Employee.registration):
+        if not filtro(employee):
+            continue
+        linha = []
+        for _, coluna, formato in banco.EXPORT_COLUNAS:
+            valor = getattr(employee, coluna)
+            if formato:
+                valor = valor.strftime(formato) if valor else ''
+            elif coluna in banco.EXPORT_TRADUZIDAS:
+                valor = banco.translate_status(valor, coluna)
+            linha.append('' if valor is None else valor)
+        linhas.append(tuple(linha))
+    return linhas
+
+
+def _exportar(cliente, formato, **args):
+    resposta = cliente.get('/vivo/export_employees_excel', query_string=dict(args, format=formato))
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    return resposta
+
+
+@pytest.fixture
+def lote_pequeno(banco, monkeypatch):
+    # Lotes de 3 linhas para a exportação atravessar vários lotes
+    monkeypatch.setattr(banco, 'EXPORT_LOTE', 3)
+
+
+def test_xlsx_tem_o_conteudo_da_consulta(banco, cliente, lote_pequeno):
+    _criar_employees(banco)
+
+    resposta = _exportar(cliente, 'xlsx')
+
+    planilha = openpyxl.load_workbook(io.BytesIO(resposta.data)).active
+    linhas = list(planilha.iter_rows(values_only=True))
+    assert linhas[0] == tuple(cabecalho for cabecalho, _, _ in banco.EXPORT_COLUNAS)
+    corpo = sorted(tuple('' if valor is None else valor for valor in linha) for linha in linhas[1:])
+    assert corpo == _esperado(banco)
+    assert ('Ativo' in corpo[1]) and ('Afastado' in corpo[0]) and ('Concluído' in corpo[1])
+
+
+def test_xlsx_respeita_os_filtros(banco, cliente, lote_pequeno):
+    _criar_employees(banco)
+
+    resposta = _exportar(cliente, 'xlsx', team_in='Turma A')
+
+    linhas = list(openpyxl.load_workbook(io.BytesIO(resposta.data)).active.iter_rows(min_row=2, values_only=True))
+    assert sorted(tuple('' if valor is None else valor for valor in linha) for linha in linhas) == _esperado(
+        banco, lambda e: e.team == 'Turma A')
+
+
+def test_xlsx_sem_colaboradores_tem_so_o_cabecalho(banco, cliente):
+    resposta = _exportar(cliente, 'xlsx')
+
+    linhas = list(openpyxl.load_workbook(io.BytesIO(resposta.data)).active.iter_rows(values_only=True))
+    assert linhas == [tuple(cabecalho for cabecalho, _, _ in banco.EXPORT_COLUNAS)]
+
+
+def test_csv_tem_o_conteudo_da_consulta(banco, cliente, lote_pequeno):
+    _criar_employees(banco)
+
+    resposta = _exportar(cliente, 'csv')
+
+    assert resposta.mimetype == 'text/csv'
+    linhas = list(csv.reader(io.StringIO(resposta.get_data(as_text=True))))
+    assert linhas[0] == [cabecalho for cabecalho, _, _ in banco.EXPORT_COLUNAS]
+    esperado = [tuple('' if valor is None else str(valor) for valor in linha) for linha in _esperado(banco)]
+    assert sorted(tuple(linha) for linha in linhas[1:]) == esperado
+
+
+def test_parquet_tem_o_conteudo_da_consulta(banco, cliente, lote_pequeno):
+    pq = pytest.importorskip('pyarrow.parquet')
+    _criar_employees(banco)
+
+    resposta = _exportar(cliente, 'parquet', team_in='Turma A')
+
+    tabela = pq.read_table(io.BytesIO(resposta.data))
+    assert tabela.column_names == [cabecalho for cabecalho, _, _ in banco.EXPORT_COLUNAS]
+    assert str(tabela.schema.field('Data de Admissão').type) == 'date32[day]'
+    assert str(tabela.schema.field('Última Atualização').type) == 'timestamp[us]'
+    # Datas tipadas no Parquet: formatadas aqui para comparar com as outras exportações
+    formatos = [formato for _, _, formato in banco.EXPORT_COLUNAS]
+    corpo = sorted(
+        tuple((valor.strftime(formato) if valor else '') if formato else ('' if valor is None else valor)
+              for valor, formato in zip(linha.values(), formatos))
+        for linha in tabela.to_pylist()
+    )
+    assert corpo == _esperado(banco, lambda e: e.team == 'Turma A')
+
+
+def test_parquet_vazio_tem_o_schema(banco, cliente):
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    tabela = pq.read_table(io.BytesIO(_exportar(cliente, 'parquet').data))
+
+    assert tabela.num_rows == 0
+    assert tabela.column_names == [cabecalho for cabecalho, _, _ in banco.EXPORT_COLUNAS]
+
+
+def test_parquet_sem_pyarrow(banco, cliente, monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda nome, *args: None if nome == 'pyarrow' else find_spec(nome, *args))
+
+    assert cliente.get('/vivo/export_employees_excel?format=parquet').status_code == 501
+    # Os outros formatos não dependem do pyarrow
+    assert cliente.get('/vivo/export_employees_excel?format=csv').status_code == 200
+
+
+def test_formato_desconhecido(banco, cliente):
+    assert cliente.get('/vivo/export_employees_excel?format=ods').status_code == 400
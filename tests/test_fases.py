@@ -0,0 +1,48 @@
+import random
+from datetime import date, datetime, timedelta
+
+from app import PHASE_DATE_FIELDS, Employee, classificar_fases_linhas
+
+HOJE = date(2024, 6, 15)
+STATUS_CURSO = ['Concluído', 'concluido', 'CONCLUÍDO', 'Em Andamento', 'Não Iniciado', '', None]
+
+
+def _linha(employee):
+    return tuple(getattr(employee, campo) for campo in PHASE_DATE_FIELDS + ('course_status',))
+
+
+def _employee_aleatorio(sorteio):
+    dados = {}
+    for campo in PHASE_DATE_FIELDS:
+        if sorteio.random() < 0.3:
+            dados[campo] = None
+        else:
+            # Datas concentradas perto de hoje para cair nas bordas dos intervalos
+            dados[campo] = HOJE + timedelta(days=sorteio.randint(-20, 20))
+    return Employee(registration='1', full_name='Teste', course_status=sorteio.choice(STATUS_CURSO), **dados)
+
+
+def test_classificar_fases_igual_a_get_current_phase():
+    sorteio = random.Random(20240615)
+    employees = [_employee_aleatorio(sorteio) for _ in range(3000)]
+
+    fases = classificar_fases_linhas([_linha(e) for e in employees], today=HOJE)
+
+    esperadas = [e.get_current_phase(today=HOJE) for e in employees]
+    divergentes = [(i, f, e) for i, (f, e) in enumerate(zip(fases, esperadas)) if f != e]
+    assert not divergentes
+    # O sorteio precisa cobrir todas as fases para o teste valer
+    assert set(esperadas) == {'Integração', 'Normativo', 'Curso Técnico', 'Duplado', 'Operação',
+                              'Carregamento', 'Previsto', 'Sem Fase Ativa'}
+
+
+def test_classificar_fases_aceita_datetime():
+    employee = Employee(registration='1', full_name='Teste', course_status='Concluído',
+                        field_operation_date=datetime(2024, 6, 1, 10, 30))
+    linha = _linha(employee)
+
+    assert classificar_fases_linhas([linha], today=HOJE) == [employee.get_current_phase(today=HOJE)] == ['Operação']
+
+
+def test_classificar_fases_sem_linhas():
+    assert classificar_fases_linhas([], today=HOJE) == []
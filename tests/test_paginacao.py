@@ -0,0 +1,93 @@
+from datetime import date, timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+
+def _criar_employees(banco, total=23):
+    """Datas repetidas (empates resolvidos pelo id) e um terço sem data de operação"""
+    for i in range(total):
+        banco.db.session.add(banco.Employee(
+            registration=f'{i:03d}', brand='Vivo', full_name=f'Colaborador {i}',
+            team='Turma A' if i % 2 else ' Turma B ',
+            field_operation_date=None if i % 3 == 0 else date(2024, 1, 1) + timedelta(days=i % 4)
+        ))
+    banco.db.session.add(banco.Employee(registration='999', brand='Claro', full_name='Outra marca'))
+    banco.db.session.commit()
+
+
+def _ordem_esperada(banco, filtro=lambda e: True):
+    """Ids na ordem field_operation_date DESC NULLS LAST, id"""
+    employees = [e for e in banco.Employee.query.filter_by(brand='Vivo') if filtro(e)]
+    employees.sort(key=lambda e: (e.field_operation_date is None,
+                                  -e.field_operation_date.toordinal() if e.field_operation_date else 0, e.id))
+    return [e.id for e in employees]
+
+
+def _todas_as_paginas(banco, args=None, page_size=4):
+    ids, cursor, paginas = [], None, 0
+    while True:
+        employees, cursor = banco.pagina_employees('Vivo', args, cursor=cursor, page_size=page_size)
+        ids.extend(e.id for e in employees)
+        paginas += 1
+        if cursor is None:
+            return ids, paginas
+
+
+@pytest.mark.parametrize('page_size', [1, 4, 5, 7, 23, 50])
+def test_cursor_percorre_todos_sem_repetir(banco, page_size):
+    _criar_employees(banco)
+
+    ids, _ = _todas_as_paginas(banco, page_size=page_size)
+
+    assert ids == _ordem_esperada(banco)
+
+
+def test_pagina_atravessa_a_fronteira_das_datas_nulas(banco):
+    _criar_employees(banco)
+    ordem = _ordem_esperada(banco)
+    com_data = sum(1 for e in banco.Employee.query.filter_by(brand='Vivo') if e.field_operation_date)
+
+    # A primeira página termina no último colaborador com data e a seguinte começa nos nulos,
+    # depois uma página começa e termina dentro dos nulos
+    primeira, cursor = banco.pagina_employees('Vivo', cursor=None, page_size=com_data)
+    segunda, cursor = banco.pagina_employees('Vivo', cursor=cursor, page_size=2)
+    terceira, _ = banco.pagina_employees('Vivo', cursor=cursor, page_size=2)
+
+    assert [e.id for e in primeira + segunda + terceira] == ordem[:com_data + 4]
+    assert primeira[-1].field_operation_date is not None
+    assert all(e.field_operation_date is None for e in segunda + terceira)
+
+
+def test_cursor_com_filtros(banco):
+    _criar_employees(banco)
+    args = MultiDict([('team_in', 'Turma B'), ('q', 'Colaborador'), ('q_field', 'full_name')])
+
+    ids, paginas = _todas_as_paginas(banco, args, page_size=3)
+
+    assert ids == _ordem_esperada(banco, lambda e: e.team.strip() == 'Turma B')
+    assert paginas > 1
+
+
+def test_cursor_invalido(banco):
+    with pytest.raises(ValueError):
+        banco.pagina_employees('Vivo', cursor='nao-e-um-cursor')
+
+
+def test_api_pagina_com_os_mesmos_filtros(banco, cliente):
+    _criar_employees(banco)
+
+    ids, cursor = [], None
+    while True:
+        params = {'page_size': 2, 'team_in': 'Turma A', 'html': '1'}
+        if cursor:
+            params['cursor'] = cursor
+        resposta = cliente.get('/vivo/api/employees', query_string=params).get_json()
+        ids.extend(item['id'] for item in resposta['items'])
+        assert resposta['html'].count('<tr') == len(resposta['items'])
+        cursor = resposta['next_cursor']
+        if cursor is None:
+            break
+
+    assert ids == _ordem_esperada(banco, lambda e: e.team == 'Turma A')
+    assert cliente.get('/vivo/api/employees?cursor=x').status_code == 400
@@ -0,0 +1,116 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+PRIORIDADE = ['Integração', 'Normativo', 'Curso Técnico', 'Duplado', 'Operação', 'Carregamento', 'Previsto']
+
+
+def _criar_employees(banco, total=300):
+    sorteio = random.Random(4)
+    hoje = date.today()
+    datas_operacao = [hoje + timedelta(days=d) for d in (-40, -10, -3, 0, 5, 12)] + [None]
+    for i in range(total):
+        inicio = hoje + timedelta(days=sorteio.randint(-30, 30))
+        banco.db.session.add(banco.Employee(
+            registration=f'{i:04d}', brand=sorteio.choice(['Vivo', 'Claro']), full_name=f'Colaborador {i}',
+            corporate_manager=sorteio.choice(['Gerente A', 'Gerente B', 'Gerente C', None, '']),
+            employee_type=sorteio.choice(['Técnico', 'Instalador', None, '']),
+            operation_ready=sorteio.choice(['Sim', 'SIM', 'sim ', 'Sim, liberado', 'Não', 'nao', '', None]),
+            admission_date=sorteio.choice([None, hoje - timedelta(days=sorteio.randint(1, 400))]),
+            course_status=sorteio.choice(['Concluído', 'Em Andamento', None]),
+            integration_start=inicio, integration_end=inicio + timedelta(days=3),
+            normative_start=inicio + timedelta(days=4), normative_end=inicio + timedelta(days=8),
+            field_operation_date=sorteio.choice(datas_operacao)
+        ))
+    banco.db.session.commit()
+
+
+def _data_operacao(employee):
+    return employee.field_operation_date.strftime('%d/%m/%Y') if employee.field_operation_date else None
+
+
+def _apto_referencia(valor):
+    """Critério de apto da consulta original (lower(operation_ready) sim/sin ou começando por eles)"""
+    valor = (valor or '').lower()
+    return valor in ('sim', 'sin') or valor.startswith(('sim', 'sin'))
+
+
+def _referencia(banco, brand):
+    """Relatório montado colaborador a colaborador, como a versão original com uma consulta por célula"""
+    employees = banco.Employee.query.filter_by(brand=brand).order_by(banco.Employee.id).all()
+    gerentes = sorted({e.corporate_manager for e in employees if e.corporate_manager})
+    tipos = sorted({e.employee_type for e in employees if e.employee_type})
+
+    datas_tipos = {}
+    for data in sorted({e.field_operation_date for e in employees
+                        if e.field_operation_date and e.employee_type is not None}):
+        datas_tipos[data.strftime('%d/%m/%Y')] = sorted({
+            e.employee_type for e in employees if e.field_operation_date == data and e.employee_type
+        })
+
+    fases_por_data = {}
+    for data_str in datas_tipos:
+        fases = {e.current_phase for e in employees if _data_operacao(e) == data_str
+                 and e.current_phase and e.current_phase != 'Sem fase ativa'}
+        preferida = next((fase for fase in PRIORIDADE if fase in fases), None)
+        fases_por_data[data_str] = [preferida] if preferida else sorted(fases)
+
+    dados = {}
+    for gerente in gerentes:
+        dados[gerente] = {}
+        for data_str, tipos_data in datas_tipos.items():
+            dados[gerente][data_str] = {}
+            for tipo in tipos_data:
+                celula = [e for e in employees if e.corporate_manager == gerente and e.employee_type == tipo
+                          and _data_operacao(e) == data_str]
+                if not celula:
+                    continue
+                aptos = [e for e in celula if _apto_referencia(e.operation_ready)]
+                dados[gerente][data_str][tipo] = {
+                    'quantidade': len(aptos),
+                    'datas_admissao': [e.admission_date.strftime('%d/%m/%Y') for e in aptos if e.admission_date],
+                    'colaboradores': [{
+                        'operation_ready': e.operation_ready,
+                        'course_status': e.course_status,
+                        'admission_date': e.admission_date.strftime('%d/%m/%Y') if e.admission_date else None,
+                        'registration': e.registration,
+                        'full_name': e.full_name
+                    } for e in celula]
+                }
+    total = sum(info['quantidade'] for datas in dados.values() for tipos_data in datas.values()
+                for info in tipos_data.values())
+    return dict(gerentes=gerentes, tipos=tipos, datas_tipos=datas_tipos, fases_por_data=fases_por_data,
+                dados=dados, total_colaboradores=total)
+
+
+def _sem_ordem_de_admissao(dados):
+    # A ordem das datas de admissão agregadas no GROUP BY não é garantida pelo banco
+    for datas in dados.values():
+        for tipos_data in datas.values():
+            for info in tipos_data.values():
+                info['datas_admissao'] = sorted(info['datas_admissao'])
+    return dados
+
+
+@pytest.mark.parametrize('brand', ['Vivo', 'Claro'])
+def test_relatorio_igual_ao_calculo_por_celula(banco, brand):
+    _criar_employees(banco)
+    esperado = _referencia(banco, brand)
+
+    contexto = banco._contexto_relatorio_gerentes(brand)
+
+    assert esperado['total_colaboradores'] > 0
+    for chave in ('gerentes', 'tipos', 'datas_tipos', 'fases_por_data', 'total_colaboradores'):
+        assert contexto[chave] == esperado[chave], chave
+    assert list(contexto['datas_tipos']) == list(esperado['datas_tipos'])
+    assert _sem_ordem_de_admissao(contexto['dados']) == _sem_ordem_de_admissao(esperado['dados'])
+
+
+def test_rota_do_relatorio(banco, cliente):
+    _criar_employees(banco, total=40)
+
+    resposta = cliente.get('/relatorio/gerentes')
+
+    assert resposta.status_code == 200
+    assert 'Gerente A' in resposta.get_data(as_text=True)
@@ -0,0 +1,343 @@
+import io
+import json
+import time
+from datetime import date, timedelta
+
+import openpyxl
+import pytest
+
+
+def _linha(banco, matricula, **campos):
+    """Linha da planilha de importação (25 colunas por posição) com os campos informados"""
+    posicoes = dict(banco.UPLOAD_CAMPOS_TEXTO + banco.UPLOAD_CAMPOS_DATA)
+    linha = [None] * banco.UPLOAD_TOTAL_COLUNAS
+    linha[0] = matricula
+    for campo, valor in campos.items():
+        linha[posicoes[campo]] = valor
+    return linha
+
+
+def _planilha(banco):
+    return [
+        _linha(banco, '001', full_name='Ana', team='Turma B'),      # muda a turma; data vazia não apaga
+        _linha(banco, '002', full_name='Bruno', role=''),          # '' na planilha e NULL no banco
+        _linha(banco, '003', full_name='Carla', team='Turma A', field_operation_date='15/03/2024'),
+    ]
+
+
+def _criar_employees(banco):
+    banco.db.session.add_all([
+        banco.Employee(registration='001', brand='Vivo', full_name='Ana', team='Turma A',
+                       field_operation_date=date(2024, 1, 10)),
+        banco.Employee(registration='002', brand='Vivo', full_name='Bruno'),
+        banco.Employee(registration='001', brand='Claro', full_name='Ana Claro', team='Turma A'),
+    ])
+    banco.db.session.commit()
+
+
+def _diff(banco, linhas):
+    normalizado, _ = banco.normalizar_bloco_upload(banco._bloco_planilha(linhas, 0))
+    return banco.calcular_diff_upload(normalizado, 'Vivo')
+
+
+def _xlsx(banco, linhas):
+    workbook = openpyxl.Workbook()
+    planilha = workbook.active
+    planilha.append([f'Coluna {i}' for i in range(banco.UPLOAD_TOTAL_COLUNAS)])
+    for linha in linhas:
+        planilha.append(linha)
+    arquivo = io.BytesIO()
+    workbook.save(arquivo)
+    return arquivo.getvalue()
+
+
+def _aguardar_job(cliente, job_id, tempo=10):
+    limite = time.monotonic() + tempo
+    while time.monotonic() < limite:
+        job = cliente.get(f'/vivo/upload/jobs/{job_id}').get_json()
+        if job['status'] in ('done', 'error'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Importação {job_id} não terminou')
+
+
+def test_diff_separa_novos_alterados_e_inalterados(banco):
+    _criar_employees(banco)
+
+    diff = _diff(banco, _planilha(banco))
+
+    assert [registro['registration'] for registro in diff['created']] == ['003']
+    assert diff['created'][0]['field_operation_date'] == '2024-03-15'
+    assert diff['updated'] == [{'registration': '001', 'changes': {'team': ['Turma A', 'Turma B']}}]
+    assert diff['unchanged'] == 1
+    assert diff['fields'] == {'team': 1}
+
+
+def test_aplicar_diff_grava_so_o_que_mudou(banco):
+    _criar_employees(banco)
+
+    banco.aplicar_diff_upload(_diff(banco, _planilha(banco)), 'admin')
+    banco.db.session.commit()
+
+    ana = banco.Employee.query.filter_by(registration='001', brand='Vivo').one()
+    assert ana.team == 'Turma B'
+    assert ana.field_operation_date == date(2024, 1, 10)
+    assert banco.Employee.query.filter_by(registration='001', brand='Claro').one().team == 'Turma A'
+    assert banco.Employee.query.filter_by(registration='002', brand='Vivo').one().role is None
+
+    # As colunas derivadas do caminho em lote batem com as do ORM
+    carla = banco.Employee.query.filter_by(registration='003', brand='Vivo').one()
+    assert carla.current_phase == carla.get_current_phase()
+    assert carla.import_fingerprint == banco.impressao_digital(
+        tuple(getattr(carla, campo) for campo in banco.UPLOAD_CAMPOS)
+    )
+
+    auditoria = {(a.registration, a.field_changed, a.old_value, a.new_value, a.change_source, a.brand)
+                 for a in banco.AuditLog.query}
+    assert auditoria == {
+        ('001', 'team', 'Turma A', 'Turma B', 'upload', 'Vivo'),
+        ('003', 'new_employee', '', 'Novo colaborador criado', 'upload', 'Vivo'),
+    }
+
+    # A mesma planilha reaplicada não tem mais nada a gravar
+    diff = _diff(banco, _planilha(banco))
+    assert (diff['created'], diff['updated'], diff['unchanged']) == ([], [], 3)
+
+
+def _job_previa(banco, diff, base_version=None):
+    job = banco.UploadJob(
+        brand='Vivo', filename='planilha.xlsx', created_by='admin', status='pending', diff=json.dumps(diff),
+        base_version=banco.versao_dados('Vivo') if base_version is None else base_version
+    )
+    banco.db.session.add(job)
+    banco.db.session.commit()
+    return job.id
+
+
+def test_aplicar_previa_sem_mudancas_mantem_a_versao(banco):
+    _criar_employees(banco)
+    versao = banco.versao_dados('Vivo')
+    job_id = _job_previa(banco, _diff(banco, [_linha(banco, '002', full_name='Bruno')]))
+
+    banco.executar_aplicacao_diff(job_id, 'admin')
+
+    job = banco.db.session.get(banco.UploadJob, job_id)
+    assert job.status == 'done'
+    assert job.data_version == versao
+    assert banco.versao_dados('Vivo') == versao
+    assert banco.AuditLog.query.count() == 0
+
+
+def test_aplicar_previa_com_mudancas_incrementa_a_versao(banco):
+    _criar_employees(banco)
+    versao = banco.versao_dados('Vivo')
+    job_id = _job_previa(banco, _diff(banco, _planilha(banco)))
+
+    banco.executar_aplicacao_diff(job_id, 'admin')
+
+    job = banco.db.session.get(banco.UploadJob, job_id)
+    assert job.status == 'done'
+    assert banco.versao_dados('Vivo') == job.data_version == versao + 1
+    assert banco.Employee.query.filter_by(brand='Vivo').count() == 3
+
+
+def test_aplicar_previa_desatualizada_nao_grava(banco):
+    _criar_employees(banco)
+    job_id = _job_previa(banco, _diff(banco, _planilha(banco)))
+    banco.incrementar_versao_dados('Vivo')
+    banco.db.session.commit()
+
+    banco.executar_aplicacao_diff(job_id, 'admin')
+
+    assert banco.db.session.get(banco.UploadJob, job_id).status == 'error'
+    assert banco.Employee.query.filter_by(registration='003').count() == 0
+
+
+def test_previa_pela_rota_e_aplicacao(banco, cliente):
+    _criar_employees(banco)
+    conteudo = _xlsx(banco, _planilha(banco))
+
+    previa = cliente.post('/vivo/upload?dry_run=1', data={'file': (io.BytesIO(conteudo), 'planilha.xlsx')},
+                          content_type='multipart/form-data').get_json()
+    assert (previa['created'], previa['updated'], previa['unchanged']) == (1, 1, 1)
+    assert banco.Employee.query.filter_by(registration='003').count() == 0
+
+    resposta = cliente.post(f'/vivo/upload/jobs/{previa["job_id"]}/apply')
+    assert resposta.status_code == 202
+    assert _aguardar_job(cliente, previa['job_id'])['status'] == 'done'
+
+    banco.db.session.expire_all()
+    assert banco.Employee.query.filter_by(registration='001', brand='Vivo').one().team == 'Turma B'
+    assert banco.Employee.query.filter_by(registration='003', brand='Vivo').count() == 1
+
+
+def test_processar_upload_consolida_matriculas_repetidas(banco):
+    _criar_employees(banco)
+    versao = banco.versao_dados('Vivo')
+    linhas = _planilha(banco) + [
+        _linha(banco, '004', full_name='Davi', integration_start='01/02/2024', team='Turma A'),
+        _linha(banco, '004', full_name='Davi Souza', team='Turma C'),     # a data anterior continua valendo
+        _linha(banco, '005', full_name='Eva', admission_date='31/02/2024'),
+        _linha(banco, None, full_name='Sem matrícula'),
+    ]
+    erros = []
+
+    totais, incrementos, falhas = banco.processar_upload(
+        io.BytesIO(_xlsx(banco, linhas)), 'planilha.xlsx', 'Vivo', 'admin', erros=erros
+    )
+
+    assert (totais['created'], totais['updated'], totais['unchanged'], totais['errors']) == (3, 1, 1, 1)
+    assert (incrementos, falhas) == (1, 0)
+    assert banco.versao_dados('Vivo') == versao + 1
+    assert [(erro['row'], erro['registration']) for erro in erros] == [(7, '005')]
+
+    davi = banco.Employee.query.filter_by(registration='004', brand='Vivo').one()
+    assert (davi.full_name, davi.team, davi.integration_start) == ('Davi Souza', 'Turma C', date(2024, 2, 1))
+    assert banco.Employee.query.filter_by(registration='005', brand='Vivo').one().admission_date is None
+    assert banco.Employee.query.filter_by(brand='Vivo').count() == 5
+
+
+def test_reimportacao_pula_linhas_pela_impressao_digital(banco, monkeypatch):
+    _criar_employees(banco)
+    conteudo = _xlsx(banco, _planilha(banco))
+    banco.processar_upload(io.BytesIO(conteudo), 'planilha.xlsx', 'Vivo', 'admin')
+    versao = banco.versao_dados('Vivo')
+
+    # Linhas com o hash gravado não chegam à comparação campo a campo
+    buscadas = []
+    instantaneo = banco.instantaneo_employees
+
+    def registrar(brand, matriculas, *args, **kwargs):
+        buscadas.append(list(matriculas))
+        return instantaneo(brand, matriculas, *args, **kwargs)
+
+    monkeypatch.setattr(banco, 'instantaneo_employees', registrar)
+    totais, incrementos, _ = banco.processar_upload(io.BytesIO(conteudo), 'planilha.xlsx', 'Vivo', 'admin')
+
+    assert (totais['created'], totais['updated'], totais['unchanged']) == (0, 0, 3)
+    assert incrementos == 0
+    assert banco.versao_dados('Vivo') == versao
+    # 001 (data vazia na planilha) e 002 ('' contra NULL) têm hash diferente, mas nenhuma mudança
+    assert buscadas[1] == ['001', '002']
+
+
+def test_reenvio_identico_nao_agenda_importacao(banco, cliente):
+    _criar_employees(banco)
+    conteudo = _xlsx(banco, _planilha(banco))
+
+    def enviar():
+        return cliente.post('/vivo/upload', data={'file': (io.BytesIO(conteudo), 'planilha.xlsx')},
+                            content_type='multipart/form-data')
+
+    primeira = enviar()
+    assert primeira.status_code == 202
+    assert _aguardar_job(cliente, primeira.get_json()['job_id'])['status'] == 'done'
+
+    repetida = enviar()
+    assert repetida.status_code == 200
+    assert repetida.get_json()['job_id'] == primeira.get_json()['job_id']
+    assert banco.UploadJob.query.count() == 1
+
+    # Depois de outra escrita na marca o mesmo arquivo volta a ser importado
+    banco.incrementar_versao_dados('Vivo')
+    banco.db.session.commit()
+    terceira = enviar()
+    assert terceira.status_code == 202
+    assert _aguardar_job(cliente, terceira.get_json()['job_id'])['status'] == 'done'
+
+
+def test_reenvio_identico_depois_da_virada_de_fases(banco, cliente):
+    _criar_employees(banco)
+    inicio = date.today() + timedelta(days=2)
+    linhas = _planilha(banco) + [_linha(banco, '006', full_name='Fabio', course_status='Em Andamento',
+                                        integration_start=inicio.strftime('%d/%m/%Y'))]
+    conteudo = _xlsx(banco, linhas)
+
+    def enviar():
+        return cliente.post('/vivo/upload', data={'file': (io.BytesIO(conteudo), 'planilha.xlsx')},
+                            content_type='multipart/form-data')
+
+    primeira = enviar()
+    assert _aguardar_job(cliente, primeira.get_json()['job_id'])['status'] == 'done'
+    fases = banco.versao_dados('Vivo', banco.VERSAO_FASES)
+
+    # A virada de dia muda a fase de 006 e invalida o cache, mas não os colaboradores
+    assert banco.atualizar_fases_vencidas('Vivo', today=inicio) == 1
+    assert banco.versao_dados('Vivo', banco.VERSAO_FASES) == fases + 1
+
+    repetida = enviar()
+    assert repetida.status_code == 200
+    assert repetida.get_json()['job_id'] == primeira.get_json()['job_id']
+
+
+def test_aplicar_previa_com_escrita_concorrente_nao_sobrescreve(banco, monkeypatch):
+    _criar_employees(banco)
+    base = banco.versao_dados('Vivo')
+    job_id = _job_previa(banco, _diff(banco, _planilha(banco)))
+    versao_dados = banco.versao_dados
+
+    def escrita_depois_da_conferencia(*args, **kwargs):
+        # Outra edição confirmada logo depois de executar_aplicacao_diff conferir a versão
+        versao = versao_dados(*args, **kwargs)
+        with banco.db.engine.begin() as conn:
+            tabela = banco.Employee.__table__
+            conn.execute(tabela.update().where(tabela.c.registration == '001', tabela.c.brand == 'Vivo')
+                         .values(team='Turma D'))
+            banco.incrementar_versao_dados('Vivo', conexao=conn)
+        return versao
+
+    monkeypatch.setattr(banco, 'versao_dados', escrita_depois_da_conferencia)
+    banco.executar_aplicacao_diff(job_id, 'admin')
+    monkeypatch.undo()
+
+    job = banco.db.session.get(banco.UploadJob, job_id)
+    assert job.status == 'error'
+    assert job.data_version is None
+    assert banco.versao_dados('Vivo') == base + 1
+    banco.db.session.expire_all()
+    assert banco.Employee.query.filter_by(registration='001', brand='Vivo').one().team == 'Turma D'
+    assert banco.Employee.query.filter_by(registration='003').count() == 0
+    assert banco.AuditLog.query.count() == 0
+
+
+def test_planilha_xls_com_colunas_faltando_e_rejeitada(banco, monkeypatch):
+    # O .xls é lido inteiro pelo pandas (não há gravador de .xls instalado para gerar o arquivo)
+    curta = banco._bloco_planilha([_linha(banco, '001', full_name='Ana')], 0).iloc[:, :20]
+    monkeypatch.setattr(banco.pd, 'read_excel', lambda *args, **kwargs: curta)
+    erros = []
+
+    with pytest.raises(ValueError, match='20 colunas'):
+        banco.processar_upload(io.BytesIO(b''), 'planilha.xls', 'Vivo', 'admin', erros=erros)
+
+    assert erros == []
+    assert banco.Employee.query.count() == 0
+
+
+def test_bloco_com_falha_e_desfeito_sem_afetar_os_outros(banco, monkeypatch):
+    versao = banco.versao_dados('Vivo')
+    linhas = [_linha(banco, f'{i:03d}', full_name=f'Colaborador {i}') for i in range(6)]
+    ler, importar = banco.ler_planilha_em_blocos, banco.importar_employees
+
+    def importar_com_falha(bloco, *args, **kwargs):
+        # O segundo bloco falha depois de já ter gravado as linhas na transação
+        contagem = importar(bloco, *args, **kwargs)
+        banco.db.session.flush()
+        if '002' in set(bloco[0]):
+            raise RuntimeError('falha simulada')
+        return contagem
+
+    monkeypatch.setattr(banco, 'ler_planilha_em_blocos', lambda arquivo, nome: ler(arquivo, nome, tamanho=2))
+    monkeypatch.setattr(banco, 'importar_employees', importar_com_falha)
+    erros, progresso = [], []
+
+    totais, incrementos, falhas = banco.processar_upload(
+        io.BytesIO(_xlsx(banco, linhas)), 'planilha.xlsx', 'Vivo', 'admin', progresso=progresso.append, erros=erros
+    )
+
+    assert (totais['chunks'], totais['created'], totais['errors']) == (3, 4, 2)
+    assert (incrementos, falhas) == (2, 1)
+    assert [parcial['chunks'] for parcial in progresso] == [1, 2, 3]
+    assert erros == [{'row': 4, 'registration': None, 'error': 'Linhas 4 a 5 não importadas: falha simulada'}]
+    assert sorted(e.registration for e in banco.Employee.query) == ['000', '001', '004', '005']
+    assert sorted(a.registration for a in banco.AuditLog.query) == ['000', '001', '004', '005']
+    assert banco.versao_dados('Vivo') == versao + 2
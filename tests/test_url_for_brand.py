@@ -0,0 +1,48 @@
+import pytest
+from werkzeug.routing import BuildError
+
+
+@pytest.fixture
+def contexto(banco):
+    """Contexto de requisição anônima em uma rota sem marca"""
+    banco.url_for_brand_nao_resolvidos.clear()
+    with banco.app.test_request_context('/relatorio/gerentes'):
+        yield banco
+
+
+def test_marca_explicita_usa_a_variante_da_marca(contexto):
+    assert contexto.url_for_brand('view_employee', brand='Vivo', employee_id=7) == '/vivo/employee/view/7'
+    assert contexto.url_for_brand('view_employee', brand='claro', employee_id=7) == '/claro/employee/view/7'
+    # Só existe o genérico
+    assert contexto.url_for_brand('audit_log', brand='Claro') == '/audit_log'
+
+
+def test_sem_marca_usa_a_primeira_variante_registrada(contexto):
+    assert contexto.url_for_brand('download_modelo') == '/vivo/download_modelo'
+    assert contexto.url_for_brand('relatorio_gerentes') == '/relatorio/gerentes'
+
+
+def test_marca_inferida_da_rota(banco):
+    with banco.app.test_request_context('/claro/'):
+        assert banco.url_for_brand('upload_job_status', job_id='abc') == '/claro/upload/jobs/abc'
+
+
+def test_endpoint_desconhecido_e_contado(contexto):
+    with pytest.raises(BuildError):
+        contexto.url_for_brand('nao_existe', brand='Vivo')
+    assert contexto.url_for_brand_nao_resolvidos['nao_existe'] == 1
+
+
+def test_variante_que_nao_monta_cai_no_generico(contexto, monkeypatch):
+    # Variante da marca com parâmetros diferentes dos do genérico
+    mapa = dict(contexto._mapa_endpoints_marca())
+    mapa[('view_employee', '_vivo')] = 'upload_job_status_vivo'
+    monkeypatch.setattr(contexto, '_endpoints_marca', mapa)
+
+    assert contexto.url_for_brand('view_employee', brand='Vivo', employee_id=7) == '/employee/view/7'
+    assert contexto.url_for_brand_nao_resolvidos['view_employee'] == 1
+
+    # Sem genérico registrado o BuildError da variante sobe
+    mapa[('download_modelo', '_vivo')] = 'upload_job_status_vivo'
+    with pytest.raises(BuildError):
+        contexto.url_for_brand('download_modelo', brand='Vivo')
@@ -0,0 +1,77 @@
+import random
+from datetime import date, datetime, timedelta
+
+HOJE = date.today()
+
+
+def _criar_employees(banco, total=40):
+    """Datas perto de hoje para que parte dos colaboradores mude de fase nos próximos dias"""
+    sorteio = random.Random(40)
+    for i in range(total):
+        inicio = HOJE + timedelta(days=sorteio.randint(-6, 6))
+        banco.db.session.add(banco.Employee(
+            registration=f'{i:03d}', brand='Vivo' if i % 4 else 'Claro', full_name=f'Colaborador {i}',
+            course_status='Em Andamento', integration_start=inicio, integration_end=inicio + timedelta(days=2),
+            normative_start=inicio + timedelta(days=3), normative_end=inicio + timedelta(days=5)
+        ))
+    banco.db.session.commit()
+
+
+def _estado(banco):
+    banco.db.session.expire_all()
+    return {e.id: (e.current_phase, e.phase_computed_on) for e in banco.Employee.query}
+
+
+def test_virada_grava_apenas_as_fases_que_mudaram(banco, monkeypatch):
+    monkeypatch.setattr(banco, 'FASES_LOTE', 3)
+    _criar_employees(banco)
+    antes = _estado(banco)
+    versoes = {marca: banco.versoes_dados(marca, (None, banco.VERSAO_FASES)) for marca in banco.MARCAS}
+
+    # No mesmo dia nenhuma fase muda: nada é gravado e o cache continua valendo
+    assert banco.atualizar_fases_vencidas(today=HOJE) == 0
+    assert _estado(banco) == antes
+    assert {marca: banco.versoes_dados(marca, (None, banco.VERSAO_FASES)) for marca in banco.MARCAS} == versoes
+
+    amanha = HOJE + timedelta(days=3)
+    esperadas = {e.id: e.get_current_phase(today=amanha) for e in banco.Employee.query}
+    mudaram = {id for id, fase in esperadas.items() if fase != antes[id][0]}
+    assert mudaram and len(mudaram) < len(antes)
+
+    assert banco.atualizar_fases_vencidas('Vivo', today=amanha) == len(
+        [id for id in mudaram if banco.db.session.get(banco.Employee, id).brand == 'Vivo'])
+    assert banco.atualizar_fases_vencidas(today=amanha) == len(
+        [id for id in mudaram if banco.db.session.get(banco.Employee, id).brand == 'Claro'])
+
+    depois = _estado(banco)
+    assert {id: fase for id, (fase, _) in depois.items()} == esperadas
+    # Quem não mudou de fase não é regravado
+    assert {id for id in depois if depois[id] != antes[id]} == mudaram
+    assert all(depois[id][1] == amanha for id in mudaram)
+    # Só a versão das fases muda: a dos colaboradores (atalho do reenvio idêntico) continua valendo
+    for marca, (dados, fases) in versoes.items():
+        assert banco.versoes_dados(marca, (None, banco.VERSAO_FASES)) == (dados, fases + 1)
+
+
+def test_rotas_de_leitura_so_preenchem_fases_pendentes(banco):
+    _criar_employees(banco, total=4)
+    # Linha inserida direto na tabela, sem os eventos do ORM
+    banco.db.session.execute(banco.Employee.__table__.insert().values(
+        registration='900', brand='Vivo', full_name='Sem fase', field_operation_date=HOJE - timedelta(days=1),
+        course_status='Concluído', last_updated=datetime.utcnow()
+    ))
+    banco.db.session.commit()
+    antes = _estado(banco)
+    versoes = banco.versoes_dados('Vivo', (None, banco.VERSAO_FASES))
+
+    # Dias depois, a leitura só calcula a fase que faltava; a virada fica com o job diário
+    depois_de_amanha = HOJE + timedelta(days=2)
+    assert banco.preencher_fases_pendentes('Vivo', today=depois_de_amanha) == 1
+    assert banco.preencher_fases_pendentes('Vivo', today=depois_de_amanha) == 0
+
+    depois = _estado(banco)
+    pendente = banco.Employee.query.filter_by(registration='900').one()
+    assert depois[pendente.id] == ('Operação', depois_de_amanha)
+    assert {id: estado for id, estado in depois.items() if id != pendente.id} == {
+        id: estado for id, estado in antes.items() if id != pendente.id}
+    assert banco.versoes_dados('Vivo', (None, banco.VERSAO_FASES)) == (versoes[0], versoes[1] + 1)